@@ -0,0 +1,46 @@
+# Generated by Django 5.1.4 on 2026-10-17 00:10
+
+from django.db import migrations, models
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+
+
+def backfill_daily_rollups(apps, schema_editor):
+    Application = apps.get_model('applications', 'Application')
+    ApplicationDailyRollup = apps.get_model('applications', 'ApplicationDailyRollup')
+    grouped = (
+        Application.objects.order_by()
+        .values('status', day=TruncDate('applied_at'), opportunity_type=F('opportunity__type'))
+        .annotate(count=Count('id'))
+    )
+    ApplicationDailyRollup.objects.bulk_create(
+        [ApplicationDailyRollup(date=row['day'], opportunity_type=row['opportunity_type'],
+                                status=row['status'], count=row['count'])
+         for row in grouped],
+        batch_size=1000,
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('applications', '0004_remove_application_documents_application_resume'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ApplicationDailyRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('opportunity_type', models.CharField(max_length=50)),
+                ('status', models.CharField(max_length=20)),
+                ('count', models.IntegerField(default=0)),
+            ],
+            options={
+                'indexes': [models.Index(fields=['date'], name='application_date_6d4a24_idx')],
+                'unique_together': {('date', 'opportunity_type', 'status')},
+            },
+        ),
+        migrations.RunPython(backfill_daily_rollups, migrations.RunPython.noop),
+    ]
@@ -1,4 +1,8 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, F
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+from django.utils.functional import cached_property
 import uuid
 from users.models import User
 from opportunities.models import Opportunity
@@ -45,6 +49,127 @@ class Application(models.Model):
     def __str__(self):
         return f"{self.user.email} - {self.opportunity.title}"
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored status so save() can tell when it changes
+        instance._loaded_status = dict(zip(field_names, values)).get('status')
+        return instance
+
+    @property
+    def counts_towards_total(self):
+        return self.status != 'withdrawn'
+
+    @cached_property
+    def opportunity_type(self):
+        if Application.opportunity.is_cached(self):
+            return self.opportunity.type
+        return Opportunity.objects.values_list('type', flat=True).get(pk=self.opportunity_id)
+
+    def rollup_key(self, status=None):
+        return (timezone.localdate(self.applied_at), self.opportunity_type, status or self.status)
+
     def save(self, *args, **kwargs):
+        creating = self._state.adding
+        previous_status = getattr(self, '_loaded_status', None)
         super().save(*args, **kwargs)
-        self.opportunity.update_counts() 
\ No newline at end of file
+
+        if creating:
+            ApplicationDailyRollup.adjust(*self.rollup_key(), 1)
+        elif previous_status is not None and previous_status != self.status:
+            ApplicationDailyRollup.adjust(*self.rollup_key(previous_status), -1)
+            ApplicationDailyRollup.adjust(*self.rollup_key(), 1)
+
+        # Only creation and (un)withdrawal can change applications_count
+        if creating:
+            delta = int(self.counts_towards_total)
+        elif previous_status is None:
+            delta = 0
+        else:
+            delta = int(self.counts_towards_total) - int(previous_status != 'withdrawn')
+        if delta:
+            Opportunity.adjust_applications_count(self.opportunity_id, delta)
+        self._loaded_status = self.status
+
+
+class ApplicationDailyRollup(models.Model):
+    """Applications per applied-at day, opportunity type and current status.
+
+    Kept up to date by Application.save() and the delete signals (grouped
+    per opportunity when one is deleted) so analytics never scan the
+    applications table. Rebuild with
+    ``manage.py backfill_application_rollups`` after bulk imports or if an
+    opportunity's type is changed.
+    """
+    date = models.DateField()
+    opportunity_type = models.CharField(max_length=50)
+    status = models.CharField(max_length=20)
+    count = models.IntegerField(default=0)
+
+    class Meta:
+        unique_together = ['date', 'opportunity_type', 'status']
+        indexes = [
+            models.Index(fields=['date']),
+        ]
+
+    def __str__(self):
+        return f"{self.date} {self.opportunity_type}/{self.status}: {self.count}"
+
+    @classmethod
+    def adjust(cls, date, opportunity_type, status, delta):
+        rows = cls.objects.filter(date=date, opportunity_type=opportunity_type, status=status)
+        if rows.update(count=F('count') + delta) or delta < 0:
+            return
+        # First application of its kind that day; another request may race us to the row
+        cls.objects.bulk_create(
+            [cls(date=date, opportunity_type=opportunity_type, status=status)],
+            ignore_conflicts=True,
+        )
+        rows.update(count=F('count') + delta)
+
+    @classmethod
+    def adjust_many(cls, deltas):
+        """Apply ``{(date, opportunity_type, status): delta}`` in a few statements.
+
+        Rows sharing a type, status and delta are shifted by one UPDATE over
+        their dates.
+        """
+        grouped = {}
+        for (date, opportunity_type, status), delta in deltas.items():
+            if delta:
+                grouped.setdefault((opportunity_type, status, delta), []).append(date)
+        if not grouped:
+            return
+
+        with transaction.atomic():
+            cls.objects.bulk_create(
+                [cls(date=date, opportunity_type=opportunity_type, status=status)
+                 for (date, opportunity_type, status), delta in deltas.items() if delta > 0],
+                ignore_conflicts=True,
+            )
+            for (opportunity_type, status, delta), dates in grouped.items():
+                cls.objects.filter(
+                    opportunity_type=opportunity_type, status=status, date__in=dates
+                ).update(count=F('count') + delta)
+
+    @staticmethod
+    def grouped_counts(applications):
+        """``(date, opportunity_type, status, count)`` rows for an Application queryset."""
+        return (
+            applications.order_by()
+            .values('status', day=TruncDate('applied_at'), opportunity_type=F('opportunity__type'))
+            .annotate(count=Count('id'))
+            .values_list('day', 'opportunity_type', 'status', 'count')
+        )
+
+    @classmethod
+    def rebuild(cls):
+        """Recompute every row from the applications table."""
+        grouped = cls.grouped_counts(Application.objects.all())
+        with transaction.atomic():
+            cls.objects.all().delete()
+            return cls.objects.bulk_create(
+                [cls(date=day, opportunity_type=opportunity_type, status=status, count=count)
+                 for day, opportunity_type, status, count in grouped.iterator()],
+                batch_size=1000,
+            )
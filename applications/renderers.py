@@ -0,0 +1,42 @@
+import csv
+import io
+import json
+
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+
+class StreamingExportRenderer(BaseRenderer):
+    """Lets ``?format=csv|ndjson`` pass content negotiation.
+
+    The export view streams the body itself, so these renderers are only
+    used to render error responses such as permission failures.
+    """
+    charset = 'utf-8'
+
+class CSVRenderer(StreamingExportRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if not isinstance(data, dict):
+            data = {'detail': data}
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(data.keys())
+        # Nested values such as field error lists go into their cell as JSON
+        writer.writerow(
+            value if isinstance(value, str) else json.dumps(value, cls=DjangoJSONEncoder)
+            for value in data.values()
+        )
+        return buffer.getvalue().encode(self.charset)
+
+class NDJSONRenderer(StreamingExportRenderer):
+    media_type = 'application/x-ndjson'
+    format = 'ndjson'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return JSONRenderer().render(data) + b'\n'
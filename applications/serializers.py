@@ -1,7 +1,10 @@
 from rest_framework import serializers
+from core.instrumentation import TimedSerializerMixin
 from .models import Application
-from users.serializers import UserSerializer
+from .transitions import is_allowed
+from users.serializers import UserThumbnailSerializer
 from opportunities.models import Opportunity
+from utils.uploads import DOCUMENT_KINDS, sniff_file_kind
 
 class OpportunityBasicSerializer(serializers.ModelSerializer):
     """Basic Opportunity serializer to avoid circular imports"""
@@ -9,8 +12,8 @@ class OpportunityBasicSerializer(serializers.ModelSerializer):
         model = Opportunity
         fields = ['id', 'title', 'organization', 'type', 'location']
 
-class ApplicationSerializer(serializers.ModelSerializer):
-    user = UserSerializer(read_only=True)
+class ApplicationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    user = UserThumbnailSerializer(read_only=True)
     opportunity = OpportunityBasicSerializer(read_only=True)
     
     class Meta:
@@ -31,10 +34,8 @@ class ApplicationCreateSerializer(serializers.ModelSerializer):
             if value.size > 5 * 1024 * 1024:
                 raise serializers.ValidationError("File size too large. Maximum size is 5MB.")
             
-            # Check file type
-            allowed_types = ['application/pdf', 'application/msword', 
-                           'application/vnd.openxmlformats-officedocument.wordprocessingml.document']
-            if value.content_type not in allowed_types:
+            # Check file type from its magic bytes, not the client's content type
+            if sniff_file_kind(value) not in DOCUMENT_KINDS:
                 raise serializers.ValidationError("Invalid file type. Please upload a PDF or Word document.")
         return value
 
@@ -50,7 +51,13 @@ class ApplicationStatusUpdateSerializer(serializers.ModelSerializer):
         model = Application
         fields = ['status', 'admin_notes', 'interview_date', 'interview_feedback', 'rejection_reason']
 
-class ApplicationExportSerializer(serializers.ModelSerializer):
+    def validate_status(self, value):
+        current = self.instance.status if self.instance else None
+        if current is not None and value != current and not is_allowed(current, value):
+            raise serializers.ValidationError(f"Cannot move an application from {current} to {value}.")
+        return value
+
+class ApplicationExportSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     user_email = serializers.CharField(source='user.email')
     user_name = serializers.CharField(source='user.name')
     opportunity_title = serializers.CharField(source='opportunity.title')
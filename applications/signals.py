@@ -0,0 +1,49 @@
+from django.db.models.signals import post_delete, post_save, pre_delete
+from django.dispatch import receiver
+from core.cache import bump_generation
+from opportunities.models import Opportunity
+from .models import Application, ApplicationDailyRollup
+
+# Deleting an opportunity cascades to its applications one row at a time.
+# Their rollups are settled in one grouped query up front, and the ids of
+# settled opportunities are kept on the deletion's origin so the per-row
+# receivers below skip them. applications_count needs no update at all,
+# since its row is deleted too.
+
+def is_settled(instance, origin):
+    return instance.opportunity_id in getattr(origin, '_settled_opportunity_ids', ())
+
+@receiver(pre_delete, sender=Opportunity)
+def settle_cascaded_applications(sender, instance, origin=None, **kwargs):
+    if origin is None:
+        return
+    applications = Application.objects.filter(opportunity=instance)
+    ApplicationDailyRollup.adjust_many({
+        (day, opportunity_type, status): -count
+        for day, opportunity_type, status, count
+        in ApplicationDailyRollup.grouped_counts(applications)
+    })
+    if not hasattr(origin, '_settled_opportunity_ids'):
+        origin._settled_opportunity_ids = set()
+    origin._settled_opportunity_ids.add(instance.pk)
+    bump_generation('applications')
+
+@receiver(post_delete, sender=Opportunity)
+def forget_settled_applications(sender, instance, origin=None, **kwargs):
+    getattr(origin, '_settled_opportunity_ids', set()).discard(instance.pk)
+
+@receiver(post_delete, sender=Application)
+def decrement_applications_count(sender, instance, origin=None, **kwargs):
+    if instance.counts_towards_total and not is_settled(instance, origin):
+        Opportunity.adjust_applications_count(instance.opportunity_id, -1)
+
+@receiver(post_delete, sender=Application)
+def decrement_daily_rollup(sender, instance, origin=None, **kwargs):
+    if not is_settled(instance, origin):
+        ApplicationDailyRollup.adjust(*instance.rollup_key(), -1)
+
+@receiver(post_save, sender=Application)
+@receiver(post_delete, sender=Application)
+def invalidate_application_caches(sender, instance, origin=None, **kwargs):
+    if not is_settled(instance, origin):
+        bump_generation('applications')
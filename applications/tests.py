@@ -1,3 +1,474 @@
-from django.test import TestCase
+import csv
+import json
+import shutil
+import tempfile
+import time
+from datetime import timedelta
+from io import StringIO
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from django.utils.http import http_date
+from rest_framework.test import APIClient
+
+from core.cache import bump_generation, get_generations
+from core.testing import create_opportunity, create_user
+from notifications.models import Notification, NotificationCounter
+from opportunities.models import Opportunity
+from users.models import User
+from .models import Application, ApplicationDailyRollup
+
+
+class ApplicationsCountTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin@yabatech.edu.ng', role='administrator')
+        self.student = create_user('student@yabatech.edu.ng')
+        self.opportunity = create_opportunity(self.admin)
+
+    def apply(self, user=None):
+        return Application.objects.create(
+            user=user or self.student, opportunity=self.opportunity, cover_letter='Hello'
+        )
+
+    def assertCount(self, expected):
+        self.opportunity.refresh_from_db(fields=['applications_count'])
+        self.assertEqual(self.opportunity.applications_count, expected)
+
+    def test_create_increments_count(self):
+        self.apply()
+        self.apply(create_user('other@yabatech.edu.ng'))
+        self.assertCount(2)
+
+    def test_edit_does_not_touch_opportunity(self):
+        application = Application.objects.get(pk=self.apply().pk)
+        application.interview_feedback = 'Great interview'
+        with CaptureQueriesContext(connection) as ctx:
+            application.save()
+        self.assertEqual(len(ctx), 1)
+        self.assertCount(1)
+
+    def test_withdraw_and_delete_decrement_count(self):
+        application = Application.objects.get(pk=self.apply().pk)
+        other = self.apply(create_user('other@yabatech.edu.ng'))
+        application.status = 'withdrawn'
+        application.save()
+        self.assertCount(1)
+        application.delete()
+        self.assertCount(1)
+        other.delete()
+        self.assertCount(0)
+
+    def test_deleting_opportunity_skips_counts_of_its_applications(self):
+        for index in range(20):
+            self.apply(create_user(f'student{index}@example.com'))
+        with CaptureQueriesContext(connection) as ctx:
+            self.opportunity.delete()
+        updates = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('UPDATE')]
+        self.assertFalse([sql for sql in updates if 'applications_count' in sql])
+        self.assertFalse(Application.objects.exists())
+
+    def test_deleting_applicant_still_decrements_count(self):
+        self.apply()
+        self.apply(create_user('other@yabatech.edu.ng'))
+        self.student.delete()
+        self.assertCount(1)
+
+    def test_reconcile_counts_repairs_drift(self):
+        self.apply()
+        Opportunity.objects.filter(pk=self.opportunity.pk).update(applications_count=42)
+        out = StringIO()
+        call_command('reconcile_counts', stdout=out)
+        self.assertIn('Reconciled 1', out.getvalue())
+        self.assertCount(1)
+
+
+class ApplicationDailyRollupTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user('admin@yabatech.edu.ng', role='administrator')
+        self.opportunity = create_opportunity(self.admin, type='internship')
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def apply(self, email):
+        return Application.objects.create(
+            user=create_user(email), opportunity=self.opportunity, cover_letter='Hello'
+        )
+
+    def rollups(self):
+        return sorted(
+            ApplicationDailyRollup.objects.filter(count__gt=0)
+            .values_list('date', 'opportunity_type', 'status', 'count')
+        )
+
+    def test_incremental_maintenance_matches_rebuild(self):
+        first = Application.objects.get(pk=self.apply('a@yabatech.edu.ng').pk)
+        second = self.apply('b@yabatech.edu.ng')
+        self.apply('c@yabatech.edu.ng')
+        first.status = 'accepted'
+        first.save()
+        second.delete()
+
+        today = timezone.localdate()
+        self.assertEqual(self.rollups(), [
+            (today, 'internship', 'accepted', 1),
+            (today, 'internship', 'pending', 1),
+        ])
+        incremental = self.rollups()
+        call_command('backfill_application_rollups', stdout=StringIO())
+        self.assertEqual(self.rollups(), incremental)
+
+    def test_status_edit_reads_only_the_opportunity_type(self):
+        application = Application.objects.get(pk=self.apply('a@yabatech.edu.ng').pk)
+        application.status = 'accepted'
+        with CaptureQueriesContext(connection) as ctx:
+            application.save()
+        selects = [q['sql'] for q in ctx.captured_queries if q['sql'].startswith('SELECT')]
+        self.assertEqual(len(selects), 1)
+        self.assertNotIn('"opportunities_opportunity"."title"', selects[0])
+
+    def test_opportunity_cascade_settles_rollups_in_constant_queries(self):
+        other = create_opportunity(self.admin, type='job')
+        Application.objects.create(
+            user=create_user('x@yabatech.edu.ng'), opportunity=other, cover_letter='Hello'
+        )
+        for index in range(20):
+            self.apply(f'student{index}@yabatech.edu.ng')
+
+        with CaptureQueriesContext(connection) as small:
+            other.delete()
+        with CaptureQueriesContext(connection) as large:
+            self.opportunity.delete()
+        self.assertEqual(len(large), len(small))
+        self.assertEqual(self.rollups(), [])
+
+    def test_analytics_reads_requested_range_from_rollup(self):
+        self.apply('a@yabatech.edu.ng')
+        old = self.apply('b@yabatech.edu.ng')
+        Application.objects.filter(pk=old.pk).update(applied_at=timezone.now() - timedelta(days=90))
+        call_command('backfill_application_rollups', stdout=StringIO())
+
+        today = timezone.localdate()
+        url = '/api/opportunities/opportunities/analytics/'
+        with self.assertNumQueries(2):
+            response = self.client.get(url)
+        self.assertEqual(response.data['application_trends'], {today.isoformat(): 1})
+        self.assertEqual(response.data['applications_by_type'], {'internship': 1})
+        self.assertEqual(response.data['by_status'], {'active': 1})
+
+        start = (today - timedelta(days=120)).isoformat()
+        response = self.client.get(url, {'start': start})
+        self.assertEqual(sum(response.data['application_trends'].values()), 2)
+        self.assertEqual(response.data['applications_by_status'], {'pending': 2})
+
+        for params in ({'start': 'yesterday'}, {'start': today.isoformat(), 'end': start}):
+            self.assertEqual(self.client.get(url, params).status_code, 400)
+
+
+class BulkStatusTransitionTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user('admin@yabatech.edu.ng', role='administrator')
+        self.opportunity = create_opportunity(self.admin, type='internship')
+        self.applications = [
+            Application.objects.create(
+                user=create_user(f'student{i}@yabatech.edu.ng'),
+                opportunity=self.opportunity, cover_letter='Hello'
+            )
+            for i in range(30)
+        ]
+        self.url = f'/api/opportunities/opportunities/{self.opportunity.pk}/bulk_status_update/'
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def transition(self, applications, new_status, extra_ids=()):
+        ids = [str(application.pk) for application in applications] + list(extra_ids)
+        return self.client.post(self.url, {'application_ids': ids, 'status': new_status}, format='json')
+
+    def test_updates_pool_with_constant_queries_and_bulk_side_effects(self):
+        rejected = Application.objects.get(pk=self.applications[0].pk)
+        rejected.status = 'rejected'
+        rejected.save()
+        with CaptureQueriesContext(connection) as small:
+            self.transition(self.applications[1:3], 'withdrawn')
+        with CaptureQueriesContext(connection) as large:
+            response = self.transition(self.applications[3:] + self.applications[:1], 'withdrawn',
+                                       extra_ids=['not-a-uuid'])
+        self.assertEqual(len(large), len(small))
+
+        outcomes = {item['id']: item['outcome'] for item in response.data['results']}
+        self.assertEqual(outcomes[str(self.applications[0].pk)], 'invalid_transition')
+        self.assertEqual(outcomes['not-a-uuid'], 'not_found')
+        self.assertEqual(response.data['updated'], 27)
+
+        self.opportunity.refresh_from_db(fields=['applications_count'])
+        self.assertEqual(self.opportunity.applications_count, 1)
+        self.assertEqual(Application.objects.filter(status='withdrawn').count(), 29)
+        student = self.applications[5].user
+        self.assertEqual(Notification.objects.filter(user=student).count(), 1)
+        self.assertEqual(NotificationCounter.get_unread(student.pk), 1)
+
+        incremental = sorted(ApplicationDailyRollup.objects.filter(count__gt=0)
+                             .values_list('status', 'count'))
+        self.assertEqual(incremental, [('rejected', 1), ('withdrawn', 29)])
+        call_command('backfill_application_rollups', stdout=StringIO())
+        self.assertEqual(sorted(ApplicationDailyRollup.objects.filter(count__gt=0)
+                                .values_list('status', 'count')), incremental)
+
+    def test_other_opportunities_and_unknown_status_are_rejected(self):
+        other = Application.objects.create(
+            user=create_user('other@yabatech.edu.ng'),
+            opportunity=create_opportunity(self.admin), cover_letter='Hello'
+        )
+        response = self.transition([other, self.applications[0]], 'shortlisted')
+        self.assertEqual([item['outcome'] for item in response.data['results']],
+                         ['not_found', 'updated'])
+        self.assertEqual(self.transition(self.applications, 'hired').status_code, 400)
+
+    def test_single_status_update_enforces_transitions(self):
+        application = self.applications[0]
+        Application.objects.filter(pk=application.pk).update(status='accepted')
+        response = self.client.patch(
+            f'/api/applications/applications/{application.pk}/update_status/',
+            {'status': 'pending'}, format='json'
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_single_status_update_notifies_like_bulk(self):
+        application = self.applications[0]
+        response = self.client.patch(
+            f'/api/applications/applications/{application.pk}/update_status/',
+            {'status': 'shortlisted', 'admin_notes': 'Strong portfolio'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['status'], 'shortlisted')
+        application.refresh_from_db()
+        self.assertEqual((application.status, application.admin_notes), ('shortlisted', 'Strong portfolio'))
+        self.assertEqual(Notification.objects.filter(user=application.user).count(), 1)
+        self.assertEqual(ApplicationDailyRollup.objects.get(status='shortlisted').count, 1)
+
+    def test_caches_invalidated_only_after_commit(self):
+        generation = get_generations('applications')
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.transition(self.applications[:2], 'shortlisted')
+            self.assertEqual(get_generations('applications'), generation)
+        for callback in callbacks:
+            callback()
+        self.assertNotEqual(get_generations('applications'), generation)
+
+
+class ApplicationStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user('admin@yabatech.edu.ng', role='administrator')
+        self.student = create_user('student@yabatech.edu.ng')
+        self.opportunity = create_opportunity(self.admin)
+        Application.objects.create(
+            user=self.student, opportunity=self.opportunity, cover_letter='Hello'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_stats_single_query_then_cached_until_invalidated(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/applications/applications/stats/')
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(response.data['by_status']['pending'], 1)
+        self.assertEqual(response.data['by_status']['accepted'], 0)
+
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.get('/api/applications/applications/stats/')
+        self.assertEqual(len(ctx), 0)
+
+        # Queryset updates skip post_save, so they bump the generation themselves
+        Application.objects.update(status='accepted')
+        bump_generation('applications')
+        response = self.client.get('/api/applications/applications/stats/')
+        self.assertEqual(response.data['by_status']['accepted'], 1)
+
+    def test_stats_are_scoped_per_student(self):
+        other = create_user('other@yabatech.edu.ng')
+        self.client.get('/api/applications/applications/stats/')
+        self.client.force_authenticate(other)
+        response = self.client.get('/api/applications/applications/stats/')
+        self.assertEqual(response.data['total'], 0)
+
+
+class ApplicationConditionalGetTests(TestCase):
+    URL = '/api/applications/applications/'
+
+    def setUp(self):
+        cache.clear()
+        self.admin = create_user('admin@yabatech.edu.ng', role='administrator')
+        self.student = create_user('student@yabatech.edu.ng')
+        self.application = Application.objects.create(
+            user=self.student, opportunity=create_opportunity(self.admin), cover_letter='Hello'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_list_not_modified_until_an_application_changes(self):
+        response = self.client.get(self.URL)
+        etag = response['ETag']
+        self.assertEqual(response.data['count'], 1)
+        self.assertNotIn('Last-Modified', response)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response['ETag'], etag)
+
+        response = self.client.patch(
+            f'{self.URL}{self.application.pk}/update_status/', {'status': 'under_review'}, format='json'
+        )
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    def test_editing_nested_objects_changes_etags(self):
+        url = f'{self.URL}{self.application.pk}/'
+        list_etag = self.client.get(self.URL)['ETag']
+        detail_etag = self.client.get(url)['ETag']
+
+        opportunity = self.application.opportunity
+        opportunity.title = 'Renamed'
+        opportunity.save()
+        response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=list_etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['opportunity']['title'], 'Renamed')
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+        list_etag = self.client.get(self.URL)['ETag']
+        self.student.name = 'Renamed Student'
+        self.student.save()
+        self.assertEqual(self.client.get(self.URL, HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+
+    def test_if_modified_since_alone_never_hides_a_delete(self):
+        Application.objects.create(
+            user=create_user('other@yabatech.edu.ng'), opportunity=self.application.opportunity,
+            cover_letter='Hello'
+        )
+        self.client.get(self.URL)
+        since = http_date(time.time() + 60)
+        self.application.delete()
+        response = self.client.get(self.URL, HTTP_IF_MODIFIED_SINCE=since)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['count'], 1)
+
+    def test_detail_validators_match_conditional_check(self):
+        url = f'{self.URL}{self.application.pk}/'
+        etag = self.client.get(url)['ETag']
+        with self.assertNumQueries(1):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        self.client.force_authenticate(create_user('other@yabatech.edu.ng'))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 404)
+
+
+class ApplicationExportTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin@yabatech.edu.ng', role='administrator')
+        self.opportunity = create_opportunity(self.admin)
+        for index in range(3):
+            Application.objects.create(
+                user=create_user(f'student{index}@yabatech.edu.ng'),
+                opportunity=self.opportunity,
+                cover_letter='Hello',
+                status='accepted' if index == 0 else 'pending'
+            )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def export(self, query):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'/api/applications/applications/export_data/?{query}')
+            body = b''.join(response.streaming_content).decode()
+        return response, body, len(ctx)
+
+    def test_csv_export_streams_filtered_rows_in_one_query(self):
+        response, body, queries = self.export('format=csv&status=pending')
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(StringIO(body)))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[0]['organization'], 'Paystack')
+        self.assertEqual(queries, 1)
+
+    def test_ndjson_export(self):
+        response, body, queries = self.export('format=ndjson')
+        rows = [json.loads(line) for line in body.splitlines()]
+        self.assertEqual(len(rows), 3)
+        self.assertEqual({row['user_email'] for row in rows}, {
+            f'student{index}@yabatech.edu.ng' for index in range(3)
+        })
+        self.assertEqual(queries, 1)
+
+    def test_export_requires_administrator(self):
+        self.client.force_authenticate(User.objects.filter(role='student').first())
+        response = self.client.get('/api/applications/applications/export_data/?format=csv')
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(response['Content-Type'], 'text/csv; charset=utf-8')
+        rows = list(csv.DictReader(StringIO(response.content.decode())))
+        self.assertEqual(rows, [{'error': 'Only administrators can export data'}])
+
+        response = self.client.get('/api/applications/applications/export_data/?format=ndjson')
+        self.assertEqual(json.loads(response.content), {'error': 'Only administrators can export data'})
+
+
+class ResumeUploadTests(TestCase):
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        admin = create_user('admin@yabatech.edu.ng', role='administrator')
+        self.student = create_user('student@yabatech.edu.ng')
+        self.application = Application.objects.create(
+            user=self.student, opportunity=create_opportunity(admin), cover_letter='Hello'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.url = f'/api/applications/applications/{self.application.id}/upload_resume/'
+
+    def upload(self, content, content_type='application/pdf'):
+        resume = SimpleUploadedFile('resume.pdf', content, content_type=content_type)
+        return self.client.post(self.url, {'resume': resume}, format='multipart')
+
+    def test_accepts_document_by_magic_bytes(self):
+        response = self.upload(b'%PDF-1.7\n' + b'0' * 1024)
+        self.assertEqual(response.status_code, 200)
+        self.application.refresh_from_db()
+        self.assertTrue(self.application.resume)
+
+    def test_rejects_mislabelled_file(self):
+        response = self.upload(b'\x89PNG\r\n\x1a\n' + b'0' * 1024)
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(
+            response.data['error'],
+            'Invalid file type. Only PDF and Word documents are allowed'
+        )
+        self.application.refresh_from_db()
+        self.assertFalse(self.application.resume)
+
+    def test_rejects_oversized_body_from_content_length(self):
+        response = self.upload(b'%PDF-1.7\n' + b'0' * (10 * 1024 * 1024 + 1))
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.data['error'], 'File size exceeds 10MB limit')
+
+    def test_create_sniffs_resume_type(self):
+        other = create_opportunity(User.objects.get(role='administrator'), title='Second')
+        resume = SimpleUploadedFile('resume.docx', b'plain text resume', content_type='application/pdf')
+        response = self.client.post('/api/applications/applications/', {
+            'opportunity': str(other.id), 'cover_letter': 'Hello', 'resume': resume
+        }, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Application.objects.filter(opportunity=other).exists())
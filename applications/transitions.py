@@ -0,0 +1,170 @@
+"""Bulk application status transitions.
+
+``transition_applications`` moves any number of applications to a new status
+inside one transaction. Applications are locked and read in a single query,
+each requested transition is checked against ``ALLOWED_STATUS_TRANSITIONS``,
+and the allowed ones are applied with one UPDATE per batch of ids. The side
+effects ``Application.save()`` would have had per row are applied in bulk:
+``applications_count`` is shifted once per distinct delta, the daily
+rollups once per type/status/delta, and the student notifications are
+inserted with a single ``bulk_create``.
+"""
+import uuid
+from collections import Counter, defaultdict
+from dataclasses import dataclass
+
+from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
+
+from core.cache import bump_generation
+from notifications.models import Notification, NotificationCounter
+from notifications.push import push_notifications
+from opportunities.models import Opportunity
+from .models import Application, ApplicationDailyRollup
+
+# Statuses an application may move to from each status
+ALLOWED_STATUS_TRANSITIONS = {
+    'pending': {'under_review', 'shortlisted', 'rejected', 'withdrawn'},
+    'under_review': {'shortlisted', 'accepted', 'rejected', 'withdrawn'},
+    'shortlisted': {'under_review', 'accepted', 'rejected', 'withdrawn'},
+    'accepted': {'withdrawn'},
+    'rejected': {'under_review'},
+    'withdrawn': {'pending'},
+}
+
+STATUS_MESSAGES = {
+    'pending': 'has been reinstated and is pending review',
+    'under_review': 'is now under review',
+    'shortlisted': 'has been shortlisted',
+    'accepted': 'has been accepted',
+    'rejected': 'has been rejected',
+    'withdrawn': 'has been withdrawn',
+}
+
+# Outcomes reported per requested id
+UPDATED = 'updated'
+UNCHANGED = 'unchanged'
+NOT_FOUND = 'not_found'
+INVALID_TRANSITION = 'invalid_transition'
+
+# Primary keys per UPDATE ... WHERE id IN (...)
+UPDATE_BATCH_SIZE = 500
+
+
+class InvalidStatus(ValueError):
+    pass
+
+
+@dataclass
+class TransitionOutcome:
+    id: str
+    outcome: str
+    previous_status: str = None
+
+    def as_dict(self):
+        result = {'id': self.id, 'outcome': self.outcome}
+        if self.previous_status is not None:
+            result['previous_status'] = self.previous_status
+        return result
+
+
+def is_allowed(current_status, new_status):
+    return new_status in ALLOWED_STATUS_TRANSITIONS.get(current_status, ())
+
+
+def _parse_ids(application_ids):
+    parsed = {}
+    for application_id in application_ids:
+        try:
+            parsed[str(application_id)] = uuid.UUID(str(application_id))
+        except ValueError:
+            parsed[str(application_id)] = None
+    return parsed
+
+
+def transition_applications(application_ids, new_status, opportunity=None):
+    """Move the applications to ``new_status`` and return one outcome per id.
+
+    Ids are reported as ``not_found`` when they do not exist or belong to a
+    different ``opportunity``, ``unchanged`` when already in ``new_status``
+    and ``invalid_transition`` when the move is not allowed; everything else
+    is ``updated``.
+    """
+    if new_status not in ALLOWED_STATUS_TRANSITIONS:
+        raise InvalidStatus(f'Unknown status "{new_status}"')
+
+    requested = _parse_ids(application_ids)
+    applications = Application.objects.select_for_update(of=('self',)).filter(
+        pk__in={pk for pk in requested.values() if pk is not None}
+    )
+    if opportunity is not None:
+        applications = applications.filter(opportunity=opportunity)
+
+    with transaction.atomic():
+        rows = {
+            row[0]: row for row in applications.values_list(
+                'id', 'status', 'user_id', 'opportunity_id', 'applied_at',
+                'opportunity__type', 'opportunity__title', 'opportunity__organization',
+            )
+        }
+        outcomes, moved = [], []
+        for raw_id, pk in requested.items():
+            row = rows.get(pk)
+            if row is None:
+                outcomes.append(TransitionOutcome(raw_id, NOT_FOUND))
+            elif row[1] == new_status:
+                outcomes.append(TransitionOutcome(raw_id, UNCHANGED, row[1]))
+            elif not is_allowed(row[1], new_status):
+                outcomes.append(TransitionOutcome(raw_id, INVALID_TRANSITION, row[1]))
+            else:
+                outcomes.append(TransitionOutcome(raw_id, UPDATED, row[1]))
+                moved.append(row)
+        # The same id may be listed twice; apply it once
+        moved = list({row[0]: row for row in moved}.values())
+
+        if moved:
+            _apply(moved, new_status)
+    return outcomes
+
+
+def _apply(rows, new_status):
+    now = timezone.now()
+    ids = [row[0] for row in rows]
+    for start in range(0, len(ids), UPDATE_BATCH_SIZE):
+        Application.objects.filter(pk__in=ids[start:start + UPDATE_BATCH_SIZE]).update(
+            status=new_status, updated_at=now
+        )
+
+    count_deltas, rollup_deltas = Counter(), Counter()
+    for _, previous_status, _, opportunity_id, applied_at, opportunity_type, _, _ in rows:
+        count_deltas[opportunity_id] += int(new_status != 'withdrawn') - int(previous_status != 'withdrawn')
+        day = timezone.localdate(applied_at)
+        rollup_deltas[day, opportunity_type, previous_status] -= 1
+        rollup_deltas[day, opportunity_type, new_status] += 1
+
+    by_delta = defaultdict(list)
+    for opportunity_id, delta in count_deltas.items():
+        if delta:
+            by_delta[delta].append(opportunity_id)
+    for delta, opportunity_ids in by_delta.items():
+        Opportunity.objects.filter(pk__in=opportunity_ids).update(
+            applications_count=F('applications_count') + delta
+        )
+    ApplicationDailyRollup.adjust_many(rollup_deltas)
+
+    notifications = Notification.objects.bulk_create([
+        Notification(
+            user_id=user_id,
+            title=f'Application Status Update - {title}',
+            message=f'Your application for {title} at {organization} {STATUS_MESSAGES[new_status]}.',
+            type='application_update'
+        )
+        for _, _, user_id, _, _, _, title, organization in rows
+    ], batch_size=UPDATE_BATCH_SIZE)
+    NotificationCounter.adjust_many(Counter(notification.user_id for notification in notifications))
+    push_notifications(notifications)
+
+    # After commit, so nobody can recompute the caches from the old rows under
+    # the new generation
+    transaction.on_commit(lambda: bump_generation('applications'))
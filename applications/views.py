@@ -1,9 +1,19 @@
+import csv
+import json
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.settings import api_settings
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
 from django_filters import rest_framework as filters
 from .models import Application
+from .transitions import INVALID_TRANSITION, transition_applications
+from .renderers import CSVRenderer, NDJSONRenderer
 from .serializers import (
     ApplicationSerializer,
     ApplicationCreateSerializer,
@@ -13,6 +23,9 @@ from .serializers import (
 from users.permissions import IsOwnerOrAdmin
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
+from django.db.models import Count, Q
+from core.cache import get_or_compute
+from utils.uploads import APPLICATION_RESUME_UPLOAD, RESUME_UPLOAD, UploadGuardMixin
 
 class ApplicationFilter(filters.FilterSet):
     status = filters.CharFilter(field_name='status')
@@ -23,16 +36,50 @@ class ApplicationFilter(filters.FilterSet):
         model = Application
         fields = ['status', 'opportunity']
 
-class ApplicationViewSet(viewsets.ModelViewSet):
+# (column name, ORM lookup) pairs for streaming exports
+EXPORT_COLUMNS = [
+    ('id', 'id'),
+    ('user_email', 'user__email'),
+    ('user_name', 'user__name'),
+    ('opportunity_title', 'opportunity__title'),
+    ('organization', 'opportunity__organization'),
+    ('status', 'status'),
+    ('applied_at', 'applied_at'),
+    ('interview_date', 'interview_date'),
+    ('cover_letter', 'cover_letter'),
+    ('admin_notes', 'admin_notes'),
+    ('interview_feedback', 'interview_feedback'),
+    ('rejection_reason', 'rejection_reason'),
+]
+
+EXPORT_CHUNK_SIZE = 2000
+
+class Echo:
+    """File-like object whose write() hands the written line straight back."""
+    def write(self, value):
+        return value
+
+class ApplicationViewSet(ConditionalGetMixin, UploadGuardMixin, viewsets.ModelViewSet):
     queryset = Application.objects.all()
     serializer_class = ApplicationSerializer
     filterset_class = ApplicationFilter
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-applied_at', '-id')
+    # Responses nest the opportunity and the applicant, whose edits never
+    # touch updated_at; their cache generations version the ETag instead
+    conditional_namespaces = ('opportunities', 'users')
+    conditional_last_modified = False
+    upload_rules = {
+        'create': APPLICATION_RESUME_UPLOAD,
+        'upload_resume': RESUME_UPLOAD,
+    }
 
     def get_queryset(self):
+        queryset = Application.objects.select_related('user', 'opportunity')
         if self.request.user.role == 'administrator':
-            return Application.objects.all()
-        return Application.objects.filter(user=self.request.user)
+            return queryset
+        return queryset.filter(user=self.request.user)
 
     def get_serializer_class(self):
         if self.action == 'create':
@@ -62,11 +109,23 @@ class ApplicationViewSet(viewsets.ModelViewSet):
         serializer = ApplicationStatusUpdateSerializer(
             application, data=request.data, partial=True
         )
-        
-        if serializer.is_valid():
-            serializer.save()
-            return Response(serializer.data)
-        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        new_status = serializer.validated_data.pop('status', application.status)
+        with transaction.atomic():
+            if new_status != application.status:
+                # Same path as bulk updates, so the applicant is notified too
+                [outcome] = transition_applications([application.pk], new_status)
+                if outcome.outcome == INVALID_TRANSITION:
+                    return Response(
+                        {"status": [f"Cannot move an application from {outcome.previous_status} to {new_status}."]},
+                        status=status.HTTP_400_BAD_REQUEST
+                    )
+                serializer.instance = Application.objects.get(pk=application.pk)
+            if serializer.validated_data:
+                serializer.save()
+        return Response(serializer.data)
 
     @extend_schema(
         tags=['Applications'],
@@ -90,17 +149,24 @@ class ApplicationViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['get'])
     def stats(self, request):
-        applications = self.get_queryset()
-        stats = {
-            'total': applications.count(),
-            'by_status': {
-                status: applications.filter(status=status).count()
-                for status in ['pending', 'under_review', 'shortlisted', 
-                             'accepted', 'rejected', 'withdrawn']
-            }
-        }
+        if request.user.role == 'administrator':
+            cache_key = 'stats:applications:all'
+        else:
+            cache_key = f'stats:applications:user:{request.user.id}'
+        stats = get_or_compute(['applications'], cache_key, self._compute_stats)
         return Response(stats)
 
+    def _compute_stats(self):
+        statuses = [choice for choice, _ in Application._meta.get_field('status').choices]
+        counts = self.get_queryset().aggregate(
+            total=Count('id'),
+            **{status: Count('id', filter=Q(status=status)) for status in statuses}
+        )
+        return {
+            'total': counts.pop('total'),
+            'by_status': counts
+        }
+
     @action(detail=True, methods=['post'])
     def schedule_interview(self, request, pk=None):
         """Schedule or update interview for an application"""
@@ -141,23 +207,8 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
             
+        # Size and file type were checked by the upload handler while streaming
         resume_file = request.FILES['resume']
-        
-        # Check file size (10MB limit)
-        if resume_file.size > 10 * 1024 * 1024:
-            return Response(
-                {"error": "File size exceeds 10MB limit"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
-            
-        # Check file type
-        allowed_types = ['application/pdf', 'application/msword', 
-                        'application/vnd.openxmlformats-officedocument.wordprocessingml.document']
-        if resume_file.content_type not in allowed_types:
-            return Response(
-                {"error": "Invalid file type. Only PDF and Word documents are allowed"},
-                status=status.HTTP_400_BAD_REQUEST
-            )
             
         # Delete old resume if it exists
         if application.resume:
@@ -171,7 +222,19 @@ class ApplicationViewSet(viewsets.ModelViewSet):
             'resume_url': application.resume.url
         })
 
-    @action(detail=False, methods=['get'])
+    @extend_schema(
+        tags=['Applications'],
+        description='Export applications (admin only). Use ?format=csv or '
+                    '?format=ndjson to stream large exports row by row.',
+        parameters=[
+            OpenApiParameter('format', OpenApiTypes.STR, enum=['json', 'csv', 'ndjson']),
+        ]
+    )
+    @action(
+        detail=False,
+        methods=['get'],
+        renderer_classes=api_settings.DEFAULT_RENDERER_CLASSES + [CSVRenderer, NDJSONRenderer]
+    )
     def export_data(self, request):
         """Export applications data (admin only)"""
         if not request.user.role == 'administrator':
@@ -180,8 +243,40 @@ class ApplicationViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
             
-        applications = self.get_queryset()
+        applications = self.filter_queryset(self.get_queryset())
+        export_format = request.accepted_renderer.format
+        if export_format in ('csv', 'ndjson'):
+            return self._stream_export(applications, export_format)
+
         serializer = ApplicationExportSerializer(applications, many=True)
         
         # Format data for export
-        return Response(serializer.data) 
\ No newline at end of file
+        return Response(serializer.data)
+
+    def _stream_export(self, applications, export_format):
+        columns = [column for column, _ in EXPORT_COLUMNS]
+        rows = applications.values_list(
+            *[lookup for _, lookup in EXPORT_COLUMNS]
+        ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+        if export_format == 'csv':
+            content_type = 'text/csv; charset=utf-8'
+            writer = csv.writer(Echo())
+
+            def stream():
+                yield writer.writerow(columns)
+                for row in rows:
+                    yield writer.writerow([
+                        value.isoformat() if hasattr(value, 'isoformat') else value
+                        for value in row
+                    ])
+        else:
+            content_type = 'application/x-ndjson; charset=utf-8'
+
+            def stream():
+                for row in rows:
+                    yield json.dumps(dict(zip(columns, row)), cls=DjangoJSONEncoder) + '\n'
+
+        response = StreamingHttpResponse(stream(), content_type=content_type)
+        response['Content-Disposition'] = f'attachment; filename="applications.{export_format}"'
+        return response
@@ -54,6 +54,7 @@ INSTALLED_APPS = [
     'corsheaders',
     'django_filters',
     'drf_spectacular',
+    'channels',
     'users',
     'opportunities',
     'applications',
@@ -63,6 +64,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'core.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
@@ -92,6 +94,16 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'aspirebridge.wsgi.application'
+ASGI_APPLICATION = 'aspirebridge.asgi.application'
+
+# Channel layer used to push notifications over WebSockets. The in-memory
+# layer only reaches consumers in the same process; multi-node deployments
+# should point this at a shared backend such as channels_redis.
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer',
+    }
+}
 
 
 # Database
@@ -149,7 +161,7 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 # JWT Settings
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'users.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.IsAuthenticated',
@@ -161,7 +173,15 @@ REST_FRAMEWORK = {
     ],
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 9
+    'PAGE_SIZE': 9,
+    'DEFAULT_THROTTLE_CLASSES': [
+        'core.throttling.APIRateThrottle',
+    ],
+    'DEFAULT_THROTTLE_RATES': {
+        'api': env('THROTTLE_RATE_API', default='100/hour'),
+        'auth': env('THROTTLE_RATE_AUTH', default='5/hour'),
+        'auth_ip': env('THROTTLE_RATE_AUTH_IP', default='50/hour'),
+    },
 }
 
 SIMPLE_JWT = {
@@ -169,10 +189,24 @@ SIMPLE_JWT = {
     'REFRESH_TOKEN_LIFETIME': timedelta(days=1),
     'ROTATE_REFRESH_TOKENS': True,
     'BLACKLIST_AFTER_ROTATION': True,
-    'UPDATE_LAST_LOGIN': True,
+    # last_login is written through core.counters instead of on every token issue
+    'UPDATE_LAST_LOGIN': False,
     'AUTH_HEADER_TYPES': ('Bearer',),
 }
 
+# Bloom filter in front of users.RevokedToken (REBUILD_INTERVAL in seconds)
+TOKEN_REVOCATION = {
+    'BLOOM_CAPACITY': env.int('TOKEN_REVOCATION_BLOOM_CAPACITY', default=100000),
+    'BLOOM_ERROR_RATE': 0.01,
+    'REBUILD_INTERVAL': 300,
+}
+
+# Authenticated users kept in-process by CachedJWTAuthentication (TTL in seconds)
+JWT_USER_CACHE = {
+    'MAX_ENTRIES': env.int('JWT_USER_CACHE_MAX_ENTRIES', default=10000),
+    'TTL': env.int('JWT_USER_CACHE_TTL', default=60),
+}
+
 # API Documentation
 SPECTACULAR_SETTINGS = {
     'TITLE': 'AspireBridge API',
@@ -237,3 +271,38 @@ EMAIL_HOST_PASSWORD = env('EMAIL_HOST_PASSWORD')
 
 # User model
 AUTH_USER_MODEL = 'users.User'
+
+# Cache configuration
+CACHES = {
+    'default': env.cache('CACHE_URL', default='locmemcache://aspirebridge'),
+    'throttle': env.cache('THROTTLE_CACHE_URL', default='locmemcache://aspirebridge-throttle'),
+}
+
+# Cache alias holding rate-limit token buckets
+THROTTLE_CACHE = 'throttle'
+
+# Fraction of requests that get Server-Timing headers, query logging and N+1 detection
+REQUEST_INSTRUMENTATION = {
+    'SAMPLE_RATE': env.float('REQUEST_INSTRUMENTATION_SAMPLE_RATE', default=1.0 if DEBUG else 0.01),
+    'N_PLUS_ONE_THRESHOLD': 5,
+}
+
+# Seconds that aggregate stats endpoints may serve cached results
+STATS_CACHE_TIMEOUT = env.int('STATS_CACHE_TIMEOUT', default=60)
+
+# Upper bound on how long cached opportunity list/detail responses may be reused;
+# saves and deletes invalidate them immediately, counter updates only after this
+RESPONSE_CACHE_TIMEOUT = env.int('RESPONSE_CACHE_TIMEOUT', default=300)
+
+# Background work (notification fan-out and similar) runs on a thread pool
+BACKGROUND_TASKS_ASYNC = env.bool('BACKGROUND_TASKS_ASYNC', default=True)
+BACKGROUND_TASK_WORKERS = env.int('BACKGROUND_TASK_WORKERS', default=4)
+
+# Seconds buffered counters (views_count, last_login) wait before being written
+WRITE_BEHIND_FLUSH_INTERVAL = env.int('WRITE_BEHIND_FLUSH_INTERVAL', default=10)
+
+# Hashed feature columns in the opportunity recommendation matrix
+RECOMMENDATION_FEATURES = env.int('RECOMMENDATION_FEATURES', default=4096)
+
+# Rows inserted per bulk_create when fanning out notifications
+NOTIFICATION_FANOUT_BATCH_SIZE = 1000
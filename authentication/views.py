@@ -1,13 +1,18 @@
 from rest_framework import status
-from rest_framework.decorators import api_view, permission_classes
+from rest_framework.decorators import api_view, permission_classes, throttle_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny
 from django.contrib.auth import authenticate
-from rest_framework_simplejwt.tokens import RefreshToken
+from django.utils import timezone
+from core.counters import write_behind
+from core.throttling import AUTH_THROTTLE_CLASSES
+from users.models import User
+from users.serializers import CustomTokenObtainPairSerializer
 from .serializers import UserSerializer
 
 @api_view(['POST'])
 @permission_classes([AllowAny])
+@throttle_classes(AUTH_THROTTLE_CLASSES)
 def login_view(request):
     email = request.data.get('email')
     password = request.data.get('password')
@@ -17,7 +22,8 @@ def login_view(request):
     user = authenticate(username=email, password=password)
     
     if user is not None:
-        refresh = RefreshToken.for_user(user)
+        write_behind.set_latest(User, user.pk, 'last_login', timezone.now())
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
         response_data = {
             'user': UserSerializer(user).data,
             'access': str(refresh.access_token),
@@ -0,0 +1,146 @@
+"""Endpoint benchmarks and query budgets.
+
+``ENDPOINTS`` lists the router endpoints we care about together with the
+most SQL queries one request may issue and, optionally, a p95 latency
+baseline in milliseconds. Query budgets are independent of dataset size, so
+a list endpoint whose count grows with the page is an N+1 regression. Both
+the ``benchmark_endpoints`` command and ``core.tests`` check against them.
+"""
+import io
+import statistics
+import time
+from dataclasses import dataclass
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import override_settings
+from rest_framework.test import APIClient
+
+from opportunities.models import Opportunity
+from users.models import User
+
+
+@dataclass(frozen=True)
+class Endpoint:
+    name: str
+    path: str
+    role: str
+    max_queries: int
+    baseline_ms: float = None
+
+
+ENDPOINTS = [
+    Endpoint('opportunities-list', '/api/opportunities/opportunities/', 'student', 2),
+    Endpoint('opportunities-detail', '/api/opportunities/opportunities/{opportunity}/', 'student', 4),
+    Endpoint('opportunities-stats', '/api/opportunities/opportunities/stats/', 'administrator', 1),
+    Endpoint('opportunities-analytics', '/api/opportunities/opportunities/analytics/', 'administrator', 2),
+    Endpoint('opportunities-dashboard-stats',
+             '/api/opportunities/opportunities/dashboard_stats/', 'student', 5),
+    Endpoint('opportunities-facets', '/api/opportunities/opportunities/facets/', 'student', 1),
+    Endpoint('opportunities-search', '/api/opportunities/opportunities/search/?q=software',
+             'student', 2),
+    # Cold path includes rebuilding the recommendation matrix (2 queries)
+    Endpoint('opportunities-recommended',
+             '/api/opportunities/opportunities/recommended/', 'student', 4),
+    Endpoint('applications-list', '/api/applications/applications/', 'administrator', 2),
+    Endpoint('applications-stats', '/api/applications/applications/stats/', 'administrator', 1),
+    Endpoint('applications-export', '/api/applications/applications/export_data/?format=csv',
+             'administrator', 1),
+    Endpoint('applications-export-json', '/api/applications/applications/export_data/',
+             'administrator', 1),
+    Endpoint('users-me', '/api/users/me/', 'student', 1),
+    Endpoint('users-stats', '/api/users/stats/', 'administrator', 1),
+    Endpoint('notifications-list', '/api/notifications/notifications/', 'student', 2),
+    Endpoint('notifications-unread-count',
+             '/api/notifications/notifications/unread_count/', 'student', 1),
+]
+
+# Benchmarks hammer single users far beyond production rates; a None rate disables a scope
+NO_THROTTLING = {'DEFAULT_THROTTLE_RATES': {
+    scope: None for scope in settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES']
+}}
+
+
+@dataclass
+class EndpointResult:
+    endpoint: Endpoint
+    status_code: int
+    queries: int
+    timings_ms: list
+
+    def percentile(self, percent):
+        if len(self.timings_ms) == 1:
+            return self.timings_ms[0]
+        return statistics.quantiles(self.timings_ms, n=100, method='inclusive')[percent - 1]
+
+    @property
+    def failures(self):
+        failures = []
+        if self.status_code != 200:
+            failures.append(f'returned HTTP {self.status_code}')
+        if self.queries > self.endpoint.max_queries:
+            failures.append(f'ran {self.queries} queries (budget {self.endpoint.max_queries})')
+        baseline = self.endpoint.baseline_ms
+        if baseline is not None and self.percentile(95) > baseline:
+            failures.append(f'p95 {self.percentile(95):.1f}ms exceeds baseline {baseline}ms')
+        return failures
+
+
+class QueryCounter:
+    """Database execute wrapper counting statements, independent of DEBUG logging."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def seed_dataset(students, opportunities, seed=42):
+    call_command(
+        'seed_yabatech_data', students=students, opportunities=opportunities, seed=seed,
+        stdout=io.StringIO(),
+    )
+
+
+def benchmark_endpoints(endpoints=ENDPOINTS, repeat=1):
+    """Request every endpoint ``repeat`` times against the current database.
+
+    The query count is taken from the first request, before any result
+    caching kicks in, so it reflects the cold path.
+    """
+    users = {
+        role: User.objects.filter(role=role).order_by('email').first()
+        for role in ('student', 'administrator')
+    }
+    placeholders = {
+        'opportunity': Opportunity.objects.filter(status='active').values_list('pk', flat=True).first(),
+    }
+
+    results = []
+    with override_settings(REST_FRAMEWORK={**settings.REST_FRAMEWORK, **NO_THROTTLING}):
+        for endpoint in endpoints:
+            client = APIClient()
+            client.force_authenticate(users[endpoint.role])
+            path = endpoint.path.format(**placeholders)
+
+            timings, queries = [], QueryCounter()
+            with connection.execute_wrapper(queries):
+                response = _timed_get(client, path, timings)
+            for _ in range(repeat - 1):
+                _timed_get(client, path, timings)
+            results.append(EndpointResult(endpoint, response.status_code, queries.count, timings))
+    return results
+
+
+def _timed_get(client, path, timings):
+    started = time.perf_counter()
+    response = client.get(path)
+    # Drain streaming responses so their queries and time are counted
+    if response.streaming:
+        b''.join(response.streaming_content)
+    timings.append((time.perf_counter() - started) * 1000)
+    return response
+
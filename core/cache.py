@@ -0,0 +1,59 @@
+"""Generation-keyed caching helpers.
+
+Each namespace (e.g. ``'applications'``) has a generation number stored in
+the cache. Cached values embed the generations they were computed from, so
+bumping a generation from a model signal invalidates every dependent entry
+at once without having to know their keys.
+
+Queryset ``update()`` and ``bulk_update()`` send no signals, so code that
+writes a cached model that way bumps the namespace itself.  The write-behind
+counters in ``core.counters`` are the exception: they only touch columns
+that no cached aggregate reads, and cached responses that show them are
+allowed to lag by ``RESPONSE_CACHE_TIMEOUT``.
+"""
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+def _generation_key(namespace):
+    return f'generation:{namespace}'
+
+
+def get_generations(*namespaces):
+    keys = [_generation_key(namespace) for namespace in namespaces]
+    generations = cache.get_many(keys)
+    for key in keys:
+        if key not in generations:
+            # Seed with a timestamp so entries cached before an eviction of
+            # the generation counter can never be mistaken for fresh ones.
+            cache.add(key, time.time_ns(), timeout=None)
+            generations[key] = cache.get(key)
+    return [generations[key] for key in keys]
+
+
+def bump_generation(*namespaces):
+    for namespace in namespaces:
+        key = _generation_key(namespace)
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, time.time_ns(), timeout=None)
+
+
+def get_or_compute(namespaces, key, compute, timeout=None):
+    """Return the cached value for ``key`` or compute and store it.
+
+    The entry is implicitly invalidated whenever any of ``namespaces`` is
+    bumped.
+    """
+    generations = ':'.join(str(generation) for generation in get_generations(*namespaces))
+    cache_key = f'{key}:{generations}'
+    value = cache.get(cache_key)
+    if value is None:
+        value = compute()
+        if timeout is None:
+            timeout = settings.STATS_CACHE_TIMEOUT
+        cache.set(cache_key, value, timeout)
+    return value
@@ -0,0 +1,125 @@
+"""Conditional GET (ETag / Last-Modified) for viewset list and detail actions.
+
+``ConditionalGetMixin`` gives ``list`` and ``retrieve`` a cheap validator:
+
+* Lists aggregate the filtered queryset: row count and latest
+  ``conditional_timestamp_field`` by default. The same query hands its
+  count to the paginator, so page-number lists cost no extra query.
+* Details use the object's ``conditional_detail_fields``. They are read
+  with one narrow query when the client sent a conditional header, and
+  otherwise taken from the object the action loads anyway.
+
+Payloads that nest related objects list the ``core.cache`` namespaces of
+those models in ``conditional_namespaces``; their generations are part of
+the validator, so editing a nested object changes the ETag too.
+
+The ETag hashes the validator together with the URL and the user. Requests
+whose ``If-None-Match`` or ``If-Modified-Since`` still match get a ``304``
+before anything is serialized. Lists only send an ETag: deletes never move
+their latest timestamp. Cursor-mode pages are not validated: that mode
+exists so deep pages never scan the whole set.
+"""
+import hashlib
+
+from django.core.exceptions import ValidationError
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+
+from .cache import get_generations
+
+CONDITIONAL_HEADERS = ('HTTP_IF_NONE_MATCH', 'HTTP_IF_MODIFIED_SINCE')
+
+
+def is_conditional(request):
+    return any(header in request.META for header in CONDITIONAL_HEADERS)
+
+
+def make_etag(*parts):
+    return quote_etag(hashlib.sha1(repr(parts).encode()).hexdigest())
+
+
+def not_modified(request, etag, last_modified=None):
+    """A 304 response carrying the validators if they still match, else None."""
+    response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+    if response is not None:
+        set_validators(response, etag, last_modified)
+    return response
+
+
+def set_validators(response, etag, last_modified=None):
+    response['ETag'] = etag
+    if last_modified is not None:
+        response['Last-Modified'] = http_date(last_modified)
+
+
+class ConditionalGetMixin:
+    conditional_timestamp_field = 'updated_at'
+    conditional_detail_fields = ('updated_at',)
+    conditional_namespaces = ()
+    # False when the detail timestamp misses some changes (e.g. of nested
+    # objects), so only the ETag is trusted
+    conditional_last_modified = True
+
+    def get_list_validator_aggregates(self):
+        return {'count': Count('pk'), 'latest': Max(self.conditional_timestamp_field)}
+
+    def _etag(self, request, validator):
+        return make_etag(
+            request.get_full_path(), request.user.pk, sorted(validator.items()),
+            get_generations(*self.conditional_namespaces) if self.conditional_namespaces else None,
+        )
+
+    def _detail_validators(self, request, validator):
+        latest = validator.get(self.conditional_timestamp_field)
+        last_modified = int(latest.timestamp()) if latest and self.conditional_last_modified else None
+        return self._etag(request, validator), last_modified
+
+    def list(self, request, *args, **kwargs):
+        paginator = self.paginator
+        if paginator is not None and getattr(paginator, 'use_keyset', lambda *args: False)(request, self):
+            return super().list(request, *args, **kwargs)
+
+        validator = self.filter_queryset(self.get_queryset()).aggregate(
+            **self.get_list_validator_aggregates()
+        )
+        etag = self._etag(request, validator)
+        response = not_modified(request, etag)
+        if response is not None:
+            return response
+
+        if paginator is not None and hasattr(paginator, 'known_count'):
+            paginator.known_count = validator['count']
+        response = super().list(request, *args, **kwargs)
+        if response.status_code == 200:
+            set_validators(response, etag)
+        return response
+
+    def retrieve(self, request, *args, **kwargs):
+        if is_conditional(request):
+            lookup_url_kwarg = self.lookup_url_kwarg or self.lookup_field
+            try:
+                validator = self.get_queryset().filter(
+                    **{self.lookup_field: kwargs[lookup_url_kwarg]}
+                ).values(*self.conditional_detail_fields).first()
+            except (TypeError, ValueError, ValidationError):
+                validator = None
+            if validator is not None:
+                response = not_modified(request, *self._detail_validators(request, validator))
+                if response is not None:
+                    return response
+
+        self._conditional_object = None
+        response = super().retrieve(request, *args, **kwargs)
+        if response.status_code == 200 and self._conditional_object is not None:
+            validator = {
+                field: getattr(self._conditional_object, field)
+                for field in self.conditional_detail_fields
+            }
+            set_validators(response, *self._detail_validators(request, validator))
+        return response
+
+    def get_object(self):
+        obj = super().get_object()
+        self._conditional_object = obj
+        return obj
@@ -0,0 +1,128 @@
+"""Write-behind buffer for hot counters and timestamps.
+
+Columns such as ``Opportunity.views_count`` and ``User.last_login`` would
+cost a row write on every request if updated synchronously. Instead, changes
+are aggregated in process memory and flushed at most once every
+``WRITE_BEHIND_FLUSH_INTERVAL`` seconds. A flush issues one ``F()`` UPDATE
+per distinct increment and one bulk UPDATE per timestamp column.
+
+The first change after a flush arms a daemon timer that hands the next
+flush to ``core.tasks.run_in_background`` once the interval has passed, so
+buffered changes land even if no further traffic arrives. A failed flush
+re-arms the timer, and the buffer is flushed once more at interpreter exit.
+With ``BACKGROUND_TASKS_ASYNC = False`` there is no timer; the first change
+after the interval flushes inline instead.
+
+Each process flushes its own increments, and adding deltas commutes, so
+several workers never overwrite each other. Changes still buffered when a
+process is killed are lost, which is acceptable for these columns.
+"""
+import atexit
+import logging
+import threading
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.db.models import F
+
+from .tasks import run_in_background
+
+logger = logging.getLogger(__name__)
+
+# Primary keys per UPDATE ... WHERE pk IN (...)
+FLUSH_BATCH_SIZE = 500
+
+
+class WriteBehindBuffer:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._increments = defaultdict(int)
+        self._latest = {}
+        self._last_flush = time.monotonic()
+        self._flush_scheduled = False
+
+    def increment(self, model, pk, field, amount=1):
+        with self._lock:
+            self._increments[model, field, pk] += amount
+        self._maybe_schedule_flush()
+
+    def set_latest(self, model, pk, field, value):
+        """Buffer ``field = value`` for the row, keeping the greatest value seen."""
+        key = (model, field, pk)
+        with self._lock:
+            if key not in self._latest or self._latest[key] < value:
+                self._latest[key] = value
+        self._maybe_schedule_flush()
+
+    def _maybe_schedule_flush(self):
+        with self._lock:
+            if self._flush_scheduled:
+                return
+            delay = settings.WRITE_BEHIND_FLUSH_INTERVAL - (time.monotonic() - self._last_flush)
+            if delay > 0 and not settings.BACKGROUND_TASKS_ASYNC:
+                return
+            self._flush_scheduled = True
+        if delay > 0:
+            timer = threading.Timer(delay, run_in_background, args=(self.flush,))
+            timer.daemon = True
+            timer.start()
+        else:
+            run_in_background(self.flush)
+
+    def _take(self):
+        with self._lock:
+            increments, self._increments = self._increments, defaultdict(int)
+            latest, self._latest = self._latest, {}
+            self._last_flush = time.monotonic()
+            self._flush_scheduled = False
+        return increments, latest
+
+    def flush(self):
+        increments, latest = self._take()
+        try:
+            self._write_increments(increments)
+            self._write_latest(latest)
+        except Exception:
+            # Put the changes back so the next flush retries them
+            with self._lock:
+                for key, amount in increments.items():
+                    self._increments[key] += amount
+                for key, value in latest.items():
+                    if key not in self._latest or self._latest[key] < value:
+                        self._latest[key] = value
+            if increments or latest:
+                self._maybe_schedule_flush()
+            raise
+
+    def _write_increments(self, increments):
+        by_delta = defaultdict(list)
+        for (model, field, pk), amount in increments.items():
+            if amount:
+                by_delta[model, field, amount].append(pk)
+        for (model, field, amount), pks in by_delta.items():
+            for start in range(0, len(pks), FLUSH_BATCH_SIZE):
+                model._base_manager.filter(pk__in=pks[start:start + FLUSH_BATCH_SIZE]).update(
+                    **{field: F(field) + amount}
+                )
+
+    def _write_latest(self, latest):
+        by_field = defaultdict(list)
+        for (model, field, pk), value in latest.items():
+            by_field[model, field].append(model(pk=pk, **{field: value}))
+        for (model, field), objs in by_field.items():
+            model._base_manager.bulk_update(objs, [field], batch_size=FLUSH_BATCH_SIZE)
+
+    def clear(self):
+        self._take()
+
+
+write_behind = WriteBehindBuffer()
+
+
+@atexit.register
+def _flush_at_exit():
+    try:
+        write_behind.flush()
+    except Exception:
+        logger.exception('Could not flush write-behind counters at exit')
@@ -0,0 +1,189 @@
+"""Per-request timing, SQL accounting and N+1 detection.
+
+``RequestInstrumentationMiddleware`` samples a fraction of requests
+(``REQUEST_INSTRUMENTATION['SAMPLE_RATE']``). For each sampled request it
+counts queries on every database connection, sums their time, and measures
+the view and serializer time. It logs the numbers as structured fields and,
+for administrators or with ``DEBUG`` on, reports them in a ``Server-Timing``
+header. Streaming responses run queries while the body is iterated, after
+the headers have gone out, so they are measured until the stream ends and
+only logged. Queries are grouped by shape, meaning
+the SQL with literals and ``IN`` lists collapsed. A shape that repeats
+``N_PLUS_ONE_THRESHOLD`` times or more is logged as a probable N+1.
+Unsampled requests pay for one random number.
+"""
+import logging
+import random
+import re
+import time
+from collections import Counter
+from contextlib import ExitStack, contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import connections
+
+logger = logging.getLogger(__name__)
+
+_current_metrics = ContextVar('request_metrics', default=None)
+
+_IN_LIST = re.compile(r'\bIN \((?:%s|\?)(?:, ?(?:%s|\?))*\)', re.IGNORECASE)
+_LITERAL = re.compile(r"'(?:[^']|'')*'|\b\d+(?:\.\d+)?\b")
+_WHITESPACE = re.compile(r'\s+')
+
+
+def query_shape(sql):
+    shape = _LITERAL.sub('?', sql)
+    shape = _IN_LIST.sub('IN (...)', shape)
+    return _WHITESPACE.sub(' ', shape).strip()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_ms = 0.0
+        self.shapes = Counter()
+        self.sections = Counter()
+        self._open_sections = set()
+        self.view_started = None
+        self.view_finished = None
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.db_ms += (time.perf_counter() - started) * 1000
+            self.queries += 1
+            self.shapes[query_shape(sql)] += 1
+
+    def repeated_shapes(self, threshold):
+        return {shape: count for shape, count in self.shapes.items() if count >= threshold}
+
+
+@contextmanager
+def timed(section):
+    """Add the enclosed time to ``section`` of the current request, if sampled.
+
+    Re-entering a section that is already open (a nested serializer, say)
+    is not counted twice.
+    """
+    metrics = _current_metrics.get()
+    if metrics is None or section in metrics._open_sections:
+        yield
+        return
+    metrics._open_sections.add(section)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.sections[section] += (time.perf_counter() - started) * 1000
+        metrics._open_sections.discard(section)
+
+
+class TimedSerializerMixin:
+    """Counts to_representation() towards the request's serializer time."""
+
+    def to_representation(self, instance):
+        with timed('serializer'):
+            return super().to_representation(instance)
+
+
+class RequestInstrumentationMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = settings.REQUEST_INSTRUMENTATION
+        self.sample_rate = config['SAMPLE_RATE']
+        self.n_plus_one_threshold = config['N_PLUS_ONE_THRESHOLD']
+
+    def __call__(self, request):
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        metrics = RequestMetrics()
+        with self.capture(metrics):
+            response = self.get_response(request)
+
+        if response.streaming and not response.is_async:
+            response.streaming_content = self.measure_stream(
+                request, response, metrics, response.streaming_content
+            )
+        else:
+            self.report(request, response, metrics)
+        return response
+
+    @contextmanager
+    def capture(self, metrics):
+        token = _current_metrics.set(metrics)
+        try:
+            with ExitStack() as stack:
+                for connection in connections.all():
+                    stack.enter_context(connection.execute_wrapper(metrics))
+                yield
+        finally:
+            _current_metrics.reset(token)
+
+    def measure_stream(self, request, response, metrics, content):
+        # Capture around each chunk, so nothing stays installed between
+        # chunks and the context variable is always reset where it was set
+        chunks = iter(content)
+        try:
+            while True:
+                with self.capture(metrics):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                yield chunk
+        finally:
+            self.report(request, response, metrics)
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # DRF responses render after this hook, so the view ends here
+        metrics = _current_metrics.get()
+        if metrics is not None:
+            metrics.view_finished = time.perf_counter()
+        return response
+
+    def may_see_timings(self, request):
+        # Query counts and timings describe the backend, so only administrators see them
+        if settings.DEBUG:
+            return True
+        return getattr(getattr(request, 'user', None), 'role', None) == 'administrator'
+
+    def report(self, request, response, metrics):
+        finished = time.perf_counter()
+        timings = {
+            'db': metrics.db_ms,
+            'serializer': metrics.sections['serializer'],
+            'total': (finished - metrics.started) * 1000,
+        }
+        if metrics.view_started is not None:
+            timings['view'] = ((metrics.view_finished or finished) - metrics.view_started) * 1000
+
+        if not response.streaming and self.may_see_timings(request):
+            response['Server-Timing'] = ', '.join(
+                f'{name};dur={duration:.1f}' + (f';desc="{metrics.queries} queries"' if name == 'db' else '')
+                for name, duration in timings.items()
+            )
+
+        repeated = metrics.repeated_shapes(self.n_plus_one_threshold)
+        fields = {
+            'method': request.method,
+            'path': request.path,
+            'status': response.status_code,
+            'queries': metrics.queries,
+            **{f'{name}_ms': round(duration, 1) for name, duration in timings.items()},
+        }
+        logger.info('%s %s %s', request.method, request.path, response.status_code, extra=fields)
+        if repeated:
+            logger.warning(
+                'Probable N+1 in %s %s: %s', request.method, request.path,
+                '; '.join(f'{count}x {shape}' for shape, count in repeated.items()),
+                extra={**fields, 'repeated_queries': repeated},
+            )
@@ -0,0 +1,9 @@
+from django.core.management.base import BaseCommand
+from applications.models import ApplicationDailyRollup
+
+class Command(BaseCommand):
+    help = 'Rebuilds the daily application rollups used by opportunity analytics'
+
+    def handle(self, *args, **options):
+        rows = ApplicationDailyRollup.rebuild()
+        self.stdout.write(self.style.SUCCESS(f'Rebuilt {len(rows)} daily rollup rows'))
@@ -0,0 +1,78 @@
+import dataclasses
+import json
+
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from core.benchmarks import ENDPOINTS, benchmark_endpoints, seed_dataset
+
+class Command(BaseCommand):
+    help = ('Seeds throwaway databases of several sizes and reports latency percentiles and '
+            'query counts per endpoint, failing on exceeded query budgets or latency baselines')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='100,1000,5000',
+                            help='Comma-separated student counts to seed, one run each')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Requests per endpoint and size')
+        parser.add_argument('--baseline',
+                            help='JSON file of {endpoint: p95 ms} to compare against')
+        parser.add_argument('--tolerance', type=float, default=1.25,
+                            help='Allowed p95 slowdown relative to --baseline')
+        parser.add_argument('--write-baseline',
+                            help='Write the p95 latencies of the largest size to this JSON file')
+
+    def handle(self, *args, **options):
+        sizes = [int(size) for size in options['sizes'].split(',')]
+        endpoints = self.apply_baseline(options['baseline'], options['tolerance'])
+
+        # Seeding truncates tables, so never run against the real database
+        setup_test_environment()
+        old_name = connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            failures, results = [], []
+            for students in sizes:
+                seed_dataset(students=students, opportunities=max(30, students // 20))
+                cache.clear()
+                results = benchmark_endpoints(endpoints, repeat=options['repeat'])
+                self.report(students, results)
+                failures += [
+                    f'{result.endpoint.name} @ {students} students: {failure}'
+                    for result in results for failure in result.failures
+                ]
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+            teardown_test_environment()
+
+        if options['write_baseline']:
+            with open(options['write_baseline'], 'w') as baseline:
+                json.dump({result.endpoint.name: round(result.percentile(95), 1)
+                           for result in results}, baseline, indent=2)
+
+        if failures:
+            raise CommandError('Benchmark regressions:\n  ' + '\n  '.join(failures))
+        self.stdout.write(self.style.SUCCESS('All endpoints within budget'))
+
+    def apply_baseline(self, path, tolerance):
+        if not path:
+            return ENDPOINTS
+        with open(path) as baseline:
+            p95 = json.load(baseline)
+        return [
+            dataclasses.replace(endpoint, baseline_ms=p95[endpoint.name] * tolerance)
+            if endpoint.name in p95 else endpoint
+            for endpoint in ENDPOINTS
+        ]
+
+    def report(self, students, results):
+        self.stdout.write(self.style.MIGRATE_HEADING(f'\n{students} students'))
+        self.stdout.write(f"{'endpoint':<32}{'status':>7}{'queries':>10}"
+                          f"{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+        for result in results:
+            line = (f'{result.endpoint.name:<32}{result.status_code:>7}'
+                    f'{f"{result.queries}/{result.endpoint.max_queries}":>10}'
+                    f'{result.percentile(50):>10.1f}{result.percentile(95):>10.1f}'
+                    f'{result.percentile(99):>10.1f}')
+            self.stdout.write(self.style.ERROR(line) if result.failures else line)
@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+from opportunities.search import ensure_search_index
+
+class Command(BaseCommand):
+    help = ('Rebuilds the SQLite full-text index over opportunities, e.g. after VACUUM. '
+            'PostgreSQL indexes need no rebuilding.')
+
+    def add_arguments(self, parser):
+        parser.add_argument('--database', default='default')
+
+    def handle(self, *args, **options):
+        if ensure_search_index(options['database'], rebuild=True):
+            self.stdout.write(self.style.SUCCESS('Rebuilt the opportunity search index'))
+        else:
+            self.stdout.write('Nothing to rebuild on this database')
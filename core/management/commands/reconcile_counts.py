@@ -0,0 +1,79 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.db.models import Count, F, IntegerField, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from core.cache import bump_generation
+from opportunities.models import Opportunity
+from applications.models import Application
+from notifications.models import Notification, NotificationCounter
+
+class Command(BaseCommand):
+    help = 'Recomputes denormalized counters (applications_count, unread notifications)'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run',
+            action='store_true',
+            help='Report drifted counters without fixing them',
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options['dry_run']
+        verb = 'Found' if dry_run else 'Reconciled'
+
+        drifted = self.reconcile_applications_counts(dry_run)
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {drifted} opportunities with drifted applications_count'
+        ))
+        drifted = self.reconcile_unread_counters(dry_run)
+        self.stdout.write(self.style.SUCCESS(
+            f'{verb} {drifted} users with drifted unread notification counts'
+        ))
+
+    def reconcile_applications_counts(self, dry_run):
+        actual_count = Subquery(
+            Application.objects.filter(opportunity=OuterRef('pk'))
+            .exclude(status='withdrawn')
+            .order_by()
+            .values('opportunity')
+            .annotate(count=Count('id'))
+            .values('count'),
+            output_field=IntegerField(),
+        )
+        actual_count = Coalesce(actual_count, Value(0))
+
+        with transaction.atomic():
+            drifted_ids = list(
+                Opportunity.objects.annotate(actual_count=actual_count)
+                .exclude(applications_count=F('actual_count'))
+                .values_list('id', flat=True)
+            )
+            if drifted_ids and not dry_run:
+                Opportunity.objects.filter(id__in=drifted_ids).update(
+                    applications_count=actual_count
+                )
+                bump_generation('opportunities')
+        return len(drifted_ids)
+
+    def reconcile_unread_counters(self, dry_run):
+        actual = dict(
+            Notification.objects.filter(read=False)
+            .order_by()
+            .values_list('user_id')
+            .annotate(count=Count('id'))
+        )
+        stored = dict(NotificationCounter.objects.values_list('user_id', 'unread'))
+        drifted = {
+            user_id: actual.get(user_id, 0)
+            for user_id in actual.keys() | stored.keys()
+            if actual.get(user_id, 0) != stored.get(user_id, 0)
+        }
+        if drifted and not dry_run:
+            with transaction.atomic():
+                NotificationCounter.objects.filter(user_id__in=drifted).delete()
+                NotificationCounter.objects.bulk_create(
+                    [NotificationCounter(user_id=user_id, unread=count)
+                     for user_id, count in drifted.items()],
+                    batch_size=1000
+                )
+        return len(drifted)
@@ -1,272 +1,346 @@
-from django.core.management.base import BaseCommand
-from django.utils import timezone
-from django.contrib.auth import get_user_model
-from opportunities.models import Opportunity
-from applications.models import Application
-from notifications.models import Notification
-from faker import Faker
 import random
+import time
+import uuid
+from collections import Counter
 from datetime import timedelta
 
+from django.apps import apps
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from faker import Faker
+
+from applications.models import Application, ApplicationDailyRollup
+from core.cache import bump_generation
+from notifications.models import Notification, NotificationCounter
+from opportunities.models import Opportunity, OpportunitySkill, Skill
+from opportunities.skills import sync_skills
+
 User = get_user_model()
-fake = Faker()  # Use default locale
 
-# Add Nigerian names and patterns
+# Apps whose tables are emptied before seeding
+SEEDED_APPS = ['users', 'opportunities', 'applications', 'notifications']
+
+# Distinct text snippets generated up front; Faker is too slow to call per row
+TEXT_POOL_SIZE = 200
+
 nigerian_first_names = [
-    'Oluwaseun', 'Chioma', 'Adebayo', 'Ngozi', 'Olayinka', 'Chidi', 'Folake', 
+    'Oluwaseun', 'Chioma', 'Adebayo', 'Ngozi', 'Olayinka', 'Chidi', 'Folake',
     'Babatunde', 'Aisha', 'Emmanuel', 'Blessing', 'Oluwafemi', 'Chinua', 'Yetunde',
     'Obinna', 'Folashade', 'Kayode', 'Chidinma', 'Oluwadamilola', 'Temitope'
 ]
 
 nigerian_last_names = [
-    'Adebayo', 'Okonkwo', 'Okafor', 'Adeyemi', 'Oluwole', 'Eze', 'Adegoke', 
+    'Adebayo', 'Okonkwo', 'Okafor', 'Adeyemi', 'Oluwole', 'Eze', 'Adegoke',
     'Ogunleye', 'Nnamdi', 'Afolabi', 'Oladipo', 'Nwachukwu', 'Adeleke', 'Igwe',
     'Olayinka', 'Chukwu', 'Adeniyi', 'Ogunlesi', 'Babangida', 'Ogunbiyi'
 ]
 
-def generate_nigerian_name():
-    return f"{random.choice(nigerian_first_names)} {random.choice(nigerian_last_names)}"
+admin_departments = [
+    'Student Affairs',
+    'Academic Affairs',
+    'Industrial Relations',
+    'Career Services',
+    'Alumni Relations'
+]
+
+departments = [
+    'Computer Science',
+    'Accountancy',
+    'Business Administration',
+    'Electrical Engineering',
+    'Civil Engineering',
+    'Architecture',
+    'Marketing',
+    'Mass Communication',
+    'Food Technology',
+    'Chemical Engineering'
+]
+
+student_locations = [
+    'Yaba', 'Surulere', 'Ikeja', 'Gbagada', 'Maryland',
+    'Oshodi', 'Mushin', 'Shomolu', 'Bariga', 'Ojota'
+]
+
+nigerian_companies = [
+    'Access Bank', 'GTBank', 'MTN Nigeria', 'Dangote Group', 'Flutterwave',
+    'Paystack', 'Nigerian Breweries', 'Andela Nigeria', 'KPMG Nigeria',
+    'PwC Nigeria', 'Deloitte Nigeria', 'Shell Nigeria', 'Chevron Nigeria',
+    'Main One', 'Interswitch', 'SystemSpecs', 'Union Bank', 'First Bank',
+    'Zenith Bank', 'UBA', 'Sterling Bank', 'FCMB', 'Wema Bank', 'Fidelity Bank',
+    'Total Nigeria', 'Globacom', '9mobile', 'Airtel Nigeria', 'IBM Nigeria',
+    'Microsoft Nigeria', 'Google Nigeria', 'Jumia Nigeria', 'Konga'
+]
+
+# Opportunity.type choice -> title used in listings
+opportunity_types = {
+    'internship': 'Internship Program',
+    'job': 'Graduate Trainee Program',
+    'project': 'Industrial Project',
+    'research': 'Research Fellowship',
+}
+
+lagos_locations = [
+    'Victoria Island', 'Ikoyi', 'Lekki', 'Yaba', 'Surulere',
+    'Ikeja', 'Maryland', 'Gbagada', 'Apapa', 'Marina'
+]
+
+application_statuses = ['pending', 'under_review', 'shortlisted', 'accepted', 'rejected']
+
+status_messages = {
+    'under_review': 'is now under review',
+    'shortlisted': 'has been shortlisted',
+    'accepted': 'has been accepted',
+    'rejected': 'has been rejected'
+}
 
-def generate_nigerian_phone():
-    prefixes = ['0803', '0805', '0806', '0807', '0813', '0814', '0816', '0903', '0906']
-    return f"{random.choice(prefixes)}{''.join([str(random.randint(0, 9)) for _ in range(7)])}"
 
 class Command(BaseCommand):
     help = 'Seeds the database with Yabatech-specific test data'
 
-    def handle(self, *args, **kwargs):
-        # Clear existing data
-        self.stdout.write('Clearing existing data...')
-        User.objects.all().delete()
-        Opportunity.objects.all().delete()
-        Application.objects.all().delete()
+    def add_arguments(self, parser):
+        parser.add_argument('--students', type=int, default=50)
+        parser.add_argument('--opportunities', type=int, default=30)
+        parser.add_argument('--min-applications', type=int, default=2,
+                            help='Fewest opportunities each student applies to')
+        parser.add_argument('--max-applications', type=int, default=5,
+                            help='Most opportunities each student applies to')
+        parser.add_argument('--seed', type=int, default=42,
+                            help='Random seed; the same seed produces the same dataset')
+        parser.add_argument('--batch-size', type=int, default=2000,
+                            help='Rows per bulk INSERT/UPDATE')
+        parser.add_argument('--skip-notifications', action='store_true',
+                            help='Do not generate notifications')
 
-        self.stdout.write('Starting Yabatech data seeding...')
+    def handle(self, *args, **options):
+        if options['max_applications'] < options['min_applications']:
+            raise CommandError('--max-applications must not be below --min-applications')
+        if options['opportunities'] < options['max_applications']:
+            raise CommandError('--opportunities must be at least --max-applications')
 
-        # Create admin users
-        admins = []
-        admin_departments = [
-            'Student Affairs',
-            'Academic Affairs',
-            'Industrial Relations',
-            'Career Services',
-            'Alumni Relations'
+        self.rng = random.Random(options['seed'])
+        self.fake = Faker()
+        self.fake.seed_instance(options['seed'])
+        self.batch_size = options['batch_size']
+        self.now = timezone.now()
+        self.texts = [self.fake.text(max_nb_chars=300) for _ in range(TEXT_POOL_SIZE)]
+
+        with transaction.atomic():
+            self.step('Cleared existing data', self.truncate)
+            admins = self.step('Created admins', self.create_admins)
+            students = self.step('Created students', self.create_students, options['students'])
+            opportunities = self.step(
+                'Created opportunities', self.create_opportunities, options['opportunities'], admins
+            )
+            applications = self.step(
+                'Created applications', self.create_applications, students, opportunities,
+                options['min_applications'], options['max_applications'],
+            )
+            self.step('Rebuilt daily rollups', ApplicationDailyRollup.rebuild)
+            if not options['skip_notifications']:
+                self.step('Created notifications', self.create_notifications, applications)
+
+        bump_generation('users', 'opportunities', 'applications')
+        self.stdout.write(self.style.SUCCESS('Successfully seeded Yabatech data'))
+
+    def step(self, message, func, *args):
+        started = time.perf_counter()
+        result = func(*args)
+        count = f' ({len(result)})' if result is not None else ''
+        self.stdout.write(f'{message}{count} in {time.perf_counter() - started:.2f}s')
+        return result
+
+    def uuid(self):
+        return uuid.UUID(int=self.rng.getrandbits(128), version=4)
+
+    def truncate(self):
+        tables = [
+            model._meta.db_table
+            for label in SEEDED_APPS
+            for model in apps.get_app_config(label).get_models(include_auto_created=True)
         ]
-        
+        statements = connection.ops.sql_flush(no_style(), tables, allow_cascade=True)
+        connection.ops.execute_sql_flush(statements)
+
+    def create_admins(self):
+        password = make_password('Admin123!')
+        admins = []
         for dept in admin_departments:
             email = f"{dept.lower().replace(' ', '.')}@yabatech.edu.ng"
-            admin = User.objects.create_superuser(
+            admins.append(User(
+                id=self.uuid(),
                 email=email,
                 username=email,
-                password='Admin123!',
+                password=password,
                 name=f'{dept} Administrator',
                 role='administrator',
+                is_staff=True,
+                is_superuser=True,
                 organization_details=f'Yaba College of Technology - {dept}',
-                phone_number=fake.phone_number(),
+                phone_number=self.phone_number(),
                 location='Yaba, Lagos'
-            )
-            admins.append(admin)
-            self.stdout.write(f'Created admin: {email}')
+            ))
+        return User.objects.bulk_create(admins, batch_size=self.batch_size)
 
-        # Create students
+    def create_students(self, count):
+        # Hashing once instead of per student is what makes large runs feasible
+        password = make_password('Student123!')
         students = []
-        departments = [
-            'Computer Science',
-            'Accountancy',
-            'Business Administration',
-            'Electrical Engineering',
-            'Civil Engineering',
-            'Architecture',
-            'Marketing',
-            'Mass Communication',
-            'Food Technology',
-            'Chemical Engineering'
-        ]
-
-        for _ in range(50):  # Create 50 students
-            dept = random.choice(departments)
-            matric = f'YCT/{str(random.randint(20, 23)).zfill(2)}/{random.randint(100000, 999999)}'
-            
-            student = User.objects.create_user(
+        for index in range(count):
+            matric = f'YCT/{self.rng.randint(20, 23)}/{index:06d}'
+            students.append(User(
+                id=self.uuid(),
                 email=f'{matric.lower()}@students.yabatech.edu.ng',
                 username=matric,
-                password='Student123!',
-                name=generate_nigerian_name(),  # Use Nigerian name generator
+                password=password,
+                name=f'{self.rng.choice(nigerian_first_names)} {self.rng.choice(nigerian_last_names)}',
                 role='student',
                 matriculation_number=matric,
-                course=dept,
-                year_of_study=random.randint(1, 4),
-                phone_number=generate_nigerian_phone(),  # Use Nigerian phone generator
-                location=random.choice([
-                    'Yaba', 'Surulere', 'Ikeja', 'Gbagada', 'Maryland', 
-                    'Oshodi', 'Mushin', 'Shomolu', 'Bariga', 'Ojota'
-                ]),
-                description=fake.text(max_nb_chars=200)
-            )
-            students.append(student)
-            self.stdout.write(f'Created student: {matric}')
+                course=self.rng.choice(departments),
+                year_of_study=self.rng.randint(1, 4),
+                phone_number=self.phone_number(),
+                location=self.rng.choice(student_locations),
+                description=self.rng.choice(self.texts)[:200],
+            ))
+        return User.objects.bulk_create(students, batch_size=self.batch_size)
 
-        # Create opportunities
+    def create_opportunities(self, count, admins):
         opportunities = []
-        nigerian_companies = [
-            'Access Bank', 'GTBank', 'MTN Nigeria', 'Dangote Group', 'Flutterwave',
-            'Paystack', 'Nigerian Breweries', 'Andela Nigeria', 'KPMG Nigeria',
-            'PwC Nigeria', 'Deloitte Nigeria', 'Shell Nigeria', 'Chevron Nigeria',
-            'Main One', 'Interswitch', 'SystemSpecs', 'Union Bank', 'First Bank',
-            'Zenith Bank', 'UBA', 'Sterling Bank', 'FCMB', 'Wema Bank', 'Fidelity Bank',
-            'Total Nigeria', 'Globacom', '9mobile', 'Airtel Nigeria', 'IBM Nigeria',
-            'Microsoft Nigeria', 'Google Nigeria', 'Jumia Nigeria', 'Konga'
-        ]
-
-        opportunity_types = [
-            'internship',
-            'full_time',
-            'part_time',
-            'industrial_training',
-            'graduate_trainee'
-        ]
-
-        lagos_locations = [
-            'Victoria Island', 'Ikoyi', 'Lekki', 'Yaba', 'Surulere',
-            'Ikeja', 'Maryland', 'Gbagada', 'Apapa', 'Marina'
-        ]
-
-        for _ in range(30):  # Create 30 opportunities
-            company = random.choice(nigerian_companies)
-            type_ = random.choice(opportunity_types)
-            start_date = timezone.now() + timedelta(days=random.randint(14, 45))  # Start in 2-6 weeks
-            deadline = start_date + timedelta(days=random.randint(30, 90))  # Deadline after start date
-            
-            description = '\n'.join([
-                'About the Role:',
-                fake.text(max_nb_chars=300),
-                '\nRequirements:',
-                '- Currently enrolled in Yaba College of Technology',
-                f'- Studying {", ".join(random.sample(departments, 3))} or related field',
-                '- Strong academic performance',
-                '- Excellent communication skills',
-                '\nBenefits:',
-                '- Competitive stipend',
-                '- Professional development',
-                '- Mentorship opportunity',
-                '- Possible conversion to full-time',
-                f'\nSalary Range: NGN {random.randint(50, 250)}k - {random.randint(251, 500)}k monthly'
-            ])
-
-            opportunity = Opportunity.objects.create(
-                title=f'{company} {type_.replace("_", " ").title()} Program',
+        for _ in range(count):
+            company = self.rng.choice(nigerian_companies)
+            type_ = self.rng.choice(list(opportunity_types))
+            start_date = self.now + timedelta(days=self.rng.randint(14, 45))
+            deadline = start_date + timedelta(days=self.rng.randint(30, 90))
+            opportunities.append(Opportunity(
+                id=self.uuid(),
+                title=f'{company} {opportunity_types[type_]}',
                 organization=company,
-                description=description,
-                type=type_,
-                location=f'{random.choice(lagos_locations)}, Lagos',
-                requirements='\n'.join([
-                    '- Currently enrolled in Yaba College of Technology',
-                    f'- Studying {", ".join(random.sample(departments, 3))} or related field',
-                    '- Strong academic performance',
-                    '- Excellent communication skills',
-                    '- Good team player',
+                description='\n'.join([
+                    'About the Role:',
+                    self.rng.choice(self.texts),
+                    '\nBenefits:',
+                    '- Competitive stipend',
+                    '- Professional development',
+                    '- Mentorship opportunity',
                 ]),
-                start_date=start_date,  # Add start date
+                type=type_,
+                location=f'{self.rng.choice(lagos_locations)}, Lagos',
+                requirements=[
+                    'Currently enrolled in Yaba College of Technology',
+                    *self.rng.sample(departments, 3),
+                    'Strong academic performance',
+                    'Excellent communication skills',
+                ],
+                start_date=start_date.date(),
                 application_deadline=deadline,
-                created_by=random.choice(admins),
+                duration=f'{self.rng.choice([3, 6, 12])} months',
+                compensation=f'NGN {self.rng.randint(50, 250)}k - {self.rng.randint(251, 500)}k monthly',
+                required_documents=['resume'],
+                created_by=self.rng.choice(admins),
                 status='active',
-            )
-            opportunities.append(opportunity)
-            self.stdout.write(f'Created opportunity: {opportunity.title}')
+            ))
+        opportunities = Opportunity.objects.bulk_create(opportunities, batch_size=self.batch_size)
+        # bulk_create skips the skill tagging in Opportunity.save()
+        sync_skills(opportunities, Skill, OpportunitySkill, batch_size=self.batch_size)
+        return opportunities
 
-        # Create applications and notifications
-        application_statuses = ['pending', 'under_review', 'shortlisted', 'accepted', 'rejected']
-        
+    def create_applications(self, students, opportunities, min_applications, max_applications):
+        applications = []
+        days_ago = {}
         for student in students:
-            # Each student applies to 2-5 opportunities
-            for opportunity in random.sample(opportunities, random.randint(2, 5)):
-                status = random.choice(application_statuses)
-                
-                application = Application.objects.create(
+            count = self.rng.randint(min_applications, max_applications)
+            for opportunity in self.rng.sample(opportunities, count):
+                status = self.rng.choice(application_statuses)
+                applications.append(Application(
+                    id=self.uuid(),
                     user=student,
                     opportunity=opportunity,
                     status=status,
                     cover_letter='\n'.join([
                         f'Dear {opportunity.organization} Hiring Team,',
                         '',
-                        'I am writing to express my strong interest in the ' +
-                        f'{opportunity.title} position. As a {student.year_of_study}rd year ' +
-                        f'{student.course} student at Yaba College of Technology, ' +
-                        'I believe I would be an excellent candidate for this role.',
+                        f'I am writing to express my strong interest in the {opportunity.title} '
+                        f'position as a {student.course} student at Yaba College of Technology.',
                         '',
-                        fake.text(max_nb_chars=300),
-                        '',
-                        'Thank you for considering my application.',
+                        self.rng.choice(self.texts),
                         '',
                         f'Best regards,\n{student.name}'
                     ]),
-                    documents=[
-                        {
-                            "name": "Resume.pdf",
-                            "url": f"https://storage.aspirebridge.ng/documents/{student.id}/resume.pdf"
-                        },
-                        {
-                            "name": "Transcript.pdf",
-                            "url": f"https://storage.aspirebridge.ng/documents/{student.id}/transcript.pdf"
-                        }
-                    ],
-                    applied_at=timezone.now() - timedelta(days=random.randint(1, 30))
+                    interview_date=(
+                        self.now + timedelta(days=self.rng.randint(5, 15))
+                        if status in ['shortlisted', 'accepted'] else None
+                    ),
+                ))
+                days_ago.setdefault(self.rng.randint(1, 30), []).append(applications[-1].pk)
+
+        # bulk_create bypasses Application.save(), so keep applications_count right here
+        counts = Counter(application.opportunity_id for application in applications)
+        for opportunity in opportunities:
+            opportunity.applications_count = counts[opportunity.pk]
+        Opportunity.objects.bulk_update(
+            opportunities, ['applications_count'], batch_size=self.batch_size
+        )
+
+        Application.objects.bulk_create(applications, batch_size=self.batch_size)
+        # auto_now_add overwrote applied_at on insert; spread it back over the past month
+        for days, ids in days_ago.items():
+            applied_at = self.now - timedelta(days=days)
+            for start in range(0, len(ids), self.batch_size):
+                Application.objects.filter(pk__in=ids[start:start + self.batch_size]).update(
+                    applied_at=applied_at
                 )
-                
-                # Create application submission notification
-                Notification.objects.create(
+        return applications
+
+    def create_notifications(self, applications):
+        notifications = []
+        for application in applications:
+            student, opportunity = application.user, application.opportunity
+            notifications.append(Notification(
+                user=student,
+                title=f'Application Submitted - {opportunity.title}',
+                message=f'Your application for {opportunity.title} at {opportunity.organization} has been submitted successfully.',
+                type='application_update'
+            ))
+            notifications.append(Notification(
+                user_id=opportunity.created_by_id,
+                title=f'New Application Received - {opportunity.title}',
+                message=f'{student.name} has applied for {opportunity.title}',
+                type='application_update'
+            ))
+            if application.interview_date:
+                when = application.interview_date.strftime('%B %d, %Y at %I:%M %p')
+                notifications.append(Notification(
+                    user=student,
+                    title=f'Interview Scheduled - {opportunity.title}',
+                    message=f'Your interview for {opportunity.title} at {opportunity.organization} has been scheduled for {when}.',
+                    type='interview'
+                ))
+                notifications.append(Notification(
+                    user_id=opportunity.created_by_id,
+                    title=f'Interview Scheduled - {opportunity.title}',
+                    message=f'Interview scheduled with {student.name} for {opportunity.title} on {when}.',
+                    type='interview'
+                ))
+            if application.status != 'pending':
+                notifications.append(Notification(
                     user=student,
-                    title=f'Application Submitted - {opportunity.title}',
-                    message=f'Your application for {opportunity.title} at {opportunity.organization} has been submitted successfully.',
+                    title=f'Application Status Update - {opportunity.title}',
+                    message=f'Your application for {opportunity.title} at {opportunity.organization} {status_messages[application.status]}.',
                     type='application_update'
-                )
+                ))
 
-                # Create notification for organization admin
-                Notification.objects.create(
-                    user=opportunity.created_by,
-                    title=f'New Application Received - {opportunity.title}',
-                    message=f'{student.name} has applied for {opportunity.title}',
-                    type='application_update'
-                )
-                
-                # Add interview date and notifications for shortlisted applications
-                if status in ['shortlisted', 'accepted']:
-                    interview_date = timezone.now() + timedelta(days=random.randint(5, 15))
-                    application.interview_date = interview_date
-                    application.save()
-
-                    # Create interview notification for student
-                    Notification.objects.create(
-                        user=student,
-                        title=f'Interview Scheduled - {opportunity.title}',
-                        message=f'Your interview for {opportunity.title} at {opportunity.organization} has been scheduled for {interview_date.strftime("%B %d, %Y at %I:%M %p")}.',
-                        type='interview'
-                    )
-
-                    # Create interview notification for admin
-                    Notification.objects.create(
-                        user=opportunity.created_by,
-                        title=f'Interview Scheduled - {opportunity.title}',
-                        message=f'Interview scheduled with {student.name} for {opportunity.title} on {interview_date.strftime("%B %d, %Y at %I:%M %p")}.',
-                        type='interview'
-                    )
-
-                # Create status update notifications for non-pending applications
-                if status != 'pending':
-                    status_message = {
-                        'under_review': 'is now under review',
-                        'shortlisted': 'has been shortlisted',
-                        'accepted': 'has been accepted',
-                        'rejected': 'has been rejected'
-                    }
-                    
-                    Notification.objects.create(
-                        user=student,
-                        title=f'Application Status Update - {opportunity.title}',
-                        message=f'Your application for {opportunity.title} at {opportunity.organization} {status_message[status]}.',
-                        type='application_update'
-                    )
-
-                self.stdout.write(f'Created application and notifications: {student.name} -> {opportunity.title}')
-
-        self.stdout.write(self.style.SUCCESS('Successfully seeded Yabatech data')) 
\ No newline at end of file
+        Notification.objects.bulk_create(notifications, batch_size=self.batch_size)
+        # Every seeded notification is unread; bulk_create skips the counter upkeep in save()
+        unread = Counter(notification.user_id for notification in notifications)
+        NotificationCounter.objects.bulk_create(
+            [NotificationCounter(user_id=user_id, unread=count) for user_id, count in unread.items()],
+            batch_size=self.batch_size,
+        )
+        return notifications
+
+    def phone_number(self):
+        prefixes = ['0803', '0805', '0806', '0807', '0813', '0814', '0816', '0903', '0906']
+        return f'{self.rng.choice(prefixes)}{self.rng.randint(0, 9_999_999):07d}'
@@ -0,0 +1,86 @@
+"""Shared response cache for read-heavy viewset actions.
+
+``CachedResponseMixin`` stores the serialized ``response.data`` of a
+viewset's ``list`` and ``retrieve`` actions, together with an ETag hashed
+from that data. Keys combine the generations of
+``response_cache_namespaces`` (see ``core.cache``), a scope from
+``get_response_cache_scope()``, and the host, path and sorted query
+params. Bumping a namespace from a model signal therefore invalidates every
+cached page at once, and ``RESPONSE_CACHE_TIMEOUT`` bounds the staleness of
+columns maintained with bare UPDATEs, such as counters.
+
+Entries are shared between users, so views must keep per-user fields out of
+the cached data and return them from ``get_response_personalization()``.
+They are merged into the data and the ETag on every response. Conditional
+requests that match are answered with ``304`` straight from the entry.
+"""
+import hashlib
+import json
+from urllib.parse import urlencode
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from rest_framework.response import Response
+
+from .cache import get_generations
+from .conditional import make_etag, not_modified, set_validators
+
+
+def response_cache_key(request, scope=''):
+    params = sorted(
+        (name, value)
+        for name, values in request.query_params.lists()
+        for value in values if value.strip()
+    )
+    raw = f'{request.get_host()}{request.path}?{urlencode(params)}'
+    return f'response:{scope}:{hashlib.sha1(raw.encode()).hexdigest()}'
+
+
+def content_etag(data):
+    return make_etag(json.dumps(data, cls=DjangoJSONEncoder, sort_keys=True))
+
+
+class CachedResponseMixin:
+    """Caches ``list`` and ``retrieve`` responses of a viewset."""
+    response_cache_namespaces = ()
+
+    def get_response_cache_scope(self):
+        """Distinguishes users whose querysets differ (e.g. by role)."""
+        return ''
+
+    def get_response_personalization(self, data):
+        """Per-user fields to merge into ``data``, or None."""
+        return None
+
+    def cached_response(self, request, render):
+        generations = get_generations(*self.response_cache_namespaces)
+        scope = self.get_response_cache_scope()
+        cache_key = f"{response_cache_key(request, scope)}:{':'.join(map(str, generations))}"
+        entry = cache.get(cache_key)
+        if entry is None:
+            response = render()
+            if response.status_code != 200:
+                return response
+            entry = {'data': response.data, 'etag': content_etag(response.data)}
+            cache.set(cache_key, entry, settings.RESPONSE_CACHE_TIMEOUT)
+
+        data, etag = entry['data'], entry['etag']
+        personal = self.get_response_personalization(data)
+        if personal:
+            data = {**data, **personal}
+            etag = make_etag(etag, request.user.pk, sorted(personal.items()))
+
+        response = not_modified(request, etag)
+        if response is None:
+            response = Response(data)
+            set_validators(response, etag)
+        return response
+
+    def list(self, request, *args, **kwargs):
+        parent = super()
+        return self.cached_response(request, lambda: parent.list(request, *args, **kwargs))
+
+    def retrieve(self, request, *args, **kwargs):
+        parent = super()
+        return self.cached_response(request, lambda: parent.retrieve(request, *args, **kwargs))
@@ -0,0 +1,44 @@
+"""Runs work off the request path.
+
+Tasks are submitted once the current transaction commits and executed on a
+small thread pool, which is enough for the single-node deployments this
+project targets. Set ``BACKGROUND_TASKS_ASYNC = False`` to run them inline
+(tests do this to keep everything on one database connection).
+"""
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.db import connections, transaction
+
+logger = logging.getLogger(__name__)
+
+_executor = None
+
+
+def get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BACKGROUND_TASK_WORKERS,
+            thread_name_prefix='background-task'
+        )
+    return _executor
+
+
+def _run(func, args, kwargs):
+    try:
+        func(*args, **kwargs)
+    except Exception:
+        logger.exception('Background task %s failed', func.__name__)
+    finally:
+        connections.close_all()
+
+
+def run_in_background(func, *args, **kwargs):
+    def submit():
+        if settings.BACKGROUND_TASKS_ASYNC:
+            get_executor().submit(_run, func, args, kwargs)
+        else:
+            func(*args, **kwargs)
+    transaction.on_commit(submit)
@@ -0,0 +1,30 @@
+"""Model factories shared by the apps' test modules."""
+from datetime import timedelta
+
+from django.utils import timezone
+
+from opportunities.models import Opportunity
+from users.models import User
+
+
+def create_user(email, role='student', **kwargs):
+    return User.objects.create_user(
+        email=email, username=email, password=None, name=email.split('@')[0], role=role, **kwargs
+    )
+
+
+def create_opportunity(created_by, **kwargs):
+    defaults = {
+        'title': 'Software Engineering Intern',
+        'description': 'Build things',
+        'organization': 'Paystack',
+        'location': 'Yaba, Lagos',
+        'type': 'internship',
+        'status': 'active',
+        'application_deadline': timezone.now() + timedelta(days=30),
+        'start_date': (timezone.now() + timedelta(days=45)).date(),
+        'duration': '3 months',
+        'created_by': created_by,
+    }
+    defaults.update(kwargs)
+    return Opportunity.objects.create(**defaults)
@@ -0,0 +1,253 @@
+import io
+import time
+from unittest import mock
+
+from django.conf import settings
+from django.core.cache import cache, caches
+from django.core.management import call_command
+from django.db.models import F
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from applications.models import Application
+from notifications.models import Notification, NotificationCounter
+from opportunities.models import Opportunity
+from users.models import User
+from .counters import write_behind
+from .testing import create_opportunity, create_user
+from .instrumentation import RequestInstrumentationMiddleware, query_shape
+from .benchmarks import benchmark_endpoints, seed_dataset
+from .throttling import TokenBucketThrottle
+
+
+def throttle_rates(**rates):
+    return override_settings(REST_FRAMEWORK={
+        **settings.REST_FRAMEWORK,
+        'DEFAULT_THROTTLE_RATES': {**settings.REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'], **rates},
+    })
+
+
+class TokenBucketThrottleTests(TestCase):
+    def setUp(self):
+        caches[settings.THROTTLE_CACHE].clear()
+        self.client = APIClient()
+
+    def login(self, email, path='/auth/login/'):
+        return self.client.post(path, {'email': email, 'password': 'wrong'}, format='json')
+
+    @throttle_rates(auth='2/hour')
+    @mock.patch.object(TokenBucketThrottle, 'timer', return_value=1000.0)
+    def test_auth_attempts_limited_per_email_with_retry_after(self, timer):
+        for path in ['/auth/login/', '/api/users/token/']:
+            self.assertNotEqual(self.login('victim@yabatech.edu.ng', path).status_code, 429)
+        response = self.login('VICTIM@yabatech.edu.ng')
+        self.assertEqual(response.status_code, 429)
+        # One token refills every 30 minutes at 2/hour
+        self.assertEqual(response['Retry-After'], '1800')
+
+        self.assertNotEqual(self.login('other@yabatech.edu.ng').status_code, 429)
+
+    @throttle_rates(auth_ip='3/hour')
+    def test_auth_attempts_limited_per_ip(self):
+        for index in range(3):
+            self.assertNotEqual(self.login(f'user{index}@yabatech.edu.ng').status_code, 429)
+        response = self.client.post('/api/users/register/', {}, format='json')
+        self.assertEqual(response.status_code, 429)
+
+    @throttle_rates(api='2/min')
+    def test_bucket_refills_over_time(self):
+        user = User.objects.create_user(
+            email='student@yabatech.edu.ng', username='student@yabatech.edu.ng', password=None
+        )
+        self.client.force_authenticate(user)
+        url = '/api/notifications/notifications/unread_count/'
+
+        with mock.patch.object(TokenBucketThrottle, 'timer', return_value=1000.0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(self.client.get(url).status_code, 429)
+        with mock.patch.object(TokenBucketThrottle, 'timer', return_value=1030.0):
+            self.assertEqual(self.client.get(url).status_code, 200)
+            self.assertEqual(self.client.get(url).status_code, 429)
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class SeedDataTests(TestCase):
+    def seed(self, **options):
+        call_command('seed_yabatech_data', students=20, opportunities=6, stdout=io.StringIO(), **options)
+        return sorted(Application.objects.values_list('id', 'user__email', 'status'))
+
+    def test_same_seed_reproduces_dataset(self):
+        first = self.seed()
+        self.assertEqual(self.seed(), first)
+        self.assertNotEqual(self.seed(seed=7), first)
+        self.assertEqual(User.objects.filter(role='student').count(), 20)
+
+    def test_denormalized_counters_match_rows(self):
+        self.seed()
+        for opportunity in Opportunity.objects.all():
+            self.assertEqual(
+                opportunity.applications_count, opportunity.applications.count()
+            )
+        for counter in NotificationCounter.objects.all():
+            self.assertEqual(counter.unread, counter.user.notifications.filter(read=False).count())
+        self.assertEqual(
+            Application.objects.filter(applied_at__gte=F('updated_at')).count(), 0
+        )
+
+
+@override_settings(PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'])
+class QueryBudgetTests(TestCase):
+    """Fails when an endpoint's query count exceeds its budget in core.benchmarks."""
+
+    def setUp(self):
+        cache.clear()
+
+    def test_endpoints_stay_within_query_budgets(self):
+        for students in (5, 25):
+            seed_dataset(students=students, opportunities=12)
+            cache.clear()
+            for result in benchmark_endpoints():
+                with self.subTest(endpoint=result.endpoint.name, students=students):
+                    self.assertEqual(result.failures, [])
+
+
+@override_settings(REQUEST_INSTRUMENTATION={'SAMPLE_RATE': 1.0, 'N_PLUS_ONE_THRESHOLD': 3})
+class RequestInstrumentationTests(TestCase):
+    def setUp(self):
+        self.users = [
+            User.objects.create_user(email=f'user{index}@yabatech.edu.ng',
+                                     username=f'user{index}@yabatech.edu.ng', password=None)
+            for index in range(3)
+        ]
+
+    def test_server_timing_header(self):
+        Notification.objects.create(user=self.users[0], title='Hi', message='Hello', type='system')
+        self.users[0].role = 'administrator'
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        response = client.get('/api/notifications/notifications/')
+        self.assertEqual(response.status_code, 200)
+        timing = response['Server-Timing']
+        self.assertRegex(timing, r'db;dur=[\d.]+;desc="2 queries"')
+        for name in ('serializer', 'view', 'total'):
+            self.assertRegex(timing, rf'\b{name};dur=[\d.]+')
+
+    def test_server_timing_hidden_from_non_staff(self):
+        client = APIClient()
+        client.force_authenticate(self.users[0])
+        with self.assertLogs('core.instrumentation', 'INFO'):
+            response = client.get('/api/notifications/notifications/')
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_streaming_queries_counted_until_stream_ends(self):
+        def view(request):
+            return StreamingHttpResponse(
+                str(User.objects.get(pk=user.pk).pk) for user in self.users
+            )
+
+        response = RequestInstrumentationMiddleware(view)(RequestFactory().get('/stream/'))
+        with self.assertLogs('core.instrumentation', 'INFO') as logs:
+            b''.join(response.streaming_content)
+        self.assertEqual(logs.records[0].queries, 3)
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_repeated_query_shape_logged_as_n_plus_one(self):
+        def view(request):
+            for user in self.users:
+                User.objects.get(pk=user.pk)
+            return HttpResponse()
+
+        middleware = RequestInstrumentationMiddleware(view)
+        with self.assertLogs('core.instrumentation', 'WARNING') as logs:
+            middleware(RequestFactory().get('/n-plus-one/'))
+        self.assertIn('Probable N+1 in GET /n-plus-one/: 3x SELECT', logs.output[0])
+        self.assertEqual(logs.records[0].queries, 3)
+
+    def test_unsampled_requests_are_untouched(self):
+        with override_settings(REQUEST_INSTRUMENTATION={'SAMPLE_RATE': 0, 'N_PLUS_ONE_THRESHOLD': 3}):
+            response = RequestInstrumentationMiddleware(lambda request: HttpResponse())(
+                RequestFactory().get('/')
+            )
+        self.assertFalse(response.has_header('Server-Timing'))
+
+    def test_query_shape_collapses_literals_and_in_lists(self):
+        self.assertEqual(
+            query_shape("SELECT * FROM t WHERE id IN (%s, %s, %s) AND name = 'x'  AND n = 3"),
+            query_shape('SELECT * FROM t WHERE id IN (%s) AND name = \'y\' AND n = 4'),
+        )
+
+
+@override_settings(
+    BACKGROUND_TASKS_ASYNC=False,
+    PASSWORD_HASHERS=['django.contrib.auth.hashers.MD5PasswordHasher'],
+)
+class WriteBehindCounterTests(TestCase):
+    def setUp(self):
+        write_behind.clear()
+        self.addCleanup(write_behind.clear)
+        self.student = User.objects.create_user(
+            email='student@yabatech.edu.ng', username='student@yabatech.edu.ng', password='secret'
+        )
+        self.client = APIClient()
+
+    def test_views_count_flushed_as_one_update(self):
+        admin = User.objects.create_user(email='admin@yabatech.edu.ng', username='admin', password=None,
+                                         role='administrator')
+        opportunities = [create_opportunity(admin), create_opportunity(admin)]
+        self.client.force_authenticate(self.student)
+        with override_settings(WRITE_BEHIND_FLUSH_INTERVAL=3600):
+            for opportunity in opportunities:
+                for _ in range(3):
+                    self.client.get(f'/api/opportunities/opportunities/{opportunity.pk}/')
+        self.assertEqual(Opportunity.objects.filter(views_count=0).count(), 2)
+
+        with self.assertNumQueries(1):
+            write_behind.flush()
+        self.assertEqual(list(Opportunity.objects.values_list('views_count', flat=True)), [3, 3])
+
+    def test_last_login_written_behind_on_token_issue(self):
+        with override_settings(WRITE_BEHIND_FLUSH_INTERVAL=3600):
+            response = self.client.post('/api/users/token/', {
+                'email': 'student@yabatech.edu.ng', 'password': 'secret'
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.student.refresh_from_db()
+        self.assertIsNone(self.student.last_login)
+
+        write_behind.flush()
+        self.student.refresh_from_db()
+        self.assertIsNotNone(self.student.last_login)
+
+    def test_flush_runs_once_interval_has_elapsed(self):
+        with override_settings(WRITE_BEHIND_FLUSH_INTERVAL=0), \
+                self.captureOnCommitCallbacks(execute=True):
+            write_behind.set_latest(User, self.student.pk, 'last_login', timezone.now())
+        self.student.refresh_from_db()
+        self.assertIsNotNone(self.student.last_login)
+
+
+@override_settings(BACKGROUND_TASKS_ASYNC=True, WRITE_BEHIND_FLUSH_INTERVAL=0.05)
+class WriteBehindTimerTests(TransactionTestCase):
+    def setUp(self):
+        write_behind.clear()
+        self.addCleanup(write_behind.clear)
+
+    def test_buffered_changes_land_without_further_traffic(self):
+        admin = create_user('admin@yabatech.edu.ng', role='administrator')
+        opportunity = create_opportunity(admin)
+        write_behind.increment(Opportunity, opportunity.pk, 'views_count', 2)
+        write_behind.set_latest(User, admin.pk, 'last_login', timezone.now())
+
+        deadline = time.monotonic() + 5
+        while time.monotonic() < deadline:
+            opportunity.refresh_from_db(fields=['views_count'])
+            admin.refresh_from_db(fields=['last_login'])
+            if opportunity.views_count and admin.last_login:
+                break
+            time.sleep(0.02)
+        self.assertEqual(opportunity.views_count, 2)
+        self.assertIsNotNone(admin.last_login)
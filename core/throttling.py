@@ -0,0 +1,87 @@
+from django.conf import settings
+from django.core.cache import caches
+from rest_framework.settings import api_settings
+from rest_framework.throttling import SimpleRateThrottle
+
+
+class TokenBucketThrottle(SimpleRateThrottle):
+    """Token-bucket variant of DRF's SimpleRateThrottle.
+
+    A rate of ``N/period`` gives each key a bucket of N tokens that refills
+    continuously over the period, so bursts up to N are allowed and sustained
+    traffic is smoothed out instead of being reset at window boundaries.
+    Buckets live in the cache named by ``settings.THROTTLE_CACHE`` so the store
+    can be swapped (locmem, file, redis) without touching the throttles.
+    """
+
+    cache_format = 'throttle:%(scope)s:%(ident)s'
+
+    @property
+    def cache(self):
+        return caches[settings.THROTTLE_CACHE]
+
+    def get_rate(self):
+        # Looked up per instance so overridden REST_FRAMEWORK settings apply
+        self.THROTTLE_RATES = api_settings.DEFAULT_THROTTLE_RATES
+        return super().get_rate()
+
+    def allow_request(self, request, view):
+        if self.rate is None:
+            return True
+
+        self.key = self.get_cache_key(request, view)
+        if self.key is None:
+            return True
+
+        self.now = self.timer()
+        refill_rate = self.num_requests / self.duration
+        tokens, updated_at = self.cache.get(self.key, (self.num_requests, self.now))
+        tokens = min(self.num_requests, tokens + (self.now - updated_at) * refill_rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        self.tokens = tokens
+        # An untouched bucket is full again after one period, so let it expire then
+        self.cache.set(self.key, (tokens, self.now), self.duration)
+        return allowed
+
+    def wait(self):
+        return (1 - self.tokens) * self.duration / self.num_requests
+
+
+class APIRateThrottle(TokenBucketThrottle):
+    """General API traffic, keyed by user when authenticated and by IP otherwise."""
+
+    scope = 'api'
+
+    def get_cache_key(self, request, view):
+        if request.user and request.user.is_authenticated:
+            ident = request.user.pk
+        else:
+            ident = self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+
+class AuthIPRateThrottle(TokenBucketThrottle):
+    """Password-checking endpoints, keyed by client IP."""
+
+    scope = 'auth_ip'
+
+    def get_cache_key(self, request, view):
+        return self.cache_format % {'scope': self.scope, 'ident': self.get_ident(request)}
+
+
+class AuthEmailRateThrottle(TokenBucketThrottle):
+    """Password-checking endpoints, keyed by the email being tried."""
+
+    scope = 'auth'
+
+    def get_cache_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not email or not isinstance(email, str):
+            return None
+        return self.cache_format % {'scope': self.scope, 'ident': email.strip().lower()}
+
+
+AUTH_THROTTLE_CLASSES = [AuthIPRateThrottle, AuthEmailRateThrottle]
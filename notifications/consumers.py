@@ -0,0 +1,29 @@
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from .models import NotificationCounter
+from .push import notification_group
+
+class NotificationConsumer(AsyncJsonWebsocketConsumer):
+    """Streams new notifications and unread-count changes to the user."""
+
+    async def connect(self):
+        user = self.scope.get('user')
+        if user is None or not user.is_authenticated:
+            await self.close(code=4401)
+            return
+
+        self.group_name = notification_group(user.id)
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        unread = await database_sync_to_async(NotificationCounter.get_unread)(user.id)
+        await self.send_json({'type': 'unread_count', 'unread_count': unread})
+
+    async def disconnect(self, code):
+        if hasattr(self, 'group_name'):
+            await self.channel_layer.group_discard(self.group_name, self.channel_name)
+
+    async def notification_created(self, event):
+        await self.send_json({'type': 'notification', 'notification': event['notification']})
+
+    async def unread_count_changed(self, event):
+        await self.send_json({'type': 'unread_count', 'unread_count': event['unread_count']})
@@ -1,5 +1,9 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import F
+from django.utils import timezone
 from users.models import User
+from opportunities.models import Opportunity
+from .push import push_notifications, push_unread_counts
 
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='notifications')
@@ -18,4 +22,109 @@ class Notification(models.Model):
     created_at = models.DateTimeField(auto_now_add=True)
 
     class Meta:
-        ordering = ['-created_at'] 
\ No newline at end of file
+        ordering = ['-created_at']
+        indexes = [
+            models.Index(fields=['user', '-created_at', '-id']),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored read flag so save() can keep the counter in step
+        instance._loaded_read = dict(zip(field_names, values)).get('read')
+        return instance
+
+    def save(self, *args, **kwargs):
+        creating = self._state.adding
+        previous_read = getattr(self, '_loaded_read', None)
+        super().save(*args, **kwargs)
+
+        if creating:
+            push_notifications([self])
+            delta = 0 if self.read else 1
+        elif previous_read is None:
+            delta = 0
+        else:
+            delta = int(previous_read) - int(self.read)
+        if delta:
+            NotificationCounter.adjust(self.user_id, delta)
+        self._loaded_read = self.read
+
+class NotificationCounter(models.Model):
+    """Denormalized per-user unread count so the inbox badge is one row read."""
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='notification_counter'
+    )
+    unread = models.IntegerField(default=0)
+
+    @classmethod
+    def get_unread(cls, user_id):
+        return cls.objects.filter(user_id=user_id).values_list('unread', flat=True).first() or 0
+
+    @classmethod
+    def adjust(cls, user_id, delta):
+        updated = cls.objects.filter(user_id=user_id).update(unread=F('unread') + delta)
+        if not updated and delta > 0:
+            cls.adjust_many({user_id: delta})
+        elif updated:
+            push_unread_counts([user_id])
+
+    @classmethod
+    def adjust_many(cls, deltas):
+        """Apply ``{user_id: delta}`` with one UPDATE per distinct delta."""
+        by_delta = {}
+        for user_id, delta in deltas.items():
+            if delta:
+                by_delta.setdefault(delta, []).append(user_id)
+        if not by_delta:
+            return
+
+        with transaction.atomic():
+            # Only increments may need a row; a missing row has nothing to decrement
+            cls.objects.bulk_create(
+                [cls(user_id=user_id) for user_id, delta in deltas.items() if delta > 0],
+                ignore_conflicts=True
+            )
+            for delta, user_ids in by_delta.items():
+                cls.objects.filter(user_id__in=user_ids).update(unread=F('unread') + delta)
+        push_unread_counts(user_id for user_ids in by_delta.values() for user_id in user_ids)
+
+class NotificationFanout(models.Model):
+    """Progress of notifying target students about a published opportunity."""
+    opportunity = models.ForeignKey(
+        Opportunity,
+        on_delete=models.CASCADE,
+        related_name='notification_fanouts'
+    )
+    status = models.CharField(
+        max_length=20,
+        choices=[
+            ('pending', 'Pending'),
+            ('running', 'Running'),
+            ('completed', 'Completed'),
+            ('failed', 'Failed')
+        ],
+        default='pending'
+    )
+    target_courses = models.JSONField(default=list, blank=True)
+    target_years = models.JSONField(default=list, blank=True)
+    total = models.IntegerField(default=0)
+    sent = models.IntegerField(default=0)
+    error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    started_at = models.DateTimeField(null=True, blank=True)
+    finished_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        ordering = ['-created_at']
+
+    @property
+    def throughput(self):
+        """Notifications delivered per second so far."""
+        if not self.started_at:
+            return 0
+        elapsed = ((self.finished_at or timezone.now()) - self.started_at).total_seconds()
+        return round(self.sent / elapsed, 1) if elapsed > 0 else float(self.sent)
@@ -0,0 +1,53 @@
+"""Pushes notification events to connected WebSocket clients.
+
+Events are sent through the channel layer after the surrounding transaction
+commits, so clients never see rows that were rolled back.
+"""
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+
+
+def notification_group(user_id):
+    return f'notifications.{user_id}'
+
+
+def _group_send(messages):
+    channel_layer = get_channel_layer()
+    if channel_layer is None:
+        return
+    for user_id, message in messages:
+        async_to_sync(channel_layer.group_send)(notification_group(user_id), message)
+
+
+def push_notifications(notifications):
+    """Send newly created notifications to their owners once committed."""
+    from .serializers import NotificationSerializer
+
+    def send():
+        _group_send(
+            (notification.user_id, {
+                'type': 'notification.created',
+                'notification': NotificationSerializer(notification).data,
+            })
+            for notification in notifications
+        )
+    transaction.on_commit(send)
+
+
+def push_unread_counts(user_ids):
+    """Send the current unread count of each user once committed."""
+    from .models import NotificationCounter
+
+    user_ids = list(user_ids)
+
+    def send():
+        counts = dict(
+            NotificationCounter.objects.filter(user_id__in=user_ids)
+            .values_list('user_id', 'unread')
+        )
+        _group_send(
+            (user_id, {'type': 'unread_count.changed', 'unread_count': counts.get(user_id, 0)})
+            for user_id in user_ids
+        )
+    transaction.on_commit(send)
@@ -1,8 +1,19 @@
 from rest_framework import serializers
-from .models import Notification
+from core.instrumentation import TimedSerializerMixin
+from .models import Notification, NotificationFanout
 
-class NotificationSerializer(serializers.ModelSerializer):
+class NotificationSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Notification
         fields = ['id', 'title', 'message', 'type', 'read', 'created_at']
-        read_only_fields = ['created_at'] 
\ No newline at end of file
+        read_only_fields = ['created_at'] 
+
+class NotificationFanoutSerializer(serializers.ModelSerializer):
+    throughput = serializers.FloatField(read_only=True)
+
+    class Meta:
+        model = NotificationFanout
+        fields = ['id', 'opportunity', 'status', 'target_courses', 'target_years',
+                  'total', 'sent', 'throughput', 'error', 'created_at',
+                  'started_at', 'finished_at']
+        read_only_fields = fields
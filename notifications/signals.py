@@ -0,0 +1,15 @@
+from django.db.models import QuerySet
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+from users.models import User
+from .models import Notification, NotificationCounter
+
+def deleted_with_user(origin):
+    # A user's deletion cascades to their counter too, so there is nothing to adjust
+    model = origin.model if isinstance(origin, QuerySet) else type(origin)
+    return model is User
+
+@receiver(post_delete, sender=Notification)
+def decrement_unread_count(sender, instance, origin=None, **kwargs):
+    if not instance.read and not deleted_with_user(origin):
+        NotificationCounter.adjust(instance.user_id, -1)
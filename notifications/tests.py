@@ -0,0 +1,241 @@
+import json
+
+from asgiref.sync import sync_to_async
+from asgiref.testing import ApplicationCommunicator
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.tokens import AccessToken
+
+from aspirebridge.asgi import application
+from core.testing import create_opportunity, create_user
+from .models import Notification, NotificationCounter, NotificationFanout
+
+
+def notify(user, **kwargs):
+    defaults = {'title': 'Update', 'message': 'Something happened', 'type': 'system'}
+    defaults.update(kwargs)
+    return Notification.objects.create(user=user, **defaults)
+
+
+class UnreadCounterTests(TestCase):
+    def setUp(self):
+        self.student = create_user('student@yabatech.edu.ng')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.url = '/api/notifications/notifications/'
+
+    def unread_count(self):
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(f'{self.url}unread_count/')
+        self.assertEqual(len(ctx), 1)
+        return response.data['unread_count']
+
+    def test_counter_tracks_create_mark_read_and_delete(self):
+        first = notify(self.student)
+        second = notify(self.student)
+        notify(self.student, read=True)
+        self.assertEqual(self.unread_count(), 2)
+
+        self.client.post(f'{self.url}{first.id}/mark_read/')
+        self.client.post(f'{self.url}{first.id}/mark_read/')
+        self.assertEqual(self.unread_count(), 1)
+
+        second.delete()
+        self.assertEqual(self.unread_count(), 0)
+
+    def test_bulk_mark_read_uses_one_update(self):
+        notifications = [notify(self.student) for _ in range(5)]
+        other = notify(create_user('other@yabatech.edu.ng'))
+        ids = [n.id for n in notifications[:3]] + [other.id]
+        response = self.client.post(f'{self.url}bulk_mark_read/', {'ids': ids}, format='json')
+        self.assertEqual(response.data['updated'], 3)
+        self.assertEqual(self.unread_count(), 2)
+        self.assertFalse(Notification.objects.get(pk=other.pk).read)
+
+    def test_bulk_mark_read_rejects_invalid_ids(self):
+        response = self.client.post(f'{self.url}bulk_mark_read/', {'ids': 'all'}, format='json')
+        self.assertEqual(response.status_code, 400)
+        response = self.client.post(f'{self.url}bulk_mark_read/', {'ids': [True]}, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_marking_read_notification_skips_counter_write(self):
+        notification = notify(self.student, read=True)
+        with CaptureQueriesContext(connection) as ctx:
+            self.client.post(f'{self.url}{notification.id}/mark_read/')
+        self.assertFalse([q for q in ctx.captured_queries if 'notificationcounter' in q['sql']])
+
+    def test_mark_all_read_resets_counter(self):
+        for _ in range(3):
+            notify(self.student)
+        self.client.post(f'{self.url}mark_all_read/')
+        self.assertEqual(NotificationCounter.get_unread(self.student.id), 0)
+
+    def test_deleting_user_cascades_cleanly(self):
+        for _ in range(3):
+            notify(self.student)
+        with CaptureQueriesContext(connection) as ctx:
+            self.student.delete()
+        self.assertFalse(NotificationCounter.objects.exists())
+        self.assertFalse([q for q in ctx.captured_queries
+                          if q['sql'].startswith('UPDATE "notifications_notificationcounter"')])
+
+
+class NotificationConditionalGetTests(TestCase):
+    def setUp(self):
+        self.student = create_user('student@yabatech.edu.ng')
+        self.notification = notify(self.student)
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+        self.url = '/api/notifications/notifications/'
+
+    def test_marking_read_changes_list_and_detail_etags(self):
+        list_etag = self.client.get(self.url)['ETag']
+        detail_url = f'{self.url}{self.notification.id}/'
+        detail_etag = self.client.get(detail_url)['ETag']
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=list_etag).status_code, 304)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 304)
+
+        self.client.post(f'{detail_url}mark_read/')
+        self.assertEqual(self.client.get(self.url, HTTP_IF_NONE_MATCH=list_etag).status_code, 200)
+        self.assertEqual(self.client.get(detail_url, HTTP_IF_NONE_MATCH=detail_etag).status_code, 200)
+
+
+class WebsocketClient(ApplicationCommunicator):
+    """Minimal WebSocket test client (channels.testing needs daphne)."""
+
+    def __init__(self, path):
+        path, _, query = path.partition('?')
+        super().__init__(application, {
+            'type': 'websocket',
+            'path': path,
+            'query_string': query.encode(),
+            'headers': [],
+            'subprotocols': [],
+        })
+
+    async def connect(self):
+        await self.send_input({'type': 'websocket.connect'})
+        response = await self.receive_output()
+        if response['type'] == 'websocket.close':
+            return False, response.get('code')
+        return True, None
+
+    async def receive_json_from(self):
+        response = await self.receive_output()
+        return json.loads(response['text'])
+
+    async def disconnect(self):
+        await self.send_input({'type': 'websocket.disconnect', 'code': 1000})
+        await self.wait()
+
+
+class NotificationPushTests(TestCase):
+    def setUp(self):
+        self.student = create_user('student@yabatech.edu.ng')
+        notify(self.student)
+
+    def create_notification(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            notify(self.student, title='Interview Scheduled', type='interview')
+
+    async def test_websocket_receives_new_notifications(self):
+        token = str(AccessToken.for_user(self.student))
+        communicator = WebsocketClient(f'/ws/notifications/?token={token}')
+        connected, _ = await communicator.connect()
+        self.assertTrue(connected)
+        self.assertEqual(
+            await communicator.receive_json_from(),
+            {'type': 'unread_count', 'unread_count': 1}
+        )
+
+        await sync_to_async(self.create_notification)()
+        messages = [await communicator.receive_json_from() for _ in range(2)]
+        self.assertEqual(messages[0]['type'], 'notification')
+        self.assertEqual(messages[0]['notification']['title'], 'Interview Scheduled')
+        self.assertEqual(messages[1], {'type': 'unread_count', 'unread_count': 2})
+        await communicator.disconnect()
+
+    async def test_websocket_rejects_missing_token(self):
+        communicator = WebsocketClient('/ws/notifications/')
+        connected, code = await communicator.connect()
+        self.assertFalse(connected)
+        self.assertEqual(code, 4401)
+
+
+@override_settings(BACKGROUND_TASKS_ASYNC=False, NOTIFICATION_FANOUT_BATCH_SIZE=3)
+class PublishFanoutTests(TestCase):
+    def setUp(self):
+        self.admin = create_user('admin@yabatech.edu.ng', role='administrator')
+        for index in range(7):
+            student = create_user(f'student{index}@yabatech.edu.ng')
+            student.course = 'Computer Science' if index % 2 else 'Accountancy'
+            student.year_of_study = 1 + index % 4
+            student.save()
+        self.opportunity = create_opportunity(
+            self.admin, title='Data Analyst Intern', description='Dashboards',
+            organization='Flutterwave', location='Lekki, Lagos', status='draft'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+        self.url = f'/api/opportunities/opportunities/{self.opportunity.id}/'
+
+    def test_publish_notifies_targeted_students_in_batches(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(
+                f'{self.url}publish/', {'courses': ['Computer Science']}, format='json'
+            )
+        self.assertEqual(response.status_code, 202)
+
+        response = self.client.get(f'{self.url}fanout/')
+        self.assertEqual(response.data['status'], 'completed')
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['sent'], 3)
+        notified = Notification.objects.filter(type='opportunity')
+        self.assertEqual(
+            set(notified.values_list('user__course', flat=True)), {'Computer Science'}
+        )
+        student = notified.first().user
+        self.assertEqual(NotificationCounter.get_unread(student.id), 1)
+
+    def test_publishing_twice_notifies_once(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.post(f'{self.url}publish/', format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{self.url}publish/', format='json')
+        self.assertEqual(response.status_code, 409)
+        self.assertEqual(Notification.objects.filter(type='opportunity').count(), 7)
+
+        # A fan-out that already ran blocks re-publishing after the listing closes
+        self.client.patch(self.url, {'status': 'closed'}, format='json')
+        response = self.client.post(f'{self.url}publish/', format='json')
+        self.assertEqual(response.status_code, 409)
+
+    def test_activating_through_update_notifies_all_students(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {'status': 'active'}, format='json')
+        self.assertEqual(Notification.objects.filter(type='opportunity').count(), 7)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {'title': 'Senior Data Analyst Intern'}, format='json')
+        self.assertEqual(Notification.objects.filter(type='opportunity').count(), 7)
+
+    def test_reactivating_does_not_notify_again(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client.patch(self.url, {'status': 'active'}, format='json')
+        self.client.patch(self.url, {'status': 'closed'}, format='json')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.patch(self.url, {'status': 'active'}, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Notification.objects.filter(type='opportunity').count(), 7)
+        self.assertEqual(self.opportunity.notification_fanouts.count(), 1)
+
+    def test_failed_fanout_can_be_retried(self):
+        self.opportunity.status = 'active'
+        self.opportunity.save()
+        NotificationFanout.objects.create(opportunity=self.opportunity, status='failed')
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(f'{self.url}publish/', format='json')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(Notification.objects.filter(type='opportunity').count(), 7)
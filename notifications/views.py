@@ -1,25 +1,69 @@
+from django.db import transaction
+from django.db.models import Count, Q
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
-from .models import Notification
+from core.conditional import ConditionalGetMixin
+from core.pagination import KeysetPagination
+from drf_spectacular.utils import extend_schema
+from .models import Notification, NotificationCounter
 from .serializers import NotificationSerializer
 
-class NotificationViewSet(viewsets.ModelViewSet):
+class NotificationViewSet(ConditionalGetMixin, viewsets.ModelViewSet):
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
     serializer_class = NotificationSerializer
+    # Notifications have no updated_at; marking one read must still change the ETag
+    conditional_timestamp_field = 'created_at'
+    conditional_detail_fields = ('created_at', 'read')
+    conditional_last_modified = False
+
+    def get_list_validator_aggregates(self):
+        return {**super().get_list_validator_aggregates(), 'unread': Count('pk', filter=Q(read=False))}
 
     def get_queryset(self):
         return Notification.objects.filter(user=self.request.user)
 
+    def _mark_read(self, queryset):
+        with transaction.atomic():
+            updated = queryset.filter(read=False).update(read=True)
+            if updated:
+                NotificationCounter.adjust(self.request.user.id, -updated)
+        return updated
+
+    @extend_schema(
+        description='Number of unread notifications for the badge',
+        responses={200: {'unread_count': 3}}
+    )
+    @action(detail=False, methods=['get'])
+    def unread_count(self, request):
+        return Response({'unread_count': NotificationCounter.get_unread(request.user.id)})
+
     @action(detail=False, methods=['post'])
     def mark_all_read(self, request):
-        self.get_queryset().update(read=True)
+        self._mark_read(self.get_queryset())
         return Response({'status': 'success'})
 
     @action(detail=True, methods=['post'])
     def mark_read(self, request, pk=None):
         notification = self.get_object()
-        notification.read = True
-        notification.save()
-        return Response({'status': 'success'}) 
\ No newline at end of file
+        self._mark_read(self.get_queryset().filter(pk=notification.pk))
+        return Response({'status': 'success'})
+
+    @extend_schema(
+        description='Mark several notifications as read in one update',
+        request={'ids': [1, 2, 3]},
+        responses={200: {'status': 'success', 'updated': 3}}
+    )
+    @action(detail=False, methods=['post'])
+    def bulk_mark_read(self, request):
+        ids = request.data.get('ids')
+        if not isinstance(ids, list) or not all(isinstance(i, int) and not isinstance(i, bool) for i in ids):
+            return Response(
+                {'error': 'ids must be a list of notification ids'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        updated = self._mark_read(self.get_queryset().filter(id__in=ids))
+        return Response({'status': 'success', 'updated': updated})
@@ -0,0 +1,75 @@
+from django.db import migrations
+
+# The SQL is spelled out here, not imported from opportunities.search, so
+# later changes to the app code never alter what this migration did.
+
+SQLITE_INSTALL = [
+    "CREATE VIRTUAL TABLE IF NOT EXISTS opportunities_opportunity_fts USING fts5("
+    "title, organization, requirements, description, "
+    "content='opportunities_opportunity', content_rowid='rowid', tokenize='porter unicode61')",
+    """
+    CREATE TRIGGER IF NOT EXISTS opportunities_opportunity_fts_insert
+    AFTER INSERT ON opportunities_opportunity BEGIN
+        INSERT INTO opportunities_opportunity_fts (rowid, title, organization, requirements, description)
+        VALUES (new.rowid, new.title, new.organization, new.requirements, new.description);
+    END""",
+    """
+    CREATE TRIGGER IF NOT EXISTS opportunities_opportunity_fts_delete
+    AFTER DELETE ON opportunities_opportunity BEGIN
+        INSERT INTO opportunities_opportunity_fts
+            (opportunities_opportunity_fts, rowid, title, organization, requirements, description)
+        VALUES ('delete', old.rowid, old.title, old.organization, old.requirements, old.description);
+    END""",
+    """
+    CREATE TRIGGER IF NOT EXISTS opportunities_opportunity_fts_update
+    AFTER UPDATE OF title, organization, requirements, description ON opportunities_opportunity BEGIN
+        INSERT INTO opportunities_opportunity_fts
+            (opportunities_opportunity_fts, rowid, title, organization, requirements, description)
+        VALUES ('delete', old.rowid, old.title, old.organization, old.requirements, old.description);
+        INSERT INTO opportunities_opportunity_fts (rowid, title, organization, requirements, description)
+        VALUES (new.rowid, new.title, new.organization, new.requirements, new.description);
+    END""",
+    "INSERT INTO opportunities_opportunity_fts (opportunities_opportunity_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    'DROP TRIGGER IF EXISTS opportunities_opportunity_fts_insert',
+    'DROP TRIGGER IF EXISTS opportunities_opportunity_fts_delete',
+    'DROP TRIGGER IF EXISTS opportunities_opportunity_fts_update',
+    'DROP TABLE IF EXISTS opportunities_opportunity_fts',
+]
+
+POSTGRES_INSTALL = [
+    "CREATE INDEX IF NOT EXISTS opportunities_opportunity_search ON opportunities_opportunity "
+    "USING GIN (("
+    "setweight(to_tsvector('english', coalesce(title::text, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(organization::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(requirements::text, '')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(description::text, '')), 'C')"
+    "))",
+]
+
+POSTGRES_UNINSTALL = [
+    'DROP INDEX IF EXISTS opportunities_opportunity_search',
+]
+
+
+def run(statements):
+    def apply(apps, schema_editor):
+        for statement in statements.get(schema_editor.connection.vendor, []):
+            schema_editor.execute(statement)
+    return apply
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opportunities', '0002_initial'),
+    ]
+
+    operations = [
+        migrations.RunPython(
+            run({'sqlite': SQLITE_INSTALL, 'postgresql': POSTGRES_INSTALL}),
+            run({'sqlite': SQLITE_UNINSTALL, 'postgresql': POSTGRES_UNINSTALL}),
+        ),
+    ]
@@ -0,0 +1,104 @@
+# Generated by Django 5.1.4 on 2026-10-17 00:19
+
+import re
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.utils.text import slugify
+
+# The backfill below is self-contained rather than importing
+# opportunities.skills, so later changes to the app code never alter it.
+
+BACKFILL_BATCH_SIZE = 1000
+BULLET = re.compile(r'^[\s\-*•·]+|[\s.;,]+$')
+
+
+def normalize_requirements(requirements):
+    if isinstance(requirements, str):
+        requirements = requirements.splitlines()
+    elif not isinstance(requirements, (list, tuple)):
+        return {}
+    skills = {}
+    for requirement in requirements:
+        name = BULLET.sub('', str(requirement))
+        slug = slugify(name)[:100]
+        if slug and slug not in skills:
+            skills[slug] = name[:255]
+    return skills
+
+
+def sync_batch(opportunities, Skill, OpportunitySkill):
+    wanted = {opportunity.pk: normalize_requirements(opportunity.requirements)
+              for opportunity in opportunities}
+    names = {}
+    for skills in wanted.values():
+        for slug, name in skills.items():
+            names.setdefault(slug, name)
+    Skill.objects.bulk_create(
+        [Skill(slug=slug, name=name) for slug, name in names.items()],
+        ignore_conflicts=True, batch_size=BACKFILL_BATCH_SIZE,
+    )
+    skill_ids = dict(Skill.objects.filter(slug__in=names).values_list('slug', 'id'))
+    OpportunitySkill.objects.filter(opportunity_id__in=list(wanted)).delete()
+    OpportunitySkill.objects.bulk_create(
+        [OpportunitySkill(opportunity_id=opportunity_id, skill_id=skill_ids[slug])
+         for opportunity_id, skills in wanted.items() for slug in skills],
+        batch_size=BACKFILL_BATCH_SIZE,
+    )
+
+
+def backfill_skills(apps, schema_editor):
+    Opportunity = apps.get_model('opportunities', 'Opportunity')
+    Skill = apps.get_model('opportunities', 'Skill')
+    OpportunitySkill = apps.get_model('opportunities', 'OpportunitySkill')
+    batch = []
+    for opportunity in Opportunity.objects.only('id', 'requirements').iterator(chunk_size=BACKFILL_BATCH_SIZE):
+        batch.append(opportunity)
+        if len(batch) == BACKFILL_BATCH_SIZE:
+            sync_batch(batch, Skill, OpportunitySkill)
+            batch = []
+    if batch:
+        sync_batch(batch, Skill, OpportunitySkill)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opportunities', '0003_opportunity_search_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('slug', models.SlugField(max_length=100, unique=True)),
+                ('name', models.CharField(max_length=255)),
+            ],
+            options={
+                'ordering': ['name'],
+            },
+        ),
+        migrations.CreateModel(
+            name='OpportunitySkill',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('opportunity', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='opportunities.opportunity')),
+                ('skill', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='opportunity_links', to='opportunities.skill')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='opportunity',
+            name='skills',
+            field=models.ManyToManyField(blank=True, related_name='opportunities', through='opportunities.OpportunitySkill', to='opportunities.skill'),
+        ),
+        migrations.AddIndex(
+            model_name='opportunityskill',
+            index=models.Index(fields=['opportunity', 'skill'], name='opportuniti_opportu_8b7a95_idx'),
+        ),
+        migrations.AlterUniqueTogether(
+            name='opportunityskill',
+            unique_together={('skill', 'opportunity')},
+        ),
+        migrations.RunPython(backfill_skills, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 5.1.4 on 2026-10-17 00:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('opportunities', '0004_skills'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='opportunityskill',
+            name='opportunity',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='skill_links', to='opportunities.opportunity'),
+        ),
+        migrations.AlterField(
+            model_name='opportunityskill',
+            name='skill',
+            field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='opportunity_links', to='opportunities.skill'),
+        ),
+    ]
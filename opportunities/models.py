@@ -1,6 +1,8 @@
 from django.db import models
+from django.db.models import F
 import uuid
 from users.models import User
+from .skills import NAME_MAX_LENGTH, SLUG_MAX_LENGTH, sync_skills
 
 class Opportunity(models.Model):
     id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
@@ -39,6 +41,10 @@ class Opportunity(models.Model):
     views_count = models.IntegerField(default=0)
     applications_count = models.IntegerField(default=0)
     saved_by = models.ManyToManyField(User, related_name='saved_opportunities', blank=True)
+    # Derived from requirements on save; see opportunities.skills
+    skills = models.ManyToManyField(
+        'Skill', through='OpportunitySkill', related_name='opportunities', blank=True
+    )
 
     class Meta:
         ordering = ['-created_at']
@@ -52,6 +58,63 @@ class Opportunity(models.Model):
     def __str__(self):
         return self.title
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the stored requirements so save() only re-tags on change
+        instance._loaded_requirements = dict(zip(field_names, values)).get('requirements')
+        return instance
+
+    def save(self, *args, **kwargs):
+        # Copies made by clearing pk on a loaded instance are inserts too
+        creating = self._state.adding or self.pk is None
+        previous_requirements = getattr(self, '_loaded_requirements', None)
+        super().save(*args, **kwargs)
+
+        update_fields = kwargs.get('update_fields')
+        if creating or (
+            (update_fields is None or 'requirements' in update_fields)
+            and previous_requirements != self.requirements
+        ):
+            sync_skills([self], Skill, OpportunitySkill)
+        self._loaded_requirements = self.requirements
+
     def update_counts(self):
-        self.applications_count = self.applications.count()
-        self.save(update_fields=['applications_count']) 
\ No newline at end of file
+        self.applications_count = self.applications.exclude(status='withdrawn').count()
+        self.save(update_fields=['applications_count'])
+
+    @classmethod
+    def adjust_applications_count(cls, opportunity_id, delta):
+        """Atomically shift applications_count without reading the row first."""
+        cls.objects.filter(pk=opportunity_id).update(
+            applications_count=F('applications_count') + delta
+        ) 
+
+class Skill(models.Model):
+    """A normalized requirement tag, shared by every opportunity listing it."""
+    slug = models.SlugField(max_length=SLUG_MAX_LENGTH, unique=True)
+    name = models.CharField(max_length=NAME_MAX_LENGTH)
+
+    class Meta:
+        ordering = ['name']
+
+    def __str__(self):
+        return self.name
+
+
+class OpportunitySkill(models.Model):
+    # The two composite indexes below lead with each column, so neither
+    # foreign key needs an index of its own
+    opportunity = models.ForeignKey(
+        Opportunity, on_delete=models.CASCADE, related_name='skill_links', db_index=False
+    )
+    skill = models.ForeignKey(
+        Skill, on_delete=models.CASCADE, related_name='opportunity_links', db_index=False
+    )
+
+    class Meta:
+        # Skill first so tag lookups and intersections are answered from the index alone
+        unique_together = ['skill', 'opportunity']
+        indexes = [
+            models.Index(fields=['opportunity', 'skill']),
+        ]
@@ -0,0 +1,190 @@
+"""Content-based opportunity recommendations.
+
+Active opportunities are tokenized into hashed term-frequency rows (the
+hashing trick keeps the vocabulary a fixed ``RECOMMENDATION_FEATURES``
+wide). Rows are stored sparsely as parallel NumPy arrays of (row, feature,
+weight) entries, so each process holds about 12 bytes per distinct term of
+an opportunity (a few KB for a long listing) whatever the feature width.
+A student's profile is tokenized the same way and scored against every row
+with TF-IDF cosine similarity in a few vectorized passes over the entries,
+with the IDF weights and row norms folded into the query vector.
+
+The index is refreshed lazily: when the ``opportunities`` cache generation
+moves, one query lists active ids with their ``updated_at`` and only new or
+changed opportunities are re-read and re-tokenized. Each refresh builds a
+new immutable ``IndexSnapshot`` and publishes it with a single assignment,
+so readers always score against one consistent version.
+"""
+import math
+import re
+import threading
+import zlib
+from dataclasses import dataclass, field
+
+import numpy as np
+from django.conf import settings
+
+from core.cache import get_generations
+from .models import Opportunity
+
+TOKEN = re.compile(r'[a-z0-9]+')
+# "3rd year", "year 3" and year_of_study=3 all become the token "year3"
+YEAR = re.compile(r'\b(?:([1-9])(?:st|nd|rd|th)?\s+year|year\s+([1-9]))\b')
+
+STOP_WORDS = frozenset('''
+    a an and are as at be by for from has have in is it its of on or our that the
+    this to we will with you your about role must should can all any who other
+'''.split())
+
+# Location terms are hashed with a prefix so they only match other locations
+LOCATION_PREFIX = 'loc:'
+
+
+def tokenize(text):
+    text = YEAR.sub(lambda match: f'year{match.group(1) or match.group(2)}', text.lower())
+    return [token for token in TOKEN.findall(text) if len(token) > 1 and token not in STOP_WORDS]
+
+
+def location_tokens(location):
+    return [LOCATION_PREFIX + token for token in tokenize(location or '')]
+
+
+def opportunity_tokens(title, description, requirements, location, opportunity_type):
+    if isinstance(requirements, (list, tuple)):
+        requirements = ' '.join(str(requirement) for requirement in requirements)
+    text = ' '.join([title, description, str(requirements or ''), location, opportunity_type])
+    return tokenize(text) + location_tokens(location)
+
+
+def student_tokens(user):
+    text = ' '.join(filter(None, [user.course, user.description, user.location]))
+    if user.year_of_study:
+        text += f' year {user.year_of_study}'
+    return tokenize(text) + location_tokens(user.location)
+
+
+def term_frequencies(tokens, num_features):
+    """Sublinear (1 + log tf) weights of the hashed features, as sorted
+    ``(features, weights)`` arrays."""
+    counts = {}
+    for token in tokens:
+        feature = zlib.crc32(token.encode()) % num_features
+        counts[feature] = counts.get(feature, 0) + 1
+    features = np.array(sorted(counts), dtype=np.int32)
+    weights = np.array([1 + math.log(counts[feature]) for feature in features], dtype=np.float32)
+    return features, weights
+
+
+def _empty(dtype):
+    return np.zeros(0, dtype=dtype)
+
+
+@dataclass(frozen=True)
+class IndexSnapshot:
+    """One consistent version of the index. Replaced as a whole, never mutated."""
+    generation: object = None
+    ids: tuple = ()
+    updated_at: dict = field(default_factory=dict)
+    # Opportunity id -> its (features, weights), reused by the next refresh
+    rows: dict = field(default_factory=dict)
+    entry_rows: np.ndarray = field(default_factory=lambda: _empty(np.int32))
+    entry_features: np.ndarray = field(default_factory=lambda: _empty(np.int32))
+    entry_weights: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+    idf: np.ndarray = None
+    row_norms: np.ndarray = field(default_factory=lambda: _empty(np.float32))
+
+
+class RecommendationIndex:
+    def __init__(self, num_features):
+        self.num_features = num_features
+        self.snapshot = IndexSnapshot(idf=np.ones(num_features, dtype=np.float32))
+        self._lock = threading.Lock()
+
+    def refresh(self):
+        generation = get_generations('opportunities')[0]
+        if generation == self.snapshot.generation:
+            return
+        with self._lock:
+            if generation == self.snapshot.generation:
+                return
+            self.snapshot = self._build(self.snapshot, generation)
+
+    def _build(self, previous, generation):
+        current = dict(Opportunity.objects.filter(status='active').values_list('id', 'updated_at'))
+        rows = {pk: row for pk, row in previous.rows.items() if pk in current}
+        stale = [pk for pk in current if previous.updated_at.get(pk) != current[pk]]
+        for pk, *fields in Opportunity.objects.filter(pk__in=stale).values_list(
+            'id', 'title', 'description', 'requirements', 'location', 'type'
+        ):
+            rows[pk] = term_frequencies(opportunity_tokens(*fields), self.num_features)
+
+        ids = tuple(rows)
+        if ids:
+            entry_rows = np.repeat(
+                np.arange(len(ids), dtype=np.int32),
+                [len(features) for features, _ in rows.values()],
+            )
+            entry_features = np.concatenate([features for features, _ in rows.values()])
+            entry_weights = np.concatenate([weights for _, weights in rows.values()])
+        else:
+            entry_rows, entry_features = _empty(np.int32), _empty(np.int32)
+            entry_weights = _empty(np.float32)
+
+        # Smoothed IDF over the active set, and each row's TF-IDF norm
+        document_frequency = np.bincount(entry_features, minlength=self.num_features)
+        idf = (np.log((1 + len(ids)) / (1 + document_frequency)) + 1).astype(np.float32)
+        row_norms = np.sqrt(np.bincount(
+            entry_rows, weights=(entry_weights * idf[entry_features]) ** 2, minlength=len(ids)
+        )).astype(np.float32)
+        row_norms[row_norms == 0] = 1
+
+        return IndexSnapshot(
+            generation=generation, ids=ids, updated_at=current, rows=rows,
+            entry_rows=entry_rows, entry_features=entry_features, entry_weights=entry_weights,
+            idf=idf, row_norms=row_norms,
+        )
+
+    def scores(self, tokens):
+        """Cosine similarity of the tokens against every indexed opportunity."""
+        snapshot = self.snapshot
+        features, weights = term_frequencies(tokens, self.num_features)
+        query = np.zeros(self.num_features, dtype=np.float32)
+        query[features] = weights * snapshot.idf[features]
+        query_norm = np.linalg.norm(query)
+        ids = list(snapshot.ids)
+        if not ids or query_norm == 0:
+            return ids, np.zeros(len(ids), dtype=np.float32)
+        query *= snapshot.idf
+        dot = np.bincount(
+            snapshot.entry_rows,
+            weights=snapshot.entry_weights * query[snapshot.entry_features],
+            minlength=len(ids),
+        )
+        return ids, dot / (snapshot.row_norms * query_norm)
+
+
+_index = None
+_index_lock = threading.Lock()
+
+
+def get_index():
+    global _index
+    if _index is None:
+        with _index_lock:
+            if _index is None:
+                _index = RecommendationIndex(settings.RECOMMENDATION_FEATURES)
+    _index.refresh()
+    return _index
+
+
+def recommend(user, limit, exclude=()):
+    """Return ``(opportunity_id, score)`` pairs, best match first."""
+    ids, scores = get_index().scores(student_tokens(user))
+    order = np.argsort(-scores, kind='stable')
+    recommendations = []
+    for index in order:
+        if scores[index] <= 0 or len(recommendations) == limit:
+            break
+        if ids[index] not in exclude:
+            recommendations.append((ids[index], float(scores[index])))
+    return recommendations
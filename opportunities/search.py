@@ -0,0 +1,148 @@
+"""Ranked full-text search over opportunities.
+
+On SQLite the text lives in an FTS5 external-content table keyed by the
+opportunity table's rowid. Triggers keep it in sync on insert, delete and
+updates of the indexed columns, so counter updates never touch it. On
+PostgreSQL, matching runs against a GIN expression index over the weighted
+``tsvector`` of ``search_document()``; migration 0003 creates that index
+over the SQL this expression compiles to. Both rank with BM25/``ts_rank``,
+with title matches counting most. Other backends fall back to unranked
+``icontains`` matching.
+
+SQLite may renumber rowids when a migration rebuilds the opportunity table
+(which also drops its triggers). ``ensure_search_index`` runs after every
+``migrate`` and reinstalls and rebuilds the index when that happens.
+``manage.py rebuild_search_index`` does the same by hand, e.g. after VACUUM.
+"""
+import re
+
+from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from django.db import connection, connections
+from django.db.models import FloatField, Q, TextField, Value
+from django.db.models.functions import Cast
+
+OPPORTUNITY_TABLE = 'opportunities_opportunity'
+FTS_TABLE = 'opportunities_opportunity_fts'
+SEARCH_COLUMNS = ('title', 'organization', 'requirements', 'description')
+
+# Column weights for BM25, in SEARCH_COLUMNS order
+BM25_WEIGHTS = (10.0, 5.0, 3.0, 1.0)
+# PostgreSQL setweight() labels, in SEARCH_COLUMNS order
+TSVECTOR_WEIGHTS = ('A', 'B', 'B', 'C')
+
+TERM = re.compile(r'\w+')
+
+SQLITE_TRIGGERS = {
+    f'{FTS_TABLE}_insert': f'''
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_insert AFTER INSERT ON {OPPORTUNITY_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)})
+            VALUES (new.rowid, {', '.join(f'new.{column}' for column in SEARCH_COLUMNS)});
+        END''',
+    f'{FTS_TABLE}_delete': f'''
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_delete AFTER DELETE ON {OPPORTUNITY_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)})
+            VALUES ('delete', old.rowid, {', '.join(f'old.{column}' for column in SEARCH_COLUMNS)});
+        END''',
+    f'{FTS_TABLE}_update': f'''
+        CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_update
+        AFTER UPDATE OF {', '.join(SEARCH_COLUMNS)} ON {OPPORTUNITY_TABLE} BEGIN
+            INSERT INTO {FTS_TABLE} ({FTS_TABLE}, rowid, {', '.join(SEARCH_COLUMNS)})
+            VALUES ('delete', old.rowid, {', '.join(f'old.{column}' for column in SEARCH_COLUMNS)});
+            INSERT INTO {FTS_TABLE} (rowid, {', '.join(SEARCH_COLUMNS)})
+            VALUES (new.rowid, {', '.join(f'new.{column}' for column in SEARCH_COLUMNS)});
+        END''',
+}
+
+def search_index_statements(vendor):
+    """SQL (re)creating the SQLite index; PostgreSQL needs no upkeep."""
+    if vendor != 'sqlite':
+        return []
+    return [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5('
+        f"{', '.join(SEARCH_COLUMNS)}, content='{OPPORTUNITY_TABLE}', content_rowid='rowid', "
+        f"tokenize='porter unicode61')",
+        *SQLITE_TRIGGERS.values(),
+        f"INSERT INTO {FTS_TABLE} ({FTS_TABLE}) VALUES ('rebuild')",
+    ]
+
+
+def search_document():
+    """The weighted ``tsvector`` the PostgreSQL GIN index is built over.
+
+    Every column is cast to text, as in the index expression, so the planner
+    recognizes the two as the same expression.
+    """
+    document = None
+    for column, weight in zip(SEARCH_COLUMNS, TSVECTOR_WEIGHTS):
+        vector = SearchVector(Cast(column, TextField()), config='english', weight=weight)
+        document = vector if document is None else document + vector
+    return document
+
+
+def ensure_search_index(using='default', rebuild=False):
+    """Reinstall and rebuild the SQLite index if its triggers are gone (or ``rebuild``).
+
+    Returns True when the index was rebuilt.
+    """
+    conn = connections[using]
+    if conn.vendor != 'sqlite':
+        return False
+    with conn.cursor() as cursor:
+        cursor.execute(
+            "SELECT name FROM sqlite_master WHERE name = %s OR (type = 'trigger' AND tbl_name = %s)",
+            [FTS_TABLE, OPPORTUNITY_TABLE]
+        )
+        installed = {name for name, in cursor.fetchall()}
+    if FTS_TABLE not in installed:
+        # Not migrated yet (or migrated back); the migration owns creation
+        return False
+    if not rebuild and installed >= set(SQLITE_TRIGGERS):
+        return False
+    with conn.cursor() as cursor:
+        for statement in search_index_statements(conn.vendor):
+            cursor.execute(statement)
+    return True
+
+
+def _fts_query(terms):
+    # Quote every term so user input can never be read as FTS5 syntax; the
+    # last term is a prefix so results follow the user as they type
+    quoted = [f'"{term}"' for term in terms]
+    quoted[-1] += '*'
+    return ' '.join(quoted)
+
+
+def search_opportunities(queryset, query):
+    """Filter ``queryset`` to opportunities matching ``query``, best match first.
+
+    Every result is annotated with ``search_rank``; higher is better.
+    """
+    terms = TERM.findall(query)
+    if not terms:
+        return queryset.none()
+
+    if connection.vendor == 'sqlite':
+        # The ORM cannot join a virtual table, and bm25() only works in the
+        # query that runs the MATCH, so this one join is raw SQL
+        weights = ', '.join(str(weight) for weight in BM25_WEIGHTS)
+        return queryset.extra(
+            select={'search_rank': f'-bm25({FTS_TABLE}, {weights})'},
+            tables=[FTS_TABLE],
+            where=[f'{FTS_TABLE}.rowid = {OPPORTUNITY_TABLE}.rowid', f'{FTS_TABLE} MATCH %s'],
+            params=[_fts_query(terms)],
+            order_by=['-search_rank'],
+        )
+
+    if connection.vendor == 'postgresql':
+        search_query = SearchQuery(query, config='english', search_type='websearch')
+        return queryset.alias(search_document=search_document()).filter(
+            search_document=search_query
+        ).annotate(
+            search_rank=SearchRank(search_document(), search_query)
+        ).order_by('-search_rank')
+
+    condition = Q()
+    for term in terms:
+        condition &= Q(title__icontains=term) | Q(organization__icontains=term) | \
+            Q(description__icontains=term) | Q(requirements__icontains=term)
+    return queryset.filter(condition).annotate(search_rank=Value(0.0, output_field=FloatField()))
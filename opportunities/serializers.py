@@ -1,30 +1,56 @@
 from rest_framework import serializers
+from core.instrumentation import TimedSerializerMixin
 from .models import Opportunity
+from .skills import normalize_requirements
 
-class OpportunityListSerializer(serializers.ModelSerializer):
+class OpportunityListSerializer(TimedSerializerMixin, serializers.ModelSerializer):
     class Meta:
         model = Opportunity
         fields = ['id', 'title', 'organization', 'type', 'location', 
                  'status', 'application_deadline', 'applications_count']
 
-class OpportunitySerializer(serializers.ModelSerializer):
+class OpportunitySerializer(TimedSerializerMixin, serializers.ModelSerializer):
     is_saved = serializers.SerializerMethodField()
     has_applied = serializers.SerializerMethodField()
+    skills = serializers.SerializerMethodField()
     
     class Meta:
         model = Opportunity
-        fields = '__all__'
+        # saved_by would list other users' ids; is_saved answers for the viewer
+        exclude = ['saved_by']
         read_only_fields = ['id', 'created_at', 'updated_at', 'created_by',
-                           'views_count', 'applications_count', 'is_saved', 'has_applied']
+                           'views_count', 'applications_count', 'is_saved', 'has_applied', 'skills']
+
+    def get_skills(self, obj):
+        # Slugs as accepted by the skills= filter, derived without a query per opportunity
+        return list(normalize_requirements(obj.requirements))
 
     def get_is_saved(self, obj):
+        saved_ids = self.context.get('saved_opportunity_ids')
+        if saved_ids is not None:
+            return obj.id in saved_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.saved_by.filter(id=request.user.id).exists()
         return False
 
     def get_has_applied(self, obj):
+        applied_ids = self.context.get('applied_opportunity_ids')
+        if applied_ids is not None:
+            return obj.id in applied_ids
         request = self.context.get('request')
         if request and request.user.is_authenticated:
             return obj.applications.filter(user=request.user).exists()
-        return False 
\ No newline at end of file
+        return False
+
+class RecommendedOpportunitySerializer(OpportunityListSerializer):
+    score = serializers.FloatField(read_only=True)
+
+    class Meta(OpportunityListSerializer.Meta):
+        fields = OpportunityListSerializer.Meta.fields + ['score']
+
+class OpportunitySearchResultSerializer(OpportunityListSerializer):
+    rank = serializers.FloatField(source='search_rank', read_only=True)
+
+    class Meta(OpportunityListSerializer.Meta):
+        fields = OpportunityListSerializer.Meta.fields + ['rank']
@@ -0,0 +1,14 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.cache import bump_generation
+from .models import Opportunity
+from .search import ensure_search_index
+
+@receiver(post_save, sender=Opportunity)
+@receiver(post_delete, sender=Opportunity)
+def invalidate_opportunity_caches(sender, **kwargs):
+    bump_generation('opportunities')
+
+def reinstall_search_index(sender, using, **kwargs):
+    # A migration that rebuilds the opportunity table drops the FTS triggers
+    ensure_search_index(using)
@@ -0,0 +1,64 @@
+"""Normalizes free-form opportunity requirements into skill tags.
+
+Each requirement entry (a list item, or a line of a legacy newline-joined
+string) becomes one ``Skill``, identified by its slug so "Python",
+"python" and "- Python." share a row. ``sync_skills`` rewrites the
+opportunity/skill links for many opportunities in a handful of queries; it
+takes the models as arguments so the backfill migration can pass its
+historical versions.
+"""
+import re
+
+from django.utils.text import slugify
+
+BULLET = re.compile(r'^[\s\-*•·]+|[\s.;,]+$')
+SLUG_MAX_LENGTH = 100
+NAME_MAX_LENGTH = 255
+
+
+def normalize_requirements(requirements):
+    """Return ``{slug: name}`` for the requirement entries, in order."""
+    if isinstance(requirements, str):
+        requirements = requirements.splitlines()
+    elif not isinstance(requirements, (list, tuple)):
+        return {}
+    skills = {}
+    for requirement in requirements:
+        name = BULLET.sub('', str(requirement))
+        slug = skill_slug(name)
+        if slug and slug not in skills:
+            skills[slug] = name[:NAME_MAX_LENGTH]
+    return skills
+
+
+def skill_slug(name):
+    return slugify(name)[:SLUG_MAX_LENGTH]
+
+
+def parse_skill_filter(value):
+    """Slugs from a comma-separated ``skills=`` filter value."""
+    return sorted({slug for slug in (skill_slug(part) for part in value.split(',')) if slug})
+
+
+def sync_skills(opportunities, skill_model, link_model, batch_size=1000):
+    """Replace the skill links of ``opportunities`` with their current requirements."""
+    wanted = {opportunity.pk: normalize_requirements(opportunity.requirements)
+              for opportunity in opportunities}
+    names = {}
+    for skills in wanted.values():
+        for slug, name in skills.items():
+            names.setdefault(slug, name)
+
+    skill_model.objects.bulk_create(
+        [skill_model(slug=slug, name=name) for slug, name in names.items()],
+        ignore_conflicts=True, batch_size=batch_size,
+    )
+    skill_ids = dict(skill_model.objects.filter(slug__in=names).values_list('slug', 'id'))
+
+    link_model.objects.filter(opportunity_id__in=list(wanted)).delete()
+    link_model.objects.bulk_create(
+        [link_model(opportunity_id=opportunity_id, skill_id=skill_ids[slug])
+         for opportunity_id, skills in wanted.items() for slug in skills],
+        batch_size=batch_size,
+    )
+
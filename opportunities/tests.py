@@ -1,3 +1,484 @@
+from datetime import timedelta
+
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
 from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from applications.models import Application
+from core.testing import create_opportunity
+from users.models import User
+from .models import Opportunity, Skill
+from .recommendations import get_index
+
+
+class OpportunityFlagsQueryCountTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@yabatech.edu.ng', username='admin', password=None,
+            name='Admin', role='administrator'
+        )
+        cls.student = User.objects.create_user(
+            email='student@yabatech.edu.ng', username='student', password=None,
+            name='Student', role='student'
+        )
+        cls.opportunities = [
+            create_opportunity(cls.admin, title=f'Opportunity {i}') for i in range(20)
+        ]
+        for opportunity in cls.opportunities[::2]:
+            opportunity.saved_by.add(cls.student)
+        for opportunity in cls.opportunities[::3]:
+            Application.objects.create(
+                user=cls.student, opportunity=opportunity, cover_letter='Hello'
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_list_costs_constant_queries_regardless_of_size(self):
+        # COUNT and the page; list rows carry no per-viewer flags
+        for size in (9, 5, 1):
+            Opportunity.objects.exclude(pk__in=[o.pk for o in self.opportunities[:size]]).delete()
+            cache.clear()
+            with self.assertNumQueries(2):
+                response = self.client.get('/api/opportunities/opportunities/')
+            self.assertEqual(len(response.data['results']), size)
+
+    def test_retrieve_resolves_flags_in_one_query_per_viewer(self):
+        url = f'/api/opportunities/opportunities/{self.opportunities[0].id}/'
+        self.client.get(url)
+        # The shared cached body is reused; one query answers both flags
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['is_saved'])
+        self.assertTrue(response.data['has_applied'])
+
+        self.client.force_authenticate(User.objects.create_user(
+            email='other@yabatech.edu.ng', username='other', password=None, role='student'
+        ))
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertFalse(response.data['is_saved'])
+        self.assertFalse(response.data['has_applied'])
+
+    def test_new_opportunities_skip_flag_lookups(self):
+        self.client.force_authenticate(self.admin)
+        url = f'/api/opportunities/opportunities/{self.opportunities[0].id}/'
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.post(f'{url}duplicate/')
+        self.assertFalse(response.data['is_saved'])
+        self.assertFalse(response.data['has_applied'])
+        self.assertFalse([q for q in ctx.captured_queries if 'saved_by' in q['sql']])
+
+
+class OpportunityStatsTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_user(
+            email='admin@yabatech.edu.ng', username='admin', password=None,
+            name='Admin', role='administrator'
+        )
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_opportunity_and_user_stats_are_single_queries(self):
+        create_opportunity(self.admin, applications_count=3)
+        create_opportunity(self.admin, status='draft', applications_count=1)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/opportunities/opportunities/stats/')
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(response.data, {
+            'total_opportunities': 2,
+            'active_opportunities': 1,
+            'total_applications': 4,
+            'average_applications': 2.0,
+        })
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get('/api/users/stats/')
+        self.assertEqual(len(ctx), 1)
+        self.assertEqual(response.data['total_users'], 1)
+        self.assertEqual(response.data['user_roles'], {'administrator': 1})
+
+    def test_opportunity_stats_invalidated_on_save(self):
+        self.client.get('/api/opportunities/opportunities/stats/')
+        create_opportunity(self.admin)
+        response = self.client.get('/api/opportunities/opportunities/stats/')
+        self.assertEqual(response.data['total_opportunities'], 1)
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@yabatech.edu.ng', username='admin', password=None,
+            name='Admin', role='administrator'
+        )
+        created_at = timezone.now()
+        for index in range(20):
+            opportunity = create_opportunity(cls.admin, title=f'Opportunity {index}')
+            # Every other pair shares a timestamp to exercise the id tiebreaker
+            Opportunity.objects.filter(pk=opportunity.pk).update(
+                created_at=created_at - timedelta(minutes=index // 2)
+            )
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def test_cursor_pages_cover_every_row_once_at_constant_cost(self):
+        url = '/api/opportunities/opportunities/?pagination=cursor'
+        seen, query_counts = [], set()
+        while url:
+            with CaptureQueriesContext(connection) as ctx:
+                response = self.client.get(url)
+            self.assertEqual(response.status_code, 200)
+            self.assertNotIn('count', response.data)
+            query_counts.add(len(ctx))
+            seen.extend(item['id'] for item in response.data['results'])
+            url = response.data['next']
+        self.assertEqual(len(seen), 20)
+        self.assertEqual(len(set(seen)), 20)
+        self.assertEqual(query_counts, {1})
+
+    def test_count_is_opt_in(self):
+        response = self.client.get(
+            '/api/opportunities/opportunities/?pagination=cursor&include_count=true'
+        )
+        self.assertEqual(response.data['count'], 20)
+
+    def test_invalid_cursor_returns_404(self):
+        response = self.client.get('/api/opportunities/opportunities/?cursor=bogus')
+        self.assertEqual(response.status_code, 404)
+
+    def test_page_number_mode_is_default(self):
+        response = self.client.get('/api/opportunities/opportunities/?page=2')
+        self.assertEqual(response.data['count'], 20)
+        self.assertEqual(len(response.data['results']), 9)
+
+
+class RecommendationTests(TestCase):
+    URL = '/api/opportunities/opportunities/recommended/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@yabatech.edu.ng', username='admin', password=None,
+            name='Admin', role='administrator'
+        )
+        cls.student = User.objects.create_user(
+            email='student@yabatech.edu.ng', username='student', password=None,
+            name='Student', role='student', course='Computer Science', year_of_study=3,
+            description='I enjoy Python, Django and machine learning', location='Yaba, Lagos'
+        )
+        cls.backend = create_opportunity(
+            cls.admin, title='Backend Engineering Intern',
+            description='Build Django APIs for 3rd year computer science students',
+            requirements=['Python', 'Django', 'Computer Science'],
+        )
+        cls.data = create_opportunity(
+            cls.admin, title='Data Science Intern', description='Machine learning research',
+            requirements=['Python', 'Statistics'], location='Abuja',
+        )
+        cls.accounting = create_opportunity(
+            cls.admin, title='Audit Trainee', description='Bookkeeping and tax returns',
+            requirements=['Accounting', 'ICAN'], location='Port Harcourt',
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_ranks_matching_opportunities_first(self):
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 200)
+        ids = [item['id'] for item in response.data]
+        self.assertEqual(ids[:2], [str(self.backend.id), str(self.data.id)])
+        self.assertNotIn(str(self.accounting.id), ids)
+        self.assertGreater(response.data[0]['score'], response.data[1]['score'])
+
+    def test_excludes_applied_opportunities_and_respects_limit(self):
+        Application.objects.create(user=self.student, opportunity=self.backend, cover_letter='Hi')
+        response = self.client.get(self.URL, {'limit': 1})
+        self.assertEqual([item['id'] for item in response.data], [str(self.data.id)])
+
+    def test_index_refreshes_only_changed_opportunities(self):
+        self.client.get(self.URL)
+        backend_features, _ = get_index().snapshot.rows[self.backend.id]
+
+        self.accounting.description = 'Python and Django tooling for finance teams'
+        self.accounting.save()
+        self.data.status = 'closed'
+        self.data.save()
+        with CaptureQueriesContext(connection) as queries:
+            snapshot = get_index().snapshot
+        # One query for ids and timestamps, one to re-read the changed row
+        self.assertEqual(len(queries), 2)
+        self.assertNotIn(self.data.id, snapshot.ids)
+        self.assertIs(snapshot.rows[self.backend.id][0], backend_features)
+        self.assertEqual(len(snapshot.entry_rows), len(snapshot.entry_weights))
+
+        response = self.client.get(self.URL)
+        self.assertIn(str(self.accounting.id), [item['id'] for item in response.data])
+
+    def test_students_only(self):
+        self.client.force_authenticate(self.admin)
+        response = self.client.get(self.URL)
+        self.assertEqual(response.status_code, 403)
+
+
+class OpportunitySearchTests(TestCase):
+    URL = '/api/opportunities/opportunities/search/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@yabatech.edu.ng', username='admin', password=None,
+            name='Admin', role='administrator'
+        )
+        cls.student = User.objects.create_user(
+            email='student@yabatech.edu.ng', username='student', password=None,
+            name='Student', role='student'
+        )
+        cls.title_match = create_opportunity(cls.admin, title='Python Developer Intern',
+                                             description='Join the platform team')
+        cls.body_match = create_opportunity(cls.admin, title='Graduate Trainee',
+                                            description='Some Python scripting for reports',
+                                            type='job')
+        cls.requirement_match = create_opportunity(cls.admin, title='Data Analyst',
+                                                   requirements=['Python', 'SQL'])
+        cls.draft = create_opportunity(cls.admin, title='Python Mentor', status='draft')
+        create_opportunity(cls.admin, title='Accounting Clerk', organization='KPMG')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def search(self, query, **params):
+        response = self.client.get(self.URL, {'q': query, **params})
+        self.assertEqual(response.status_code, 200)
+        return [item['id'] for item in response.data['results']]
+
+    def test_ranks_title_matches_first_and_hides_drafts(self):
+        ids = self.search('python')
+        self.assertEqual(ids[0], str(self.title_match.id))
+        self.assertEqual(set(ids), {str(self.title_match.id), str(self.body_match.id),
+                                    str(self.requirement_match.id)})
+
+    def test_combines_with_list_filters_and_prefixes(self):
+        self.assertEqual(self.search('pyth', type='job'), [str(self.body_match.id)])
+        self.assertEqual(self.search('kpmg "clerk'), self.search('accounting'))
+        self.assertEqual(self.client.get(self.URL).status_code, 400)
+
+    def test_cursor_mode_keeps_relevance_order(self):
+        self.assertEqual(self.search('python', pagination='cursor'), self.search('python'))
+
+    def test_index_follows_updates_and_deletes(self):
+        self.title_match.title = 'Golang Developer Intern'
+        self.title_match.save()
+        self.assertNotIn(str(self.title_match.id), self.search('python'))
+        self.assertEqual(self.search('golang'), [str(self.title_match.id)])
+
+        self.body_match.delete()
+        self.assertEqual(self.search('scripting'), [])
+        call_command('rebuild_search_index', stdout=StringIO())
+        self.assertEqual(self.search('golang'), [str(self.title_match.id)])
+
+
+class SkillFilterTests(TestCase):
+    URL = '/api/opportunities/opportunities/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@yabatech.edu.ng', username='admin', password=None,
+            name='Admin', role='administrator'
+        )
+        cls.python_sql = create_opportunity(cls.admin, requirements=['Python', 'SQL'])
+        cls.python = create_opportunity(cls.admin, requirements=['- python.', 'Git'])
+        cls.legacy = create_opportunity(cls.admin, requirements='- SQL\n- Excel')
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def filter(self, **params):
+        response = self.client.get(self.URL, params)
+        return {item['id'] for item in response.data['results']}
+
+    def test_requirements_are_normalized_into_shared_skills(self):
+        self.assertEqual(Skill.objects.filter(slug='python').count(), 1)
+        self.assertEqual(set(self.legacy.skills.values_list('slug', flat=True)), {'sql', 'excel'})
+
+    def test_any_and_all_filters(self):
+        self.assertEqual(self.filter(skills='Python'),
+                         {str(self.python_sql.id), str(self.python.id)})
+        self.assertEqual(self.filter(skills='git,excel'), {str(self.python.id), str(self.legacy.id)})
+        self.assertEqual(self.filter(skills_all='python, sql'), {str(self.python_sql.id)})
+        self.assertEqual(self.filter(skills_all='python,cobol'), set())
+
+    def test_skills_follow_requirement_changes(self):
+        self.python.requirements = ['Go']
+        self.python.save()
+        self.assertEqual(self.filter(skills='python'), {str(self.python_sql.id)})
+        self.assertEqual(self.filter(skills='go'), {str(self.python.id)})
+
+        response = self.client.get(f'{self.URL}{self.python.id}/')
+        self.assertEqual(response.data['skills'], ['go'])
+
+    def test_duplicate_keeps_skills(self):
+        response = self.client.post(f'{self.URL}{self.python_sql.id}/duplicate/')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.filter(skills_all='python,sql', status='draft'), {response.data['id']})
+
+
+class OpportunityFacetTests(TestCase):
+    URL = '/api/opportunities/opportunities/facets/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@yabatech.edu.ng', username='admin', password=None,
+            name='Admin', role='administrator'
+        )
+        cls.student = User.objects.create_user(
+            email='student@yabatech.edu.ng', username='student', password=None,
+            name='Student', role='student'
+        )
+        create_opportunity(cls.admin, type='internship', organization='Paystack')
+        create_opportunity(cls.admin, type='internship', organization='Andela',
+                           requirements=['Python'])
+        create_opportunity(cls.admin, type='job', organization='Paystack', location='Ikeja, Lagos')
+        create_opportunity(cls.admin, type='job', organization='Paystack', status='draft')
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_counts_every_facet_in_one_query(self):
+        with self.assertNumQueries(1):
+            response = self.client.get(self.URL)
+        self.assertEqual(response.data['total'], 3)
+        self.assertEqual(response.data['type'], {'internship': 2, 'job': 1})
+        self.assertEqual(response.data['status'], {'active': 3})
+        self.assertEqual(response.data['organization'], {'Paystack': 2, 'Andela': 1})
+
+    def test_facets_ignore_their_own_filter(self):
+        response = self.client.get(self.URL, {'type': 'job', 'organization': 'pay'})
+        self.assertEqual(response.data['total'], 1)
+        self.assertEqual(response.data['type'], {'internship': 1, 'job': 1})
+        self.assertEqual(response.data['organization'], {'Paystack': 1})
+        self.assertEqual(response.data['location'], {'Ikeja, Lagos': 1})
+
+        response = self.client.get(self.URL, {'skills': 'python'})
+        self.assertEqual(response.data['organization'], {'Andela': 1})
+
+    def test_cached_per_filters_and_role_until_opportunities_change(self):
+        self.client.get(self.URL, {'type': 'job'})
+        with self.assertNumQueries(0):
+            self.client.get(self.URL, {'type': ' job'})
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(self.URL).data['status'], {'active': 3, 'draft': 1})
+
+        create_opportunity(self.admin, type='research')
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get(self.URL).data['total'], 4)
+
+    def test_invalid_filters_are_rejected(self):
+        response = self.client.get(self.URL, {'deadline_after': 'soon'})
+        self.assertEqual(response.status_code, 400)
+
+
+class OpportunityResponseCacheTests(TestCase):
+    URL = '/api/opportunities/opportunities/'
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_user(
+            email='admin@yabatech.edu.ng', username='admin', password=None,
+            name='Admin', role='administrator'
+        )
+        cls.student = User.objects.create_user(
+            email='student@yabatech.edu.ng', username='student', password=None,
+            name='Student', role='student'
+        )
+        cls.other = User.objects.create_user(
+            email='other@yabatech.edu.ng', username='other', password=None,
+            name='Other', role='student'
+        )
+        cls.opportunity = create_opportunity(cls.admin)
+        cls.draft = create_opportunity(cls.admin, status='draft')
+        cls.opportunity.saved_by.add(cls.student)
+
+    def setUp(self):
+        cache.clear()
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def test_list_served_from_cache_until_an_opportunity_changes(self):
+        self.client.get(self.URL, {'type': 'internship', 'page': 1})
+        with self.assertNumQueries(0):
+            response = self.client.get(self.URL, {'page': '1', 'type': 'internship'})
+        self.assertEqual(response.data['count'], 1)
+
+        self.client.force_authenticate(self.admin)
+        self.assertEqual(self.client.get(self.URL, {'type': 'internship', 'page': 1}).data['count'], 2)
+
+        self.draft.status = 'active'
+        self.draft.save()
+        self.client.force_authenticate(self.student)
+        self.assertEqual(self.client.get(self.URL, {'type': 'internship', 'page': 1}).data['count'], 2)
+
+    def test_detail_shares_entry_but_layers_per_user_flags(self):
+        url = f'{self.URL}{self.opportunity.pk}/'
+        self.assertTrue(self.client.get(url).data['is_saved'])
+
+        self.client.force_authenticate(self.other)
+        with self.assertNumQueries(1):
+            response = self.client.get(url)
+        self.assertFalse(response.data['is_saved'])
+        self.assertFalse(response.data['has_applied'])
+        self.assertNotIn('saved_by', response.data)
+
+        self.assertEqual(self.client.get(f'{self.URL}{self.draft.pk}/').status_code, 404)
+
+    def test_toggling_save_shows_on_cached_detail(self):
+        url = f'{self.URL}{self.opportunity.pk}/'
+        self.client.force_authenticate(self.other)
+        self.assertFalse(self.client.get(url).data['is_saved'])
+        self.client.post(f'{url}toggle_save/')
+        response = self.client.get(url)
+        self.assertTrue(response.data['is_saved'])
+        self.assertNotIn('saved_by', response.data)
+
+    def test_conditional_requests_answered_from_cache_entry(self):
+        response = self.client.get(self.URL)
+        etag = response['ETag']
+        with self.assertNumQueries(0):
+            response = self.client.get(self.URL, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        url = f'{self.URL}{self.opportunity.pk}/'
+        etag = self.client.get(url)['ETag']
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # Another viewer's flags differ, so the ETag does too
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
 
-# Create your tests here.
+        self.client.force_authenticate(self.student)
+        self.opportunity.title = 'Renamed'
+        self.opportunity.save()
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=etag).status_code, 200)
@@ -1,16 +1,50 @@
+import hashlib
+from urllib.parse import urlencode
+
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
 from rest_framework.permissions import IsAuthenticated
+from core.pagination import KeysetPagination
+from core.response_cache import CachedResponseMixin
 from django_filters import rest_framework as filters
-from .models import Opportunity
-from applications.models import Application
-from .serializers import OpportunitySerializer, OpportunityListSerializer
+from .models import Opportunity, OpportunitySkill
+from .skills import parse_skill_filter
+from applications.models import Application, ApplicationDailyRollup
+from applications.transitions import UPDATED, InvalidStatus, transition_applications
+from .serializers import (
+    OpportunitySerializer,
+    OpportunityListSerializer,
+    RecommendedOpportunitySerializer,
+    OpportunitySearchResultSerializer
+)
+from .recommendations import recommend
+from .search import search_opportunities
 from users.permissions import IsOwnerOrAdmin
 from drf_spectacular.utils import extend_schema, OpenApiParameter
 from drf_spectacular.types import OpenApiTypes
-from django.db.models import Count
-from django.db.models.functions import TruncDate
+from django.db import transaction
+from django.db.models import Count, Exists, OuterRef, Q, Sum
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from datetime import timedelta
+from core.cache import get_or_compute
+from core.counters import write_behind
+from notifications.fanout import start_publish_fanout
+from notifications.models import NotificationFanout
+from notifications.serializers import NotificationFanoutSerializer
+
+# Days of application history analytics covers when no range is given
+ANALYTICS_DEFAULT_DAYS = 30
+
+RECOMMENDATIONS_DEFAULT_LIMIT = 10
+RECOMMENDATIONS_MAX_LIMIT = 50
+
+# Filters the facets action counts values for, each shown with the counts it would yield
+FACET_FIELDS = ('type', 'status', 'organization', 'location')
+
+# Applications one bulk_status_update request may transition
+BULK_STATUS_UPDATE_MAX_IDS = 10000
 
 class OpportunityFilter(filters.FilterSet):
     type = filters.CharFilter(field_name='type')
@@ -18,16 +52,45 @@ class OpportunityFilter(filters.FilterSet):
     organization = filters.CharFilter(field_name='organization', lookup_expr='icontains')
     location = filters.CharFilter(field_name='location', lookup_expr='icontains')
     deadline_after = filters.DateTimeFilter(field_name='application_deadline', lookup_expr='gte')
-    
+    skills = filters.CharFilter(method='filter_skills', help_text='Comma-separated; any may match')
+    skills_all = filters.CharFilter(method='filter_skills_all', help_text='Comma-separated; all must match')
+
     class Meta:
         model = Opportunity
         fields = ['type', 'status', 'organization', 'location']
 
-class OpportunityViewSet(viewsets.ModelViewSet):
+    def filter_skills(self, queryset, name, value):
+        slugs = parse_skill_filter(value)
+        if not slugs:
+            return queryset
+        return queryset.filter(pk__in=OpportunitySkill.objects.filter(
+            skill__slug__in=slugs
+        ).values('opportunity_id'))
+
+    def filter_skills_all(self, queryset, name, value):
+        slugs = parse_skill_filter(value)
+        if not slugs:
+            return queryset
+        # Opportunities linked to every requested skill, grouped over the (skill, opportunity) index
+        matching = (
+            OpportunitySkill.objects.filter(skill__slug__in=slugs)
+            .values('opportunity_id')
+            .annotate(matched=Count('skill_id'))
+            .filter(matched=len(slugs))
+            .values('opportunity_id')
+        )
+        return queryset.filter(pk__in=matching)
+
+class OpportunityViewSet(CachedResponseMixin, viewsets.ModelViewSet):
     queryset = Opportunity.objects.all()
     serializer_class = OpportunitySerializer
     filterset_class = OpportunityFilter
     permission_classes = [IsAuthenticated]
+    pagination_class = KeysetPagination
+    keyset_ordering = ('-created_at', '-id')
+    # A cursor over keyset_ordering would replace the relevance ranking
+    keyset_excluded_actions = ('search',)
+    response_cache_namespaces = ('opportunities',)
 
     def get_queryset(self):
         queryset = Opportunity.objects.all()
@@ -40,8 +103,42 @@ class OpportunityViewSet(viewsets.ModelViewSet):
             return OpportunityListSerializer
         return OpportunitySerializer
 
+    def get_serializer_context(self):
+        context = super().get_serializer_context()
+        if self.action in ('retrieve', 'create', 'duplicate'):
+            # Cached responses are shared and get_response_personalization() sets
+            # the real flags; nobody has saved or applied to a new opportunity yet
+            context.update(saved_opportunity_ids=frozenset(), applied_opportunity_ids=frozenset())
+        return context
+
+    def get_response_cache_scope(self):
+        # get_queryset() only differs between administrators and everyone else
+        return 'all' if self.request.user.role == 'administrator' else 'active'
+
+    def get_response_personalization(self, data):
+        if self.action != 'retrieve':
+            return None
+        user_id = self.request.user.id
+        # One query for both flags of the viewer
+        return Opportunity.objects.filter(pk=data['id']).values(
+            is_saved=Exists(Opportunity.saved_by.through.objects.filter(
+                opportunity_id=OuterRef('pk'), user_id=user_id
+            )),
+            has_applied=Exists(Application.objects.filter(
+                opportunity_id=OuterRef('pk'), user_id=user_id
+            )),
+        ).first()
+
     def perform_create(self, serializer):
-        serializer.save(created_by=self.request.user)
+        opportunity = serializer.save(created_by=self.request.user)
+        if opportunity.status == 'active':
+            start_publish_fanout(opportunity)
+
+    def perform_update(self, serializer):
+        was_active = serializer.instance.status == 'active'
+        opportunity = serializer.save()
+        if opportunity.status == 'active' and not was_active:
+            start_publish_fanout(opportunity)
 
     @extend_schema(
         tags=['Opportunities'],
@@ -53,11 +150,20 @@ class OpportunityViewSet(viewsets.ModelViewSet):
                 enum=['draft', 'active', 'closed', 'archived']),
             OpenApiParameter('organization', OpenApiTypes.STR),
             OpenApiParameter('location', OpenApiTypes.STR),
+            OpenApiParameter('skills', OpenApiTypes.STR,
+                description='Comma-separated skills; opportunities requiring any of them'),
+            OpenApiParameter('skills_all', OpenApiTypes.STR,
+                description='Comma-separated skills; opportunities requiring all of them'),
         ]
     )
     def list(self, request, *args, **kwargs):
         return super().list(request, *args, **kwargs)
 
+    def retrieve(self, request, *args, **kwargs):
+        response = super().retrieve(request, *args, **kwargs)
+        write_behind.increment(Opportunity, kwargs['pk'], 'views_count')
+        return response
+
     @extend_schema(
         tags=['Opportunities'],
         description='Create new opportunity (admin only)'
@@ -90,6 +196,126 @@ class OpportunityViewSet(viewsets.ModelViewSet):
         serializer = OpportunityListSerializer(saved_opportunities, many=True)
         return Response(serializer.data)
 
+    @extend_schema(
+        tags=['Opportunities'],
+        description='Full-text search over title, organization, requirements and description, '
+                    'best match first. Accepts the same filters as the list.',
+        parameters=[
+            OpenApiParameter('q', OpenApiTypes.STR, required=True),
+            OpenApiParameter('type', OpenApiTypes.STR,
+                enum=['internship', 'job', 'project', 'research']),
+            OpenApiParameter('location', OpenApiTypes.STR),
+        ],
+        responses={200: OpportunitySearchResultSerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'])
+    def search(self, request):
+        query = request.query_params.get('q', '').strip()
+        if not query:
+            return Response({"error": "q is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+        queryset = search_opportunities(self.filter_queryset(self.get_queryset()), query)
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            serializer = OpportunitySearchResultSerializer(page, many=True)
+            return self.get_paginated_response(serializer.data)
+        return Response(OpportunitySearchResultSerializer(queryset, many=True).data)
+
+    @extend_schema(
+        tags=['Opportunities'],
+        description='Active opportunities ranked by how well their requirements, description '
+                    'and location match the student\'s profile (students only). Opportunities '
+                    'already applied to are left out.',
+        parameters=[
+            OpenApiParameter('limit', OpenApiTypes.INT, description='Results to return (max 50)'),
+        ],
+        responses={200: RecommendedOpportunitySerializer(many=True)}
+    )
+    @action(detail=False, methods=['get'])
+    def recommended(self, request):
+        if request.user.role != 'student':
+            return Response(
+                {"error": "Recommendations are only available to students"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+        try:
+            limit = int(request.query_params.get('limit', RECOMMENDATIONS_DEFAULT_LIMIT))
+        except ValueError:
+            return Response({"error": "limit must be an integer"}, status=status.HTTP_400_BAD_REQUEST)
+        limit = max(1, min(limit, RECOMMENDATIONS_MAX_LIMIT))
+
+        applied = Application.objects.filter(user=request.user).values_list('opportunity_id', flat=True)
+        scores = dict(recommend(request.user, limit, exclude=set(applied)))
+        opportunities = Opportunity.objects.filter(pk__in=scores, status='active').in_bulk()
+        ranked = []
+        for pk, score in scores.items():
+            if pk in opportunities:
+                opportunities[pk].score = round(score, 4)
+                ranked.append(opportunities[pk])
+        return Response(RecommendedOpportunitySerializer(ranked, many=True).data)
+
+    @extend_schema(
+        tags=['Opportunities'],
+        description='Publish an opportunity and notify matching students in the '
+                    'background (admin only). Optionally target by course and year.',
+        request={'courses': ['Computer Science'], 'years': [3, 4]},
+        responses={202: NotificationFanoutSerializer, 409: {'error': 'Opportunity is already published'}}
+    )
+    @action(detail=True, methods=['post'])
+    def publish(self, request, pk=None):
+        if request.user.role != 'administrator':
+            return Response(
+                {"error": "Only administrators can publish opportunities"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        opportunity = self.get_object()
+        courses = request.data.get('courses', [])
+        years = request.data.get('years', [])
+        if not isinstance(courses, list) or not isinstance(years, list):
+            return Response(
+                {"error": "courses and years must be lists"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        with transaction.atomic():
+            # A failed fan-out can be retried even though the listing is already active
+            fanout = start_publish_fanout(opportunity, courses=courses, years=years)
+            if fanout is None:
+                return Response(
+                    {"error": "Opportunity is already published"},
+                    status=status.HTTP_409_CONFLICT
+                )
+            if opportunity.status != 'active':
+                opportunity.status = 'active'
+                opportunity.save(update_fields=['status', 'updated_at'])
+        return Response(
+            NotificationFanoutSerializer(fanout).data,
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @extend_schema(
+        tags=['Opportunities'],
+        description='Progress of the most recent publish notification fan-out',
+        responses={200: NotificationFanoutSerializer}
+    )
+    @action(detail=True, methods=['get'])
+    def fanout(self, request, pk=None):
+        if request.user.role != 'administrator':
+            return Response(
+                {"error": "Only administrators can view publish progress"},
+                status=status.HTTP_403_FORBIDDEN
+            )
+
+        opportunity = self.get_object()
+        fanout = NotificationFanout.objects.filter(opportunity=opportunity).first()
+        if fanout is None:
+            return Response(
+                {"error": "This opportunity has not been published yet"},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        return Response(NotificationFanoutSerializer(fanout).data)
+
     @extend_schema(
         tags=['Opportunities'],
         description='Get opportunity statistics (admin only)',
@@ -113,36 +339,76 @@ class OpportunityViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        total = Opportunity.objects.count()
-        active = Opportunity.objects.filter(status='active').count()
-        applications = sum(o.applications_count for o in Opportunity.objects.all())
-        
-        return Response({
+        stats = get_or_compute(
+            ['opportunities', 'applications'], 'stats:opportunities', self._compute_stats
+        )
+        return Response(stats)
+
+    def _compute_stats(self):
+        counts = Opportunity.objects.aggregate(
+            total=Count('id'),
+            active=Count('id', filter=Q(status='active')),
+            applications=Sum('applications_count', default=0)
+        )
+        total, applications = counts['total'], counts['applications']
+        return {
             'total_opportunities': total,
-            'active_opportunities': active,
+            'active_opportunities': counts['active'],
             'total_applications': applications,
             'average_applications': applications/total if total > 0 else 0
-        })
+        }
 
+    @extend_schema(
+        tags=['Opportunities'],
+        description='Move many applications for this opportunity to a new status in one '
+                    'transaction (admin only). Each id gets an outcome: updated, unchanged, '
+                    'not_found or invalid_transition. Updated applicants are notified.',
+        request={'application_ids': ['uuid'], 'status': 'shortlisted'},
+        responses={
+            200: {
+                'description': 'Per-application outcomes',
+                'examples': [{
+                    'updated': 1,
+                    'results': [
+                        {'id': 'uuid', 'outcome': 'updated', 'previous_status': 'pending'},
+                        {'id': 'uuid', 'outcome': 'invalid_transition', 'previous_status': 'rejected'}
+                    ]
+                }]
+            }
+        }
+    )
     @action(detail=True, methods=['post'])
     def bulk_status_update(self, request, pk=None):
         """Update status of multiple applications for an opportunity"""
-        opportunity = self.get_object()
-        application_ids = request.data.get('application_ids', [])
-        new_status = request.data.get('status')
-        
         if not request.user.role == 'administrator':
             return Response(
                 {"error": "Only administrators can perform bulk updates"},
                 status=status.HTTP_403_FORBIDDEN
             )
-            
-        Application.objects.filter(
-            opportunity=opportunity,
-            id__in=application_ids
-        ).update(status=new_status)
-        
-        return Response({'message': 'Applications updated successfully'})
+
+        opportunity = self.get_object()
+        application_ids = request.data.get('application_ids', [])
+        new_status = request.data.get('status')
+        if not isinstance(application_ids, list) or not application_ids:
+            return Response(
+                {"error": "application_ids must be a non-empty list"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+        if len(application_ids) > BULK_STATUS_UPDATE_MAX_IDS:
+            return Response(
+                {"error": f"At most {BULK_STATUS_UPDATE_MAX_IDS} applications can be updated at once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        try:
+            outcomes = transition_applications(application_ids, new_status, opportunity=opportunity)
+        except InvalidStatus as exc:
+            return Response({"error": str(exc)}, status=status.HTTP_400_BAD_REQUEST)
+
+        return Response({
+            'updated': sum(outcome.outcome == UPDATED for outcome in outcomes),
+            'results': [outcome.as_dict() for outcome in outcomes],
+        })
 
     @action(detail=True, methods=['post'])
     def duplicate(self, request, pk=None):
@@ -151,9 +417,20 @@ class OpportunityViewSet(viewsets.ModelViewSet):
         opportunity.pk = None
         opportunity.title = f"Copy of {opportunity.title}"
         opportunity.status = 'draft'
+        opportunity.views_count = 0
+        opportunity.applications_count = 0
         opportunity.save()
-        return Response(OpportunitySerializer(opportunity).data)
+        serializer = OpportunitySerializer(opportunity, context=self.get_serializer_context())
+        return Response(serializer.data)
 
+    @extend_schema(
+        description='Opportunity and application analytics (admin only). Application '
+                    'figures cover start..end inclusive, defaulting to the last 30 days.',
+        parameters=[
+            OpenApiParameter('start', OpenApiTypes.DATE),
+            OpenApiParameter('end', OpenApiTypes.DATE),
+        ]
+    )
     @action(detail=False, methods=['get'])
     def analytics(self, request):
         """Get detailed analytics for opportunities"""
@@ -162,26 +439,127 @@ class OpportunityViewSet(viewsets.ModelViewSet):
                 {"error": "Only administrators can access analytics"},
                 status=status.HTTP_403_FORBIDDEN
             )
-            
-        return Response({
-            'by_type': dict(
-                Opportunity.objects.values_list('type')
-                .annotate(count=Count('id'))
-            ),
-            'by_status': dict(
-                Opportunity.objects.values_list('status')
-                .annotate(count=Count('id'))
-            ),
-            'application_trends': dict(
-                Application.objects.annotate(
-                    date=TruncDate('applied_at')
-                )
-                .values('date')
-                .annotate(count=Count('id'))
-                .order_by('-date')[:30]
+
+        date_range = self._analytics_range(request.query_params)
+        if date_range is None:
+            return Response(
+                {"error": "start and end must be YYYY-MM-DD dates with start <= end"},
+                status=status.HTTP_400_BAD_REQUEST
             )
+        start, end = date_range
+
+        # Reads only the rollup, so cost depends on the range, not on history
+        trends, by_type, by_status = {}, {}, {}
+        rollups = (
+            ApplicationDailyRollup.objects.filter(date__range=(start, end), count__gt=0)
+            .order_by('-date')
+            .values_list('date', 'opportunity_type', 'status', 'count')
+        )
+        for day, opportunity_type, application_status, count in rollups:
+            day = day.isoformat()
+            trends[day] = trends.get(day, 0) + count
+            by_type[opportunity_type] = by_type.get(opportunity_type, 0) + count
+            by_status[application_status] = by_status.get(application_status, 0) + count
+
+        return Response({
+            **get_or_compute(['opportunities'], 'analytics:opportunities',
+                             self._compute_opportunity_breakdown),
+            'application_trends': trends,
+            'applications_by_type': by_type,
+            'applications_by_status': by_status,
+            'start': start,
+            'end': end,
         })
 
+    def _analytics_range(self, params):
+        try:
+            end = parse_date(params['end']) if 'end' in params else timezone.localdate()
+            if end is None:
+                return None
+            start = parse_date(params['start']) if 'start' in params \
+                else end - timedelta(days=ANALYTICS_DEFAULT_DAYS - 1)
+        except ValueError:
+            return None
+        if start is None or start > end:
+            return None
+        return start, end
+
+    def _compute_opportunity_breakdown(self):
+        by_type, by_status = {}, {}
+        grouped = Opportunity.objects.order_by().values_list('type', 'status').annotate(count=Count('id'))
+        for opportunity_type, opportunity_status, count in grouped:
+            by_type[opportunity_type] = by_type.get(opportunity_type, 0) + count
+            by_status[opportunity_status] = by_status.get(opportunity_status, 0) + count
+        return {'by_type': by_type, 'by_status': by_status}
+
+    @extend_schema(
+        tags=['Opportunities'],
+        description='Counts per type, status, organization and location for the current '
+                    'filters. Each facet ignores its own filter, so every option shows how '
+                    'many results selecting it would give.',
+        responses={
+            200: {
+                'description': 'Facet counts',
+                'examples': [{
+                    'total': 12,
+                    'type': {'internship': 8, 'job': 4},
+                    'status': {'active': 12},
+                    'organization': {'Paystack': 5, 'Andela': 7},
+                    'location': {'Yaba, Lagos': 12}
+                }]
+            }
+        }
+    )
+    @action(detail=False, methods=['get'])
+    def facets(self, request):
+        params = {
+            name: request.query_params[name].strip()
+            for name in OpportunityFilter.base_filters
+            if request.query_params.get(name, '').strip()
+        }
+        filterset = OpportunityFilter(params, queryset=self.get_queryset(), request=request)
+        if not filterset.is_valid():
+            return Response(filterset.errors, status=status.HTTP_400_BAD_REQUEST)
+
+        normalized = hashlib.sha1(urlencode(sorted(params.items())).encode()).hexdigest()
+        cache_key = f'facets:{self.get_response_cache_scope()}:{normalized}'
+        return Response(get_or_compute(
+            ['opportunities'], cache_key, lambda: self._compute_facets(params)
+        ))
+
+    def _compute_facets(self, params):
+        params = dict(params)
+        selected = {field: params.pop(field) for field in FACET_FIELDS if field in params}
+        filterset = OpportunityFilter(params, queryset=self.get_queryset(), request=self.request)
+
+        # One grouped pass over the non-facet filters; facet filters are applied below
+        grouped = filterset.qs.order_by().values_list(*FACET_FIELDS).annotate(count=Count('id'))
+        matchers = {
+            field: self._facet_matcher(field, value) for field, value in selected.items()
+        }
+        facets = {field: {} for field in FACET_FIELDS}
+        total = 0
+        for *values, count in grouped:
+            row = dict(zip(FACET_FIELDS, values))
+            failed = [field for field, matches in matchers.items() if not matches(row[field])]
+            if not failed:
+                total += count
+            for field in FACET_FIELDS:
+                if not failed or failed == [field]:
+                    facets[field][row[field]] = facets[field].get(row[field], 0) + count
+
+        return {
+            'total': total,
+            **{field: dict(sorted(counts.items(), key=lambda item: (-item[1], item[0])))
+               for field, counts in facets.items()},
+        }
+
+    def _facet_matcher(self, field, value):
+        if OpportunityFilter.base_filters[field].lookup_expr == 'icontains':
+            value = value.lower()
+            return lambda candidate: value in candidate.lower()
+        return lambda candidate: candidate == value
+
     @action(detail=False, methods=['get'])
     def dashboard_stats(self, request):
         """Get total stats for the dashboard including total counts without pagination"""
@@ -0,0 +1,151 @@
+import copy
+import threading
+import time
+from collections import OrderedDict
+from urllib.parse import parse_qs
+
+from channels.db import database_sync_to_async
+from channels.middleware import BaseMiddleware
+from django.conf import settings
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import User
+
+TOKEN_VERSION_CLAIM = 'ver'
+
+
+def token_version_key(user_id):
+    return f'users:token_version:{user_id}'
+
+
+class UserCache:
+    """Bounded, thread-safe LRU of authenticated users with a per-entry TTL.
+
+    Keys are normalised to strings, so a UUID primary key and the token's
+    user id claim address the same entry.
+    """
+
+    def __init__(self, max_entries, ttl):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, user_id):
+        user_id = str(user_id)
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            user, expires_at = entry
+            if expires_at <= time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return user
+
+    def set(self, user_id, user):
+        user_id = str(user_id)
+        with self._lock:
+            self._entries[user_id] = (user, time.monotonic() + self.ttl)
+            self._entries.move_to_end(user_id)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def evict(self, user_id):
+        with self._lock:
+            self._entries.pop(str(user_id), None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+user_cache = UserCache(
+    max_entries=settings.JWT_USER_CACHE['MAX_ENTRIES'],
+    ttl=settings.JWT_USER_CACHE['TTL'],
+)
+
+
+def get_token_version(user_id):
+    """Current token_version of an active user, or None if there is no such user."""
+    key = token_version_key(user_id)
+    version = cache.get(key)
+    if version is None:
+        version = (User.objects.filter(pk=user_id, is_active=True)
+                   .values_list('token_version', flat=True).first())
+        if version is not None:
+            cache.set(key, version, user_cache.ttl)
+    return version
+
+
+def forget_user(user_id):
+    """Drop cached auth state so the next request reloads the user."""
+    user_cache.evict(user_id)
+    cache.delete(token_version_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """JWTAuthentication that skips the per-request user lookup.
+
+    Tokens carry the user's ``token_version``; the shared cache holds the
+    current version, so a password, role or activation change rejects older
+    tokens everywhere while this process serves users from a short-lived
+    in-memory copy.  Tokens without the claim fall back to a database lookup.
+    """
+
+    def get_user(self, validated_token):
+        token_version = validated_token.get(TOKEN_VERSION_CLAIM)
+        if token_version is None:
+            return super().get_user(validated_token)
+
+        try:
+            user_id = validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_('Token contained no recognizable user identification'))
+
+        current_version = cache.get(token_version_key(user_id))
+        if current_version is not None and current_version != token_version:
+            raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+
+        user = user_cache.get(user_id)
+        if user is None or current_version is None or user.token_version != token_version:
+            user = super().get_user(validated_token)
+            if user.token_version != token_version:
+                raise AuthenticationFailed(_('Token has been revoked'), code='token_revoked')
+            cache.set(token_version_key(user_id), user.token_version, user_cache.ttl)
+            user_cache.set(user_id, user)
+
+        # Hand out a copy so views mutating request.user cannot poison the cache
+        return copy.copy(user)
+
+
+@database_sync_to_async
+def get_user_for_token(raw_token):
+    authentication = CachedJWTAuthentication()
+    try:
+        validated_token = authentication.get_validated_token(raw_token)
+        return authentication.get_user(validated_token)
+    except (InvalidToken, TokenError, AuthenticationFailed):
+        return AnonymousUser()
+
+
+class JWTAuthMiddleware(BaseMiddleware):
+    """Authenticate WebSocket connections with a SimpleJWT access token.
+
+    Browsers cannot set headers on WebSocket handshakes, so the token is read
+    from the ``token`` query string parameter.
+    """
+
+    async def __call__(self, scope, receive, send):
+        scope = dict(scope)
+        query = parse_qs(scope.get('query_string', b'').decode())
+        raw_token = query.get('token', [None])[0]
+        scope['user'] = await get_user_for_token(raw_token) if raw_token else AnonymousUser()
+        return await super().__call__(scope, receive, send)
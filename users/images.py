@@ -0,0 +1,90 @@
+"""Profile picture renditions.
+
+Uploaded originals are kept as-is, and a background task writes square,
+EXIF-stripped WebP renditions at a few fixed sizes next to them. Clients
+render avatars from the renditions instead of downloading the original.
+"""
+import io
+import os
+import uuid
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps
+
+from core.cache import bump_generation
+
+RENDITION_SIZES = {
+    'small': 64,
+    'medium': 256,
+    'large': 512,
+}
+
+# Rendition embedded in listings such as applications
+THUMBNAIL_RENDITION = 'small'
+
+RENDITION_FORMAT = 'WEBP'
+RENDITION_QUALITY = 80
+
+
+def rendition_path(user_id, name):
+    # A fresh suffix per upload so cached copies of an older picture are not reused
+    return f'profile_pictures/renditions/{user_id}/{name}-{uuid.uuid4().hex[:8]}.webp'
+
+
+def render(image, size):
+    rendition = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+    buffer = io.BytesIO()
+    # Saving without exif/icc data strips the original metadata
+    rendition.save(buffer, format=RENDITION_FORMAT, quality=RENDITION_QUALITY, method=4)
+    return ContentFile(buffer.getvalue())
+
+
+def delete_renditions(renditions):
+    for path in renditions.values():
+        if default_storage.exists(path):
+            default_storage.delete(path)
+
+
+def generate_profile_picture_renditions(user_id, source_name):
+    from .models import User
+
+    with default_storage.open(source_name, 'rb') as source:
+        image = Image.open(source)
+        image = ImageOps.exif_transpose(image)
+        image = image.convert('RGBA' if image.mode in ('RGBA', 'LA', 'P') else 'RGB')
+
+        renditions = {}
+        for name, size in RENDITION_SIZES.items():
+            path = default_storage.save(rendition_path(user_id, name), render(image, size))
+            renditions[name] = path
+
+    # Only attach the renditions if the picture was not replaced meanwhile
+    updated = User.objects.filter(pk=user_id, profile_picture=source_name).update(
+        profile_picture_renditions=renditions
+    )
+    if not updated:
+        delete_renditions(renditions)
+        return {}
+    bump_generation('users')
+    delete_stale_renditions(user_id, keep=renditions)
+    return renditions
+
+
+def rendition_urls(user, request=None):
+    urls = {}
+    for name, path in (user.profile_picture_renditions or {}).items():
+        url = default_storage.url(path)
+        urls[name] = request.build_absolute_uri(url) if request else url
+    return urls
+
+
+def delete_stale_renditions(user_id, keep):
+    """Remove renditions of the user's earlier uploads."""
+    directory = f'profile_pictures/renditions/{user_id}'
+    if not default_storage.exists(directory):
+        return
+    keep = {os.path.basename(path) for path in keep.values()}
+    for filename in default_storage.listdir(directory)[1]:
+        if filename not in keep:
+            default_storage.delete(f'{directory}/{filename}')
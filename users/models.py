@@ -1,6 +1,8 @@
 from django.contrib.auth.models import AbstractUser
 from django.db import models
 import uuid
+from core.tasks import run_in_background
+from .images import generate_profile_picture_renditions
 
 def user_profile_picture_path(instance, filename):
     # Get the file extension
@@ -46,6 +48,10 @@ class User(AbstractUser):
     join_date = models.DateTimeField(auto_now_add=True)
     location = models.CharField(max_length=255, blank=True)
     completion_rate = models.IntegerField(default=0)
+    # Rendition name -> storage path, filled in by users.images in the background
+    profile_picture_renditions = models.JSONField(default=dict, blank=True)
+    # Embedded in JWTs; bumped whenever previously issued tokens must stop working
+    token_version = models.PositiveIntegerField(default=0)
 
     USERNAME_FIELD = 'email'
     REQUIRED_FIELDS = ['username', 'name']
@@ -58,10 +64,64 @@ class User(AbstractUser):
             models.Index(fields=['-join_date'])
         ]
 
+    # Changing any of these invalidates tokens issued beforehand
+    TOKEN_INVALIDATING_FIELDS = ('password', 'role', 'is_active')
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        loaded = dict(zip(field_names, values))
+        instance._loaded_profile_picture = loaded.get('profile_picture')
+        instance._loaded_auth_state = tuple(
+            loaded.get(field) for field in cls.TOKEN_INVALIDATING_FIELDS
+        )
+        return instance
+
+    def get_auth_state(self):
+        return tuple(self.__dict__.get(field) for field in self.TOKEN_INVALIDATING_FIELDS)
+
+    def save(self, *args, **kwargs):
+        loaded_auth_state = getattr(self, '_loaded_auth_state', None)
+        if loaded_auth_state is not None and loaded_auth_state != self.get_auth_state():
+            self.token_version += 1
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None:
+                kwargs['update_fields'] = {*update_fields, 'token_version'}
+
+        picture_changed = (
+            'profile_picture' in self.__dict__
+            and self.profile_picture.name != getattr(self, '_loaded_profile_picture', None)
+            and (self.profile_picture or not self._state.adding)
+        )
+        if picture_changed:
+            self.profile_picture_renditions = {}
+            update_fields = kwargs.get('update_fields')
+            if update_fields is not None and 'profile_picture' in update_fields:
+                kwargs['update_fields'] = {*update_fields, 'profile_picture_renditions'}
+        super().save(*args, **kwargs)
+        self._loaded_auth_state = self.get_auth_state()
+
+        if picture_changed:
+            self._loaded_profile_picture = self.profile_picture.name
+            if self.profile_picture:
+                run_in_background(
+                    generate_profile_picture_renditions, self.pk, self.profile_picture.name
+                )
+
     def calculate_completion_rate(self):
         fields = ['name', 'email', 'phone_number', 'location', 'course', 
                  'year_of_study', 'description', 'profile_picture']
         completed = sum(1 for field in fields if getattr(self, field))
         self.completion_rate = int((completed / len(fields)) * 100)
         self.save(update_fields=['completion_rate'])
-        return self.completion_rate 
\ No newline at end of file
+        return self.completion_rate
+
+
+class RevokedToken(models.Model):
+    """Refresh token JTIs that may no longer be used; rows are purged once expired."""
+    jti = models.CharField(max_length=255, unique=True)
+    expires_at = models.DateTimeField(db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True)
+
+    def __str__(self):
+        return self.jti
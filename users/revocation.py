@@ -0,0 +1,101 @@
+import hashlib
+import math
+import threading
+import time
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .models import RevokedToken
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing."""
+
+    def __init__(self, capacity, error_rate):
+        self.num_bits = max(8, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / capacity * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+
+    def _positions(self, value):
+        digest = hashlib.blake2b(value.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'big'), int.from_bytes(digest[8:], 'big')
+        return [(first + i * second) % self.num_bits for i in range(self.num_hashes)]
+
+    def add(self, value):
+        for position in self._positions(value):
+            self.bits[position // 8] |= 1 << (position % 8)
+
+    def __contains__(self, value):
+        return all(self.bits[position // 8] & (1 << (position % 8))
+                   for position in self._positions(value))
+
+
+class RevocationStore:
+    """Revoked refresh-token JTIs: an in-process Bloom filter over RevokedToken.
+
+    With rotation and BLACKLIST_AFTER_ROTATION, a refresh costs one INSERT
+    into RevokedToken and no lookup: revoke() inserts into the unique index
+    and a duplicate means the token was already used.  The stock
+    token_blacklist app instead looks the token up in the blacklist, runs
+    get_or_create on OutstandingToken and BlacklistedToken, and inserts an
+    OutstandingToken for the new refresh token.
+
+    The filter serves is_revoked() when tokens are not revoked on rotation.
+    A JTI missing from the filter was not revoked by this process or before
+    the filter was last rebuilt, so lookups only reach the database on a
+    filter hit.  Revocations from other processes show up after the next
+    rebuild.
+    """
+
+    def __init__(self):
+        self._filter = None
+        self._built_at = 0
+        self._lock = threading.Lock()
+
+    def _is_stale(self):
+        return (self._filter is None or
+                time.monotonic() - self._built_at > settings.TOKEN_REVOCATION['REBUILD_INTERVAL'])
+
+    def _get_filter(self):
+        if self._is_stale():
+            with self._lock:
+                if not self._is_stale():
+                    return self._filter
+                config = settings.TOKEN_REVOCATION
+                bloom = BloomFilter(config['BLOOM_CAPACITY'], config['BLOOM_ERROR_RATE'])
+                jtis = (RevokedToken.objects.filter(expires_at__gt=timezone.now())
+                        .values_list('jti', flat=True))
+                for jti in jtis.iterator(chunk_size=5000):
+                    bloom.add(jti)
+                self._filter, self._built_at = bloom, time.monotonic()
+        return self._filter
+
+    def is_revoked(self, jti):
+        if jti not in self._get_filter():
+            return False
+        return RevokedToken.objects.filter(jti=jti).exists()
+
+    def revoke(self, jti, exp):
+        """Record the JTI as revoked; returns False if it already was."""
+        expires_at = datetime.fromtimestamp(exp, tz=dt_timezone.utc)
+        try:
+            with transaction.atomic():
+                RevokedToken.objects.create(jti=jti, expires_at=expires_at)
+        except IntegrityError:
+            return False
+        finally:
+            # Keep a filter that is already built current, but never build one here
+            bloom = self._filter
+            if bloom is not None:
+                bloom.add(jti)
+        return True
+
+    def reset(self):
+        with self._lock:
+            self._filter = None
+
+
+revoked_tokens = RevocationStore()
@@ -1,24 +1,92 @@
 from rest_framework import serializers
+from core.counters import write_behind
+from core.instrumentation import TimedSerializerMixin
 from django.contrib.auth import get_user_model
+from django.utils import timezone
 from django.contrib.auth.password_validation import validate_password
-from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer, TokenRefreshSerializer
+from rest_framework_simplejwt.settings import api_settings
+from .authentication import TOKEN_VERSION_CLAIM, get_token_version
+from .images import THUMBNAIL_RENDITION, rendition_urls
+from .revocation import revoked_tokens
 
 User = get_user_model()
 
 class CustomTokenObtainPairSerializer(TokenObtainPairSerializer):
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        token['role'] = user.role
+        token[TOKEN_VERSION_CLAIM] = user.token_version
+        return token
+
     def validate(self, attrs):
         data = super().validate(attrs)
+        write_behind.set_latest(User, self.user.pk, 'last_login', timezone.now())
         data['user'] = UserSerializer(self.user).data
         return data
 
-class UserSerializer(serializers.ModelSerializer):
+class RevokingTokenRefreshSerializer(TokenRefreshSerializer):
+    """Refresh that rejects revoked tokens and revokes the old one on rotation."""
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        jti = refresh[api_settings.JTI_CLAIM]
+
+        token_version = refresh.get(TOKEN_VERSION_CLAIM)
+        if token_version is not None:
+            if get_token_version(refresh[api_settings.USER_ID_CLAIM]) != token_version:
+                raise InvalidToken(_('Token has been revoked'))
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            # The unique insert both revokes the token and rejects reuse,
+            # across processes, so no lookup is needed first
+            if not revoked_tokens.revoke(jti, refresh['exp']):
+                raise InvalidToken(_('Token is blacklisted'))
+        elif revoked_tokens.is_revoked(jti):
+            raise InvalidToken(_('Token is blacklisted'))
+
+        data = {'access': str(refresh.access_token)}
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            data['refresh'] = str(refresh)
+        return data
+
+class UserSerializer(TimedSerializerMixin, serializers.ModelSerializer):
+    profile_picture_renditions = serializers.SerializerMethodField()
+
     class Meta:
         model = User
         fields = ['id', 'email', 'name', 'role', 'matriculation_number', 
                  'course', 'year_of_study', 'description', 'organization_details',
-                 'phone_number', 'profile_picture', 'join_date', 'location',
-                 'completion_rate']
-        read_only_fields = ['id', 'join_date', 'completion_rate']
+                 'phone_number', 'profile_picture', 'profile_picture_renditions',
+                 'join_date', 'location', 'completion_rate']
+        read_only_fields = ['id', 'join_date', 'completion_rate', 'profile_picture_renditions']
+
+    def get_profile_picture_renditions(self, obj):
+        return rendition_urls(obj, self.context.get('request'))
+
+class UserThumbnailSerializer(UserSerializer):
+    """Embeds a user in listings, pointing profile_picture at the thumbnail."""
+    profile_picture = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = [field for field in UserSerializer.Meta.fields
+                  if field != 'profile_picture_renditions']
+
+    def get_profile_picture(self, obj):
+        thumbnail = rendition_urls(obj, self.context.get('request')).get(THUMBNAIL_RENDITION)
+        if thumbnail:
+            return thumbnail
+        if not obj.profile_picture:
+            return None
+        request = self.context.get('request')
+        url = obj.profile_picture.url
+        return request.build_absolute_uri(url) if request else url
 
 class MultiStepRegistrationSerializer(serializers.ModelSerializer):
     password = serializers.CharField(write_only=True, required=True, validators=[validate_password])
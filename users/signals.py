@@ -0,0 +1,13 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from core.cache import bump_generation
+from .authentication import forget_user
+from .models import User
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_caches(sender, instance, **kwargs):
+    bump_generation('users')
+    user_id = instance.pk
+    transaction.on_commit(lambda: forget_user(user_id))
@@ -1,3 +1,250 @@
-from django.test import TestCase
+import io
+import shutil
+import tempfile
 
-# Create your tests here.
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.core.management import call_command
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.db import connection
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+from PIL import Image
+from rest_framework.test import APIClient
+
+from applications.serializers import ApplicationSerializer
+from applications.models import Application
+from core.cache import get_generations
+from core.testing import create_opportunity, create_user
+from .authentication import user_cache
+from .images import RENDITION_SIZES, generate_profile_picture_renditions
+from .models import RevokedToken
+from .revocation import revoked_tokens
+from .serializers import CustomTokenObtainPairSerializer
+
+
+def image_bytes(format='PNG', size=(32, 32), **save_kwargs):
+    buffer = io.BytesIO()
+    Image.new('RGB', size, color=(200, 30, 30)).save(buffer, format=format, **save_kwargs)
+    return buffer.getvalue()
+
+
+class ProfilePictureTestMixin:
+    def setUp(self):
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        override = override_settings(MEDIA_ROOT=self.media_root)
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.student = create_user('student@yabatech.edu.ng')
+        self.client = APIClient()
+        self.client.force_authenticate(self.student)
+
+    def upload(self, content, url='/api/users/update_profile_picture/', method='post'):
+        picture = SimpleUploadedFile('avatar.png', content, content_type='image/png')
+        return getattr(self.client, method)(url, {'profile_picture': picture}, format='multipart')
+
+
+class ProfilePictureUploadTests(ProfilePictureTestMixin, TestCase):
+    def test_accepts_real_image(self):
+        response = self.upload(image_bytes())
+        self.assertEqual(response.status_code, 200)
+        self.student.refresh_from_db()
+        self.assertTrue(self.student.profile_picture)
+
+    def test_rejects_non_image_despite_content_type(self):
+        for url, method in [('/api/users/update_profile_picture/', 'post'), ('/api/users/me/', 'patch')]:
+            response = self.upload(b'#!/bin/sh\necho not an image\n', url=url, method=method)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.data['error'], 'Invalid file type. Only images are allowed.')
+        self.student.refresh_from_db()
+        self.assertFalse(self.student.profile_picture)
+
+
+@override_settings(BACKGROUND_TASKS_ASYNC=False)
+class ProfilePictureRenditionTests(ProfilePictureTestMixin, TestCase):
+    def upload_photo(self):
+        exif = Image.Exif()
+        exif[0x010F] = 'PhoneMaker'  # Make
+        exif[0x0112] = 6  # Orientation: rotated 90 degrees
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.upload(image_bytes('JPEG', size=(1200, 800), exif=exif))
+        self.assertEqual(response.status_code, 200)
+        self.student.refresh_from_db()
+
+    def test_upload_generates_stripped_square_webp_renditions(self):
+        self.upload_photo()
+        renditions = self.student.profile_picture_renditions
+        self.assertEqual(set(renditions), set(RENDITION_SIZES))
+        for name, size in RENDITION_SIZES.items():
+            with default_storage.open(renditions[name]) as rendition:
+                image = Image.open(rendition)
+                self.assertEqual(image.format, 'WEBP')
+                self.assertEqual(image.size, (size, size))
+                self.assertFalse(image.getexif())
+
+        response = self.client.get('/api/users/me/')
+        self.assertTrue(
+            response.data['profile_picture_renditions']['small'].endswith(renditions['small'])
+        )
+
+    def test_new_upload_replaces_previous_renditions(self):
+        self.upload_photo()
+        first = self.student.profile_picture_renditions
+        self.upload_photo()
+        second = self.student.profile_picture_renditions
+        self.assertNotEqual(first, second)
+        self.assertFalse(any(default_storage.exists(path) for path in first.values()))
+
+    def test_renditions_invalidate_cached_user_data(self):
+        self.upload_photo()
+        generation = get_generations('users')
+        generate_profile_picture_renditions(self.student.pk, self.student.profile_picture.name)
+        self.assertNotEqual(get_generations('users'), generation)
+
+    def test_application_listing_embeds_thumbnail(self):
+        self.upload_photo()
+        application = Application.objects.create(
+            user=self.student,
+            opportunity=create_opportunity(create_user('admin@yabatech.edu.ng', 'administrator')),
+            cover_letter='Hello'
+        )
+        data = ApplicationSerializer(application).data
+        self.assertEqual(
+            data['user']['profile_picture'],
+            default_storage.url(self.student.profile_picture_renditions['small'])
+        )
+
+
+UNREAD_COUNT_URL = '/api/notifications/notifications/unread_count/'
+
+
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        user_cache.clear()
+        self.addCleanup(user_cache.clear)
+        self.student = create_user('student@yabatech.edu.ng')
+        self.client = APIClient()
+
+    def authenticate(self, user):
+        token = CustomTokenObtainPairSerializer.get_token(user).access_token
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {token}')
+
+    def save(self, user):
+        with self.captureOnCommitCallbacks(execute=True):
+            user.save()
+
+    def test_repeat_requests_skip_user_lookup(self):
+        self.authenticate(self.student)
+        with self.assertNumQueries(2):
+            self.assertEqual(self.client.get(UNREAD_COUNT_URL).status_code, 200)
+        with self.assertNumQueries(1):
+            self.assertEqual(self.client.get(UNREAD_COUNT_URL).status_code, 200)
+
+    def test_role_change_and_deactivation_revoke_tokens(self):
+        for field, value in [('role', 'administrator'), ('is_active', False)]:
+            user = create_user(f'{field}@yabatech.edu.ng')
+            self.authenticate(user)
+            self.assertEqual(self.client.get(UNREAD_COUNT_URL).status_code, 200)
+
+            setattr(user, field, value)
+            self.save(user)
+
+            response = self.client.get(UNREAD_COUNT_URL)
+            self.assertEqual(response.status_code, 401)
+
+    def test_saving_user_evicts_cached_copy(self):
+        self.authenticate(self.student)
+        self.client.get(UNREAD_COUNT_URL)
+        self.assertIsNotNone(user_cache.get(str(self.student.pk)))
+        self.save(self.student)
+        self.assertIsNone(user_cache.get(str(self.student.pk)))
+
+    def test_unrelated_update_keeps_tokens_valid(self):
+        self.authenticate(self.student)
+        self.student.name = 'Renamed'
+        self.save(self.student)
+        self.assertEqual(self.student.token_version, 0)
+        self.assertEqual(self.client.get('/api/users/me/').data['name'], 'Renamed')
+
+    def test_change_password_rotates_tokens(self):
+        self.student.set_password('old-password')
+        self.save(self.student)
+        self.authenticate(self.student)
+        self.assertEqual(self.client.get(UNREAD_COUNT_URL).status_code, 200)
+
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post('/api/users/change_password/', {
+                'old_password': 'old-password', 'new_password': 'new-password',
+            })
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.client.get(UNREAD_COUNT_URL).status_code, 401)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f"Bearer {response.data['access']}")
+        self.assertEqual(self.client.get(UNREAD_COUNT_URL).status_code, 200)
+
+
+class RefreshTokenRevocationTests(TestCase):
+    url = '/api/users/token/refresh/'
+
+    def setUp(self):
+        cache.clear()
+        revoked_tokens.reset()
+        self.addCleanup(revoked_tokens.reset)
+        self.student = create_user('student@yabatech.edu.ng')
+        self.client = APIClient()
+
+    def refresh(self, token):
+        return self.client.post(self.url, {'refresh': str(token)}, format='json')
+
+    def test_rotation_revokes_previous_refresh_token(self):
+        refresh = CustomTokenObtainPairSerializer.get_token(self.student)
+        response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(RevokedToken.objects.filter(jti=refresh['jti']).exists())
+
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+        # Another process that has not seen the revocation still hits the unique index
+        revoked_tokens.reset()
+        RevokedToken.objects.filter(jti=refresh['jti']).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, 200)
+
+    def test_rotation_revokes_with_a_single_insert(self):
+        refresh = CustomTokenObtainPairSerializer.get_token(self.student)
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.refresh(refresh)
+        self.assertEqual(response.status_code, 200)
+        statements = [q['sql'] for q in ctx.captured_queries if 'users_revokedtoken' in q['sql']]
+        self.assertEqual(len(statements), 1, statements)
+        self.assertTrue(statements[0].startswith('INSERT'))
+
+    @mock.patch('users.serializers.api_settings.ROTATE_REFRESH_TOKENS', False)
+    def test_unrevoked_lookup_skips_database(self):
+        self.refresh(CustomTokenObtainPairSerializer.get_token(self.student))
+        with self.assertNumQueries(0):
+            response = self.refresh(CustomTokenObtainPairSerializer.get_token(self.student))
+        self.assertEqual(response.status_code, 200)
+
+    def test_password_change_rejects_old_refresh_token(self):
+        refresh = CustomTokenObtainPairSerializer.get_token(self.student)
+        self.student.set_unusable_password()
+        with self.captureOnCommitCallbacks(execute=True):
+            self.student.save()
+        self.assertEqual(self.refresh(refresh).status_code, 401)
+
+    def test_purge_removes_only_expired_tokens(self):
+        now = timezone.now()
+        RevokedToken.objects.create(jti='expired', expires_at=now - timedelta(minutes=1))
+        RevokedToken.objects.create(jti='live', expires_at=now + timedelta(minutes=1))
+        call_command('purge_revoked_tokens', stdout=io.StringIO())
+        self.assertEqual(list(RevokedToken.objects.values_list('jti', flat=True)), ['live'])
@@ -1,9 +1,9 @@
 from django.urls import path, include
 from rest_framework.routers import DefaultRouter
-from rest_framework_simplejwt.views import TokenRefreshView
 from .views import (
     UserViewSet,
     CustomTokenObtainPairView,
+    RevokingTokenRefreshView,
     RegistrationView
 )
 
@@ -13,7 +13,7 @@ router.register(r'', UserViewSet, basename='user')
 urlpatterns = [
     # Authentication endpoints
     path('token/', CustomTokenObtainPairView.as_view(), name='token_obtain_pair'),
-    path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
+    path('token/refresh/', RevokingTokenRefreshView.as_view(), name='token_refresh'),
     path('register/', RegistrationView.as_view(), name='register'),
     
     # Router URLs
@@ -2,15 +2,16 @@ from rest_framework import viewsets, status, generics
 from rest_framework.decorators import action, permission_classes
 from rest_framework.response import Response
 from rest_framework.permissions import AllowAny, IsAuthenticated, IsAdminUser
-from rest_framework_simplejwt.views import TokenObtainPairView
+from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 from django.contrib.auth import get_user_model
 from django.utils import timezone
 from datetime import timedelta
-from django.db.models import Count
+from django.db.models import Count, Q
 from .serializers import (
     UserSerializer, 
     MultiStepRegistrationSerializer,
     CustomTokenObtainPairSerializer,
+    RevokingTokenRefreshSerializer,
     UserStatsSerializer
 )
 from .permissions import IsOwnerOrAdmin
@@ -19,11 +20,15 @@ from drf_spectacular.types import OpenApiTypes
 from django.contrib.auth.tokens import default_token_generator
 from opportunities.models import Opportunity
 from applications.models import Application
+from core.cache import get_or_compute
+from core.throttling import AUTH_THROTTLE_CLASSES
+from utils.uploads import PROFILE_PICTURE_UPLOAD, UploadGuardMixin
 
 User = get_user_model()
 
 class CustomTokenObtainPairView(TokenObtainPairView):
     serializer_class = CustomTokenObtainPairSerializer
+    throttle_classes = AUTH_THROTTLE_CLASSES
 
     @extend_schema(
         tags=['Authentication'],
@@ -47,10 +52,14 @@ class CustomTokenObtainPairView(TokenObtainPairView):
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
 
+class RevokingTokenRefreshView(TokenRefreshView):
+    serializer_class = RevokingTokenRefreshSerializer
+
 class RegistrationView(generics.CreateAPIView):
     queryset = User.objects.all()
     permission_classes = [AllowAny]
     serializer_class = MultiStepRegistrationSerializer
+    throttle_classes = AUTH_THROTTLE_CLASSES
 
     @extend_schema(
         tags=['Authentication'],
@@ -68,10 +77,14 @@ class RegistrationView(generics.CreateAPIView):
     def post(self, request, *args, **kwargs):
         return super().post(request, *args, **kwargs)
 
-class UserViewSet(viewsets.ModelViewSet):
+class UserViewSet(UploadGuardMixin, viewsets.ModelViewSet):
     queryset = User.objects.all()
     serializer_class = UserSerializer
     permission_classes = [IsAuthenticated, IsOwnerOrAdmin]
+    upload_rules = {
+        'me': PROFILE_PICTURE_UPLOAD,
+        'update_profile_picture': PROFILE_PICTURE_UPLOAD,
+    }
 
     def get_queryset(self):
         if self.request.user.role == 'administrator':
@@ -95,20 +108,15 @@ class UserViewSet(viewsets.ModelViewSet):
     )
     @action(detail=False, methods=['get', 'patch'])
     def me(self, request):
+        # request.user may come from the authentication cache; read and write a fresh row
+        user = User.objects.get(pk=request.user.pk)
         if request.method == 'GET':
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
             return Response(serializer.data)
         elif request.method == 'PATCH':
-            user = request.user
             if 'profile_picture' in request.FILES:
-                # Handle file upload
+                # Handle file upload (type and size checked while streaming)
                 file = request.FILES['profile_picture']
-                # Validate file type
-                if not file.content_type.startswith('image/'):
-                    return Response(
-                        {'error': 'Invalid file type. Only images are allowed.'}, 
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
                 # Save the file
                 user.profile_picture = file
                 user.save()
@@ -148,19 +156,28 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_403_FORBIDDEN
             )
 
-        now = timezone.now()
-        month_ago = now - timedelta(days=30)
-
-        stats = {
-            'total_users': User.objects.count(),
-            'active_users': User.objects.filter(is_active=True).count(),
-            'new_users_this_month': User.objects.filter(join_date__gte=month_ago).count(),
-            'user_roles': dict(User.objects.values_list('role').annotate(count=Count('id')))
-        }
-
+        stats = get_or_compute(['users'], 'stats:users', self._compute_stats)
         serializer = UserStatsSerializer(stats)
         return Response(serializer.data)
 
+    def _compute_stats(self):
+        month_ago = timezone.now() - timedelta(days=30)
+        roles = [choice for choice, _ in User._meta.get_field('role').choices]
+        counts = User.objects.aggregate(
+            total_users=Count('id'),
+            active_users=Count('id', filter=Q(is_active=True)),
+            new_users_this_month=Count('id', filter=Q(join_date__gte=month_ago)),
+            **{f'role_{role}': Count('id', filter=Q(role=role)) for role in roles}
+        )
+        return {
+            'total_users': counts['total_users'],
+            'active_users': counts['active_users'],
+            'new_users_this_month': counts['new_users_this_month'],
+            'user_roles': {
+                role: counts[f'role_{role}'] for role in roles if counts[f'role_{role}']
+            }
+        }
+
     @action(detail=False, methods=['post'])
     def update_profile_picture(self, request):
         """Upload or update user profile picture"""
@@ -170,28 +187,16 @@ class UserViewSet(viewsets.ModelViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
         
+        # Type and size were checked by the upload handler while streaming
         file = request.FILES['profile_picture']
-        
-        # Validate file type
-        if not file.content_type.startswith('image/'):
-            return Response(
-                {'error': 'Invalid file type. Only images are allowed.'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
-            
-        # Validate file size (5MB)
-        if file.size > 5 * 1024 * 1024:
-            return Response(
-                {'error': 'File size too large. Maximum size is 5MB.'}, 
-                status=status.HTTP_400_BAD_REQUEST
-            )
             
         try:
-            request.user.profile_picture = file
-            request.user.save()
-            request.user.calculate_completion_rate()
+            user = User.objects.get(pk=request.user.pk)
+            user.profile_picture = file
+            user.save()
+            user.calculate_completion_rate()
             
-            serializer = self.get_serializer(request.user)
+            serializer = self.get_serializer(user)
             response_data = serializer.data
             print(f"Profile picture URL: {response_data.get('profile_picture')}")  # Debug log
             return Response(response_data)
@@ -210,7 +215,7 @@ class UserViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=['post'])
     def change_password(self, request):
         """Allow users to change their password"""
-        user = request.user
+        user = User.objects.get(pk=request.user.pk)
         old_password = request.data.get('old_password')
         new_password = request.data.get('new_password')
         
@@ -222,7 +227,13 @@ class UserViewSet(viewsets.ModelViewSet):
             
         user.set_password(new_password)
         user.save()
-        return Response({'message': 'Password updated successfully'})
+        # Saving bumped token_version, so hand back tokens that are still valid
+        refresh = CustomTokenObtainPairSerializer.get_token(user)
+        return Response({
+            'message': 'Password updated successfully',
+            'access': str(refresh.access_token),
+            'refresh': str(refresh),
+        })
 
     @action(detail=False, methods=['post'])
     def forgot_password(self, request):
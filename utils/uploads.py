@@ -0,0 +1,147 @@
+"""Early validation of file uploads while the request body streams in.
+
+``ValidatingUploadHandler`` is placed ahead of Django's default upload
+handlers. It rejects a request as soon as the declared Content-Length or the
+bytes received for the guarded field exceed the endpoint's limit, and it
+checks the file's magic bytes on the first chunk instead of trusting the
+client-supplied content type. Nothing past the offending chunk is read or
+written to disk.
+"""
+from dataclasses import dataclass
+
+from django.core.files.uploadhandler import FileUploadHandler
+from rest_framework import status
+from rest_framework.exceptions import APIException
+
+# Room for the multipart boundaries and ordinary form fields
+MULTIPART_OVERHEAD = 64 * 1024
+
+# Bytes needed to recognise every signature below
+SNIFF_LENGTH = 12
+
+FILE_SIGNATURES = {
+    'pdf': [b'%PDF-'],
+    'doc': [b'\xd0\xcf\x11\xe0\xa1\xb1\x1a\xe1'],
+    'docx': [b'PK\x03\x04'],
+    'jpeg': [b'\xff\xd8\xff'],
+    'png': [b'\x89PNG\r\n\x1a\n'],
+    'gif': [b'GIF87a', b'GIF89a'],
+}
+
+DOCUMENT_KINDS = ('pdf', 'doc', 'docx')
+IMAGE_KINDS = ('jpeg', 'png', 'gif', 'webp')
+
+
+def sniff_kind(header):
+    """Return the file kind identified by the leading bytes, if any."""
+    if header[:4] == b'RIFF' and header[8:12] == b'WEBP':
+        return 'webp'
+    for kind, signatures in FILE_SIGNATURES.items():
+        if any(header.startswith(signature) for signature in signatures):
+            return kind
+    return None
+
+
+def sniff_file_kind(file):
+    """Sniff an already received file, leaving its position untouched."""
+    position = file.tell()
+    file.seek(0)
+    header = file.read(SNIFF_LENGTH)
+    file.seek(position)
+    return sniff_kind(header)
+
+
+class UploadRejected(APIException):
+    status_code = status.HTTP_400_BAD_REQUEST
+    default_detail = 'Invalid upload.'
+    default_code = 'upload_rejected'
+
+    def __init__(self, message):
+        super().__init__({'error': message})
+
+
+@dataclass(frozen=True)
+class UploadRule:
+    field_name: str
+    max_size: int
+    allowed_kinds: tuple
+    size_error: str
+    type_error: str
+
+
+RESUME_UPLOAD = UploadRule(
+    field_name='resume',
+    max_size=10 * 1024 * 1024,
+    allowed_kinds=DOCUMENT_KINDS,
+    size_error='File size exceeds 10MB limit',
+    type_error='Invalid file type. Only PDF and Word documents are allowed',
+)
+
+APPLICATION_RESUME_UPLOAD = UploadRule(
+    field_name='resume',
+    max_size=5 * 1024 * 1024,
+    allowed_kinds=DOCUMENT_KINDS,
+    size_error='File size too large. Maximum size is 5MB.',
+    type_error='Invalid file type. Please upload a PDF or Word document.',
+)
+
+PROFILE_PICTURE_UPLOAD = UploadRule(
+    field_name='profile_picture',
+    max_size=5 * 1024 * 1024,
+    allowed_kinds=IMAGE_KINDS,
+    size_error='File size too large. Maximum size is 5MB.',
+    type_error='Invalid file type. Only images are allowed.',
+)
+
+
+class ValidatingUploadHandler(FileUploadHandler):
+    def __init__(self, request, rule):
+        super().__init__(request)
+        self.rule = rule
+        self.guarding = False
+
+    def handle_raw_input(self, input_data, META, content_length, boundary, encoding=None):
+        if content_length > self.rule.max_size + MULTIPART_OVERHEAD:
+            raise UploadRejected(self.rule.size_error)
+
+    def new_file(self, field_name, *args, **kwargs):
+        super().new_file(field_name, *args, **kwargs)
+        self.guarding = field_name == self.rule.field_name
+        self.received = 0
+        self.header = b''
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.guarding:
+            self.received += len(raw_data)
+            if self.received > self.rule.max_size:
+                raise UploadRejected(self.rule.size_error)
+            if len(self.header) < SNIFF_LENGTH:
+                self.header += raw_data[:SNIFF_LENGTH - len(self.header)]
+                if len(self.header) >= SNIFF_LENGTH:
+                    self.check_kind()
+        return raw_data
+
+    def file_complete(self, file_size):
+        if self.guarding and len(self.header) < SNIFF_LENGTH:
+            self.check_kind()
+        # Let the regular handlers build the uploaded file
+        return None
+
+    def check_kind(self):
+        if sniff_kind(self.header) not in self.rule.allowed_kinds:
+            raise UploadRejected(self.rule.type_error)
+
+
+class UploadGuardMixin:
+    """Installs a ValidatingUploadHandler for the actions in ``upload_rules``.
+
+    The handler must be in place before the request body is parsed, which
+    is why this hooks ``initial()`` rather than the action itself.
+    """
+    upload_rules = {}
+
+    def initial(self, request, *args, **kwargs):
+        rule = self.upload_rules.get(self.action)
+        if rule is not None:
+            request.upload_handlers.insert(0, ValidatingUploadHandler(request._request, rule))
+        super().initial(request, *args, **kwargs)